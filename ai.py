@@ -31,22 +31,24 @@ def get_diccionari():
     global _diccionari_cache
     if _diccionari_cache is None:
         print("Carregant diccionari...")
-        diccionari_json = Path("data/diccionari.json")
-        if diccionari_json.exists():
+        diccionari_path = Path("data/diccionari.bin")
+        if Diccionari.existeix(str(diccionari_path)):
             try:
-                _diccionari_cache = Diccionari.load(str(diccionari_json))
-                print(f"✓ Diccionari carregat des de {diccionari_json}")
+                _diccionari_cache = Diccionari.load(str(diccionari_path))
+                print(f"✓ Diccionari carregat des de {diccionari_path}")
             except Exception as e:
-                print(f"Error carregant diccionari des de {diccionari_json}: {e}")
+                print(f"Error carregant diccionari des de {diccionari_path}: {e}")
                 print("Generant nou diccionari...")
                 _diccionari_cache = Diccionari.obtenir_diccionari()
-                _diccionari_cache.save(str(diccionari_json))
+                _diccionari_cache.save(str(diccionari_path))
         else:
             print("Generant diccionari...")
             _diccionari_cache = Diccionari.obtenir_diccionari()
-            diccionari_json.parent.mkdir(parents=True, exist_ok=True)
-            _diccionari_cache.save(str(diccionari_json))
-            print(f"✓ Diccionari generat i desat a {diccionari_json}")
+            diccionari_path.parent.mkdir(parents=True, exist_ok=True)
+            _diccionari_cache.save(str(diccionari_path))
+            print(f"✓ Diccionari generat i desat a {diccionari_path}")
+        # Es manté en memòria durant tota la vida del procés: millor la versió compacta
+        _diccionari_cache = _diccionari_cache.compactar()
     return _diccionari_cache
 
 def get_api_key():
@@ -0,0 +1,267 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional
+
+
+class CacheLRU:
+    """
+    Cache LRU de mida fitada, segura entre fils, amb comptadors d'encerts, fallades i expulsions.
+
+    A diferència de functools.lru_cache permet consultar si una clau ja és a memòria sense
+    calcular-la (obtenir retorna None si no hi és) i descartar entrades concretes.
+    """
+
+    def __init__(self, mida_maxima: int):
+        self.mida_maxima = max(1, mida_maxima)
+        self.encerts = 0
+        self.fallades = 0
+        self.expulsions = 0
+        self._entrades: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtenir(self, clau: Hashable) -> Optional[Any]:
+        with self._lock:
+            valor = self._entrades.get(clau)
+            if valor is not None:
+                self._entrades.move_to_end(clau)
+                self.encerts += 1
+            else:
+                self.fallades += 1
+            return valor
+
+    def desar(self, clau: Hashable, valor: Any) -> None:
+        with self._lock:
+            self._entrades[clau] = valor
+            self._entrades.move_to_end(clau)
+            while len(self._entrades) > self.mida_maxima:
+                self._entrades.popitem(last=False)
+                self.expulsions += 1
+
+    def descartar(self, clau: Hashable) -> None:
+        with self._lock:
+            self._entrades.pop(clau, None)
+
+    def buidar(self) -> None:
+        with self._lock:
+            self._entrades.clear()
+
+    def claus(self) -> List[Hashable]:
+        """Claus presents (còpia; no compta com a consulta ni canvia l'ordre LRU)."""
+        with self._lock:
+            return list(self._entrades)
+
+    def estadistiques(self) -> Dict[str, Any]:
+        with self._lock:
+            consultes = self.encerts + self.fallades
+            return {
+                "entrades": len(self._entrades),
+                "mida_maxima": self.mida_maxima,
+                "encerts": self.encerts,
+                "fallades": self.fallades,
+                "expulsions": self.expulsions,
+                "taxa_encerts": self.encerts / consultes if consultes else 0.0,
+            }
+
+    def __contains__(self, clau: Hashable) -> bool:
+        with self._lock:
+            return clau in self._entrades
+
+    def __len__(self) -> int:
+        return len(self._entrades)
+
+
+class CacheTTL(CacheLRU):
+    """
+    CacheLRU on cada entrada caduca 'ttl' segons després de desar-la.
+
+    Les entrades caducades es descarten quan es consulten (compten com a fallada i a 'caducades')
+    o quan la mida màxima obliga a treure les menys usades.
+    """
+
+    def __init__(self, mida_maxima: int, ttl: float):
+        super().__init__(mida_maxima)
+        self.ttl = ttl
+        self.caducades = 0
+
+    def obtenir(self, clau: Hashable) -> Optional[Any]:
+        with self._lock:
+            entrada = self._entrades.get(clau)
+            if entrada is not None and entrada[0] <= time.monotonic():
+                del self._entrades[clau]
+                self.caducades += 1
+                entrada = None
+            if entrada is None:
+                self.fallades += 1
+                return None
+            self._entrades.move_to_end(clau)
+            self.encerts += 1
+            return entrada[1]
+
+    def desar(self, clau: Hashable, valor: Any) -> None:
+        super().desar(clau, (time.monotonic() + self.ttl, valor))
+
+    def estadistiques(self) -> Dict[str, Any]:
+        resultat = super().estadistiques()
+        resultat.update(ttl=self.ttl, caducades=self.caducades)
+        return resultat
+
+    def __contains__(self, clau: Hashable) -> bool:
+        with self._lock:
+            entrada = self._entrades.get(clau)
+            return entrada is not None and entrada[0] > time.monotonic()
+
+
+class Cache2Q(CacheLRU):
+    """
+    Cache amb política 2Q, fitada per nombre d'entrades i per bytes, amb entrades fixades.
+
+    Les claus noves entren a una cua FIFO ('a1in'); només passen a la part LRU principal ('am') si
+    es tornen a demanar després d'haver sortit de la FIFO, mentre encara són a la llista de claus
+    recents expulsades ('fantasmes'). Així un recorregut de moltes claus consultades una sola
+    vegada (p. ex. reptes antics) només renova la FIFO i no expulsa les entrades d'ús freqüent.
+
+    Cada entrada ocupa mida_entrada(valor) bytes. Quan se supera 'bytes_maxims' o 'mida_maxima',
+    s'expulsa de la FIFO si té més de 'fraccio_entrada' de qualsevol dels dos límits (bytes o
+    entrades) i, si no, de la LRU.
+    Les claus fixades (fixar) no s'expulsen mai, encara que superin el pressupost entre totes.
+    """
+
+    def __init__(self, mida_maxima: int, bytes_maxims: int, fraccio_entrada: float = 0.25,
+                 mida_fantasmes: Optional[int] = None):
+        super().__init__(mida_maxima)
+        self.bytes_maxims = max(1, bytes_maxims)
+        self.fraccio_entrada = fraccio_entrada
+        self.mida_fantasmes = max(1, mida_fantasmes if mida_fantasmes is not None else self.mida_maxima)
+        self.bytes = 0
+        self.bytes_expulsats = 0
+        self.promocions = 0
+        self._a1in: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._am: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._fantasmes: "OrderedDict[Hashable, None]" = OrderedDict()
+        self._mides: Dict[Hashable, int] = {}
+        self._bytes_a1in = 0
+        self._fixades: frozenset = frozenset()
+
+    def mida_entrada(self, valor: Any) -> int:
+        """Bytes que ocupa un valor (per defecte 1: el pressupost compta entrades)."""
+        return 1
+
+    def fixar(self, claus: Iterable[Hashable]) -> None:
+        """Substitueix el conjunt de claus que no es poden expulsar."""
+        with self._lock:
+            self._fixades = frozenset(claus)
+            self._ajustar()
+
+    def obtenir(self, clau: Hashable) -> Optional[Any]:
+        with self._lock:
+            if clau in self._am:
+                self._am.move_to_end(clau)
+                valor = self._am[clau]
+            else:
+                # A la FIFO un encert no canvia l'ordre: el que compta és si torna després de sortir-ne
+                valor = self._a1in.get(clau)
+            if valor is None:
+                self.fallades += 1
+            else:
+                self.encerts += 1
+            return valor
+
+    def desar(self, clau: Hashable, valor: Any) -> None:
+        mida = self.mida_entrada(valor)
+        with self._lock:
+            self._treure(clau)
+            if clau in self._am:
+                self._am[clau] = valor
+                self._am.move_to_end(clau)
+            elif self._fantasmes.pop(clau, False) is None:
+                # Ha tornat després de sortir de la FIFO: passa a la LRU
+                self._am[clau] = valor
+                self.promocions += 1
+            else:
+                self._a1in[clau] = valor
+                self._bytes_a1in += mida
+            self._mides[clau] = mida
+            self.bytes += mida
+            self._ajustar()
+
+    def descartar(self, clau: Hashable) -> None:
+        with self._lock:
+            self._treure(clau)
+            self._am.pop(clau, None)
+            self._a1in.pop(clau, None)
+
+    def buidar(self) -> None:
+        with self._lock:
+            self._a1in.clear()
+            self._am.clear()
+            self._fantasmes.clear()
+            self._mides.clear()
+            self.bytes = self._bytes_a1in = 0
+
+    def claus(self) -> List[Hashable]:
+        with self._lock:
+            return list(self._a1in) + list(self._am)
+
+    def estadistiques(self) -> Dict[str, Any]:
+        with self._lock:
+            consultes = self.encerts + self.fallades
+            return {
+                "entrades": len(self._a1in) + len(self._am),
+                "mida_maxima": self.mida_maxima,
+                "bytes": self.bytes,
+                "bytes_maxims": self.bytes_maxims,
+                "entrades_a1in": len(self._a1in),
+                "entrades_am": len(self._am),
+                "fantasmes": len(self._fantasmes),
+                # Només el nombre: les claus fixades (reptes d'avui i demà) no s'han de publicar
+                "fixades": len(self._fixades),
+                "encerts": self.encerts,
+                "fallades": self.fallades,
+                "expulsions": self.expulsions,
+                "bytes_expulsats": self.bytes_expulsats,
+                "promocions": self.promocions,
+                "taxa_encerts": self.encerts / consultes if consultes else 0.0,
+            }
+
+    def __contains__(self, clau: Hashable) -> bool:
+        with self._lock:
+            return clau in self._am or clau in self._a1in
+
+    def __len__(self) -> int:
+        return len(self._a1in) + len(self._am)
+
+    # ------------------------------ Expulsió (amb el lock agafat) ------------------------------
+    def _treure(self, clau: Hashable) -> None:
+        """Descompta la mida d'una clau present (el valor el treu o substitueix qui crida)."""
+        mida = self._mides.pop(clau, None)
+        if mida is None:
+            return
+        self.bytes -= mida
+        if clau in self._a1in:
+            self._bytes_a1in -= mida
+            del self._a1in[clau]
+
+    def _primera_no_fixada(self, cua: "OrderedDict[Hashable, Any]") -> Optional[Hashable]:
+        return next((clau for clau in cua if clau not in self._fixades), None)
+
+    def _ajustar(self) -> None:
+        while self.bytes > self.bytes_maxims or len(self._a1in) + len(self._am) > self.mida_maxima:
+            de_a1in = self._primera_no_fixada(self._a1in)
+            de_am = self._primera_no_fixada(self._am)
+            a1in_ple = (self._bytes_a1in > self.fraccio_entrada * self.bytes_maxims
+                        or len(self._a1in) > self.fraccio_entrada * self.mida_maxima)
+            if de_a1in is not None and (de_am is None or a1in_ple):
+                # La clau surt de la FIFO però es recorda: si es torna a demanar anirà a la LRU
+                self._fantasmes[de_a1in] = None
+                while len(self._fantasmes) > self.mida_fantasmes:
+                    self._fantasmes.popitem(last=False)
+                victima = de_a1in
+            elif de_am is not None:
+                victima = de_am
+                del self._am[victima]
+            else:
+                break  # només queden entrades fixades
+            self.bytes_expulsats += self._mides.get(victima, 0)
+            self._treure(victima)
+            self.expulsions += 1
@@ -0,0 +1,91 @@
+import json
+import os
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Set
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # Python < 3.9
+    ZoneInfo = None
+
+
+class Calendari:
+    """
+    Calendari de reptes: quina paraula toca cada dia.
+
+    Es llegeix d'un fitxer JSON amb dates ISO com a claus, p. ex.
+        {"2025-10-16": "compliment", "2025-10-17": "finestra"}
+    El dia canvia a la mitjanit de la zona horària configurada. Si una data no és al calendari
+    (o el fitxer no existeix) es fa servir la paraula per defecte.
+    """
+
+    def __init__(self, path: str, zona: Optional[str] = None, paraula_per_defecte: str = "paraula"):
+        self.path = path
+        self.paraula_per_defecte = paraula_per_defecte
+        self.zona = None
+        if zona and ZoneInfo is not None:
+            try:
+                self.zona = ZoneInfo(zona)
+            except Exception:
+                print(f"[WARN] Zona horària '{zona}' no disponible; s'usa l'hora local del sistema.")
+        self._paraules: Dict[date, str] = {}
+        self._mtime: Optional[int] = None
+        self.recarregar_si_cal()
+
+    def recarregar_si_cal(self) -> bool:
+        """Torna a llegir el fitxer si ha canviat des de l'última lectura. Retorna True si s'ha recarregat."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            if self._mtime is None and not self._paraules:
+                return False
+            self._paraules, self._mtime = {}, None
+            return True
+        if mtime == self._mtime:
+            return False
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        paraules: Dict[date, str] = {}
+        for clau, paraula in data.items():
+            try:
+                paraules[date.fromisoformat(clau)] = str(paraula).strip().lower()
+            except ValueError:
+                print(f"[WARN] Data no vàlida al calendari: '{clau}'")
+        # Substitució atòmica: les lectures concurrents veuen el calendari antic o el nou, mai un de parcial
+        self._paraules = paraules
+        self._mtime = mtime
+        return True
+
+    def ara(self) -> datetime:
+        return datetime.now(self.zona)
+
+    def avui(self) -> date:
+        return self.ara().date()
+
+    def paraula(self, dia: date) -> str:
+        return self._paraules.get(dia, self.paraula_per_defecte)
+
+    def paraula_avui(self) -> str:
+        return self.paraula(self.avui())
+
+    def propers(self, dies: int) -> List[str]:
+        """Paraules d'avui i dels 'dies' dies següents (sense repeticions, en ordre)."""
+        avui = self.avui()
+        paraules = [self.paraula(avui + timedelta(days=i)) for i in range(dies + 1)]
+        return list(dict.fromkeys(paraules))
+
+    def no_publicades(self) -> Set[str]:
+        """
+        Paraules que encara poden ser la resposta d'avui o d'un dia futur: les del calendari a
+        partir d'avui i la paraula per defecte (toca qualsevol dia que no hi sigui).
+        """
+        avui = self.avui()
+        paraules = {paraula for dia, paraula in self._paraules.items() if dia >= avui}
+        paraules.add(self.paraula_per_defecte)
+        return paraules
+
+    def segons_fins_canvi(self) -> float:
+        """Segons que falten fins a la propera mitjanit local."""
+        ara = self.ara()
+        dema = datetime.combine(ara.date() + timedelta(days=1), time(0), tzinfo=ara.tzinfo)
+        return max(0.0, (dema - ara).total_seconds())
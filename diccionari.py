@@ -1,15 +1,18 @@
 
 import os
 import json
-import pickle
 import random
 import re
 import requests
+import hashlib
+from array import array
 from collections import defaultdict
-from typing import Dict, Set, Tuple, Optional
+from typing import Dict, List, Set, Tuple, Optional
+
+from taules import Seccio, Taules, TaulaCadenes, bloqueig_fitxer
 
 class Diccionari:
-    CACHE_FILE = "diccionari_cache.pkl"
+    CACHE_FILE = "diccionari_cache.bin"
     DATA_DIR = "data"
     FREQ_URL = "https://raw.githubusercontent.com/Softcatala/catalan-dict-tools/refs/heads/master/frequencies/frequencies-dict-lemmas.txt"
     DICCIONARI_URLS = [
@@ -21,11 +24,14 @@ class Diccionari:
                  mapping_flexions_multi: Dict[str, Set[str]],
                  canoniques: Dict[str, Set[str]],
                  freq: Optional[Dict[str, int]] = None,
-                 lema_categories: Optional[Dict[str, Set[str]]] = None):
+                 lema_categories: Optional[Dict[str, Set[str]]] = None,
+                 resolucio: Optional[Dict[str, Tuple[Optional[str], bool]]] = None):
         self.mapping_flexions_multi = mapping_flexions_multi  # flexió -> conjunt de lemes
         self.canoniques = canoniques  # lema base -> conjunt de flexions
         self.lema_categories = lema_categories or defaultdict(set)
         self.freq = freq or {}
+        # forma -> (forma canònica, és_flexió); vegeu preparar_resolucio
+        self._resolucio = resolucio
 
     @classmethod
     def normalitzar_paraula(cls, paraula: str) -> str:
@@ -108,68 +114,98 @@ class Diccionari:
     def obtenir_diccionari(cls, freq_min=20, use_cache=True):
         os.makedirs(cls.DATA_DIR, exist_ok=True)
         cache_file_path = os.path.join(cls.DATA_DIR, cls.CACHE_FILE)
+        # Si n'hi ha més, cal adaptar-ho
+        if len(cls.DICCIONARI_URLS) != 1:
+            raise NotImplementedError("Només es suporta un diccionari per ara.")
+        cru = None
         if use_cache and os.path.exists(cache_file_path):
             print(f"Carregant diccionari des del cache: {cache_file_path}")
-            with open(cache_file_path, 'rb') as f:
-                diccionaris_data = pickle.load(f)
-            # Només un diccionari
-            if len(diccionaris_data) == 1:
-                mapping_multi, canoniques, lema_cats = list(diccionaris_data.values())[0]
-                freq_lemes = cls.obtenir_freq_lemes()
-                mapping_multi_filtrat, canoniques, freq_filtrat = cls.filtrar_diccionari_per_frequencia(mapping_multi, canoniques, freq_lemes, freq_min)
-                lemes_valids = set(canoniques.keys())
-                lema_cats_filtrat = {l: lema_cats.get(l, set()) for l in lemes_valids}
-                # Aplica exclusions (formes/lemes) si existeix data/exclusions.json
-                formes_exc, lemes_exc = cls._load_exclusions_json()
-                if formes_exc or lemes_exc:
-                    cls._apply_exclusions_to_data(canoniques, mapping_multi_filtrat, lema_cats_filtrat, freq_filtrat, formes_exc, lemes_exc)
-                return cls(mapping_multi_filtrat, canoniques, freq_filtrat, lema_cats_filtrat)
-            # Si n'hi ha més, cal adaptar-ho
-            raise NotImplementedError("Només es suporta un diccionari per ara.")
-        print("Generant diccionaris des de les fonts...")
-        diccionaris_data = {}
-        for nom, url in cls.DICCIONARI_URLS:
+            try:
+                cru = cls.load(cache_file_path)
+            except (ValueError, KeyError) as e:
+                print(f"[WARN] Cache de diccionari no vàlida ({e}); es regenera.")
+        if cru is None:
+            print("Generant diccionaris des de les fonts...")
+            nom, url = cls.DICCIONARI_URLS[0]
             print(f"Descarregant {nom}...")
             contingut = cls.descarregar_diccionari(url)
             mapping_multi, canoniques, lema_cats = cls.processar_diccionari(contingut)
-            diccionaris_data[nom] = (mapping_multi, canoniques, lema_cats)
-        with open(cache_file_path, 'wb') as f:
+            cru = cls(mapping_multi, canoniques, lema_categories=lema_cats)
             print(f"Desant diccionaris al cache: {cache_file_path}")
-            pickle.dump(diccionaris_data, f)
-        # Només un diccionari
-        if len(diccionaris_data) == 1:
-            mapping_multi, canoniques, lema_cats = list(diccionaris_data.values())[0]
-            freq_lemes = cls.obtenir_freq_lemes()
-            mapping_multi_filtrat, canoniques, freq_filtrat = cls.filtrar_diccionari_per_frequencia(mapping_multi, canoniques, freq_lemes, freq_min)
-            lemes_valids = set(canoniques.keys())
-            lema_cats_filtrat = {l: lema_cats.get(l, set()) for l in lemes_valids}
-            # Aplica exclusions (formes/lemes) si existeix data/exclusions.json
-            formes_exc, lemes_exc = cls._load_exclusions_json()
-            if formes_exc or lemes_exc:
-                cls._apply_exclusions_to_data(canoniques, mapping_multi_filtrat, lema_cats_filtrat, freq_filtrat, formes_exc, lemes_exc)
-            return cls(mapping_multi_filtrat, canoniques, freq_filtrat, lema_cats_filtrat)
-        raise NotImplementedError("Només es suporta un diccionari per ara.")
+            cru.save(cache_file_path)
+        mapping_multi, canoniques, lema_cats = cru.mapping_flexions_multi, cru.canoniques, cru.lema_categories
+        freq_lemes = cls.obtenir_freq_lemes()
+        mapping_multi_filtrat, canoniques, freq_filtrat = cls.filtrar_diccionari_per_frequencia(mapping_multi, canoniques, freq_lemes, freq_min)
+        lemes_valids = set(canoniques.keys())
+        lema_cats_filtrat = {l: lema_cats.get(l, set()) for l in lemes_valids}
+        # Aplica exclusions (formes/lemes) si existeix data/exclusions.json
+        formes_exc, lemes_exc = cls._load_exclusions_json()
+        if formes_exc or lemes_exc:
+            cls._apply_exclusions_to_data(canoniques, mapping_multi_filtrat, lema_cats_filtrat, freq_filtrat, formes_exc, lemes_exc)
+        return cls(mapping_multi_filtrat, canoniques, freq_filtrat, lema_cats_filtrat)
 
     def save(self, path: str):
-        os.makedirs(os.path.dirname(path), exist_ok=True)
+        """Desa una instantània binària (taules compactes amb resum SHA-1, vegeu DiccionariCompacte)."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        DiccionariCompartit.compilar(self, path)
+
+    @classmethod
+    def load(cls, path: str) -> "Diccionari":
+        """
+        Carrega una instantània desada amb save(). Es verifica el resum i no s'executa cap codi
+        (a diferència de pickle). Retorna un DiccionariCompartit de només lectura; per modificar-lo,
+        a_diccionari(). També accepta el JSON antic o exportat (vegeu exportar_json).
+        Si 'path' no existeix però hi ha un .json amb el mateix nom, es migra.
+        """
+        if not os.path.exists(path):
+            antic = os.path.splitext(path)[0] + ".json"
+            if antic != path and os.path.exists(antic):
+                print(f"Migrant {antic} a la instantània binària {path}...")
+                cls.load_json(antic).save(path)
+        if not Taules.es_fitxer_taules(path):
+            return cls.load_json(path)
+        return DiccionariCompartit(path, verificar=True)
+
+    @staticmethod
+    def existeix(path: str) -> bool:
+        """Si es pot carregar 'path' amb load() (la instantània o el JSON antic que es migraria)."""
+        return os.path.exists(path) or os.path.exists(os.path.splitext(path)[0] + ".json")
+
+    def exportar_json(self, path: str):
+        """
+        Exporta el diccionari en JSON (el format antic; llegible però lent de carregar), amb la
+        taula de resolució calculada de nou a partir de les dades actuals.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        resolucio = self.taula_resolucio()
         with open(path, 'w', encoding='utf-8') as f:
             json.dump({
-                'mapping_flexions_multi': {k: list(v) for k, v in self.mapping_flexions_multi.items()},
-                'canoniques': {k: list(v) for k, v in self.canoniques.items()},
-                'lema_categories': {k: list(v) for k, v in self.lema_categories.items()},
-                'freq': self.freq
+                'mapping_flexions_multi': {k: sorted(v) for k, v in self.mapping_flexions_multi.items()},
+                'canoniques': {k: sorted(v) for k, v in self.canoniques.items()},
+                'lema_categories': {k: sorted(v) for k, v in self.lema_categories.items()},
+                'freq': self.freq,
+                'resolucio': {k: list(v) for k, v in resolucio.items() if v[0] is not None},
             }, f, ensure_ascii=False, indent=2)
 
     @classmethod
-    def load(cls, path: str):
+    def load_json(cls, path: str) -> "Diccionari":
+        """Llegeix el JSON i hi deixa preparada la taula de resolució (la desada o, si no n'hi ha, calculada)."""
         with open(path, 'r', encoding='utf-8') as f:
             data = json.load(f)
-        return cls(
+        resolucio = data.get('resolucio')
+        dicc = Diccionari(
             mapping_flexions_multi={k: set(v) for k, v in data['mapping_flexions_multi'].items()},
             canoniques={k: set(v) for k, v in data['canoniques'].items()},
             freq=data.get('freq', {}),
-            lema_categories={k: set(v) for k, v in data.get('lema_categories', {}).items()}
+            lema_categories={k: set(v) for k, v in data.get('lema_categories', {}).items()},
+            resolucio={k: (v[0], bool(v[1])) for k, v in resolucio.items()} if resolucio is not None else None,
         )
+        dicc.preparar_resolucio()
+        return dicc
+
+    def compactar(self) -> "DiccionariCompacte":
+        """Còpia de només lectura sobre arrays compactes (vegeu DiccionariCompacte)."""
+        return DiccionariCompacte.de_diccionari(self)
 
     def lema(self, flexio: str) -> Optional[str]:
         """Retorna el primer lema per compatibilitat (pot ser arbitrari si n'hi ha múltiples)."""
@@ -180,6 +216,9 @@ class Diccionari:
         """Tots els lemes possibles per a una flexió."""
         return self.mapping_flexions_multi.get(flexio, set())
 
+    def conte_forma(self, flexio: str) -> bool:
+        return flexio in self.mapping_flexions_multi
+
     def categories_lema(self, lema: str) -> Set[str]:
         return self.lema_categories.get(lema, set())
 
@@ -223,10 +262,10 @@ class Diccionari:
             return None
         
         # Comprova si la paraula sense pronom existeix al diccionari
-        if paraula_sense_pronom not in self.mapping_flexions_multi:
+        if not self.conte_forma(paraula_sense_pronom):
             return None
         
-        lemes = self.mapping_flexions_multi[paraula_sense_pronom]
+        lemes = self.lemes(paraula_sense_pronom)
         
         # Filtra només els lemes que:
         # 1. Són verbs (categoria 'VM')
@@ -245,11 +284,10 @@ class Diccionari:
         # Retorna el primer lema vàlid (normalment només n'hi haurà un)
         return lemes_verbs_valids[0]
 
-    def obtenir_forma_canonica(self, paraula: str) -> Tuple[Optional[str], bool]:
-        paraula_norm = self.normalitzar_paraula(paraula)
+    def _resoldre_forma(self, paraula_norm: str) -> Tuple[Optional[str], bool]:
         # Si tenim múltiples lemes, prioritzar el que coincideix exactament amb la forma
-        if paraula_norm in self.mapping_flexions_multi:
-            lemes = self.mapping_flexions_multi[paraula_norm]
+        if self.conte_forma(paraula_norm):
+            lemes = self.lemes(paraula_norm)
 
             # Si el set de lemes està buit, retornar None (cas anòmal però possible)
             if not lemes:
@@ -279,6 +317,28 @@ class Diccionari:
 
         return None, False
 
+    def taula_resolucio(self) -> Dict[str, Tuple[Optional[str], bool]]:
+        """Resolució precalculada forma -> (forma canònica, és_flexió), incloent-hi les formes pronominals vàlides."""
+        taula = {forma: self._resoldre_forma(forma) for forma in self.mapping_flexions_multi}
+        for forma in list(taula):
+            for pronominal in (forma + "-se", forma + "'s"):
+                if pronominal not in taula:
+                    lema_verb = self._gestionar_pronominalitzacio(pronominal)
+                    if lema_verb:
+                        taula[pronominal] = (lema_verb, True)
+        return taula
+
+    def preparar_resolucio(self) -> Dict[str, Tuple[Optional[str], bool]]:
+        """Taula de resolució del diccionari: la llegida en carregar-lo o, si no n'hi ha, calculada ara."""
+        if self._resolucio is None:
+            self._resolucio = self.taula_resolucio()
+        return self._resolucio
+
+    def obtenir_forma_canonica(self, paraula: str) -> Tuple[Optional[str], bool]:
+        # Cada consulta és una sola cerca al dict (la taula ja és a punt si s'ha fet servir load)
+        resolucio = self._resolucio if self._resolucio is not None else self.preparar_resolucio()
+        return resolucio.get(self.normalitzar_paraula(paraula), (None, False))
+
     # ------------------------------ Exclusions (formes i lemes) ------------------------------
     @classmethod
     def _load_exclusions_json(cls) -> Tuple[Set[str], Set[str]]:
@@ -343,3 +403,256 @@ class Diccionari:
                         del canoniques[l]
                         lema_categories.pop(l, None)
                         freq.pop(l, None)
+
+
+class DiccionariCompacte(Diccionari):
+    """
+    Diccionari de només lectura sobre arrays compactes en lloc de dicts de sets.
+
+    Les formes i els lemes s'internen en taules de cadenes ordenades (vegeu taules.TaulaCadenes) i
+    es referencien per índex. Les relacions forma -> lemes i lema -> formes són parells d'arrays
+    CSR (offsets + índexs), les categories de cada lema una màscara de bits i la resolució
+    forma -> forma canònica (Diccionari.taula_resolucio) una taula més. Ofereix les mateixes
+    consultes que Diccionari amb una fracció de la memòria.
+
+    Els atributs de Diccionari (mapping_flexions_multi, canoniques, ...) també hi són, però es
+    reconstrueixen en dicts la primera vegada que s'hi accedeix.
+    """
+
+    # Versió del conjunt de seccions; es desa a les metadades de la instantània
+    VERSIO = 1
+
+    def __init__(self, seccions, meta: dict):
+        if meta.get("versio") != self.VERSIO:
+            raise ValueError(f"Versió d'instantània de diccionari no suportada: {meta.get('versio')}")
+        self._seccions = seccions
+        self._dicts: Optional[Diccionari] = None
+        self._resolucio = None
+        self._formes = TaulaCadenes.de_taules(seccions, "formes")
+        self._lemes = TaulaCadenes.de_taules(seccions, "lemes")
+        self._forma_mapejada = seccions["forma_mapejada"]
+        self._forma_lemes_off = seccions["forma_lemes.off"]
+        self._forma_lemes = seccions["forma_lemes.idx"]
+        self._lema_formes_off = seccions["lema_formes.off"]
+        self._lema_formes = seccions["lema_formes.idx"]
+        self._lema_freq = seccions["lema_freq"]
+        self._lema_cats = seccions["lema_cats"]
+        self._lema_canonic = seccions["lema_canonic"]
+        self._resolucio_formes = TaulaCadenes.de_taules(seccions, "resolucio")
+        self._resolucio_lema = seccions["resolucio.lema"]
+        self._resolucio_flexio = seccions["resolucio.flexio"]
+        self._categories: List[str] = meta["categories"]
+        # Identifica el contingut del diccionari (p. ex. per invalidar índexs derivats)
+        self.empremta: str = meta["empremta"]
+
+    @staticmethod
+    def _clau_utf8(text: str) -> bytes:
+        return text.encode("utf-8")
+
+    @classmethod
+    def seccions(cls, dicc: Diccionari) -> Tuple[Dict[str, Seccio], dict]:
+        """Taules compactes d'un Diccionari i les seves metadades."""
+        lemes_set = set(dicc.canoniques) | set(dicc.lema_categories) | set(dicc.freq)
+        for ls in dicc.mapping_flexions_multi.values():
+            lemes_set.update(ls)
+        formes_set = set(dicc.mapping_flexions_multi)
+        for fs in dicc.canoniques.values():
+            formes_set.update(fs)
+        # Ordenades pels bytes UTF-8 perquè el resultat sigui determinista (la cerca usa la taula de dispersió)
+        lemes = sorted(lemes_set, key=cls._clau_utf8)
+        formes = sorted(formes_set, key=cls._clau_utf8)
+        id_lema = {l: i for i, l in enumerate(lemes)}
+        id_forma = {f: i for i, f in enumerate(formes)}
+        categories = sorted({c for cats in dicc.lema_categories.values() for c in cats})
+        if len(categories) > 32:
+            raise ValueError("Massa categories per una màscara de 32 bits.")
+        bit_categoria = {c: 1 << i for i, c in enumerate(categories)}
+
+        def csr(claus: List[str], relacio: Dict[str, Set[str]], ids: Dict[str, int]) -> Tuple[array, array]:
+            offsets = array("I", [0])
+            index = array("i")
+            for clau in claus:
+                index.extend(sorted(ids[v] for v in relacio.get(clau, ())))
+                offsets.append(len(index))
+            return offsets, index
+
+        forma_lemes_off, forma_lemes = csr(formes, dicc.mapping_flexions_multi, id_lema)
+        lema_formes_off, lema_formes = csr(lemes, dicc.canoniques, id_forma)
+        # Resolució forma -> forma canònica precalculada (la del JSON si n'hi havia, vegeu preparar_resolucio)
+        resolucio = dicc.preparar_resolucio()
+        formes_resolucio = sorted(resolucio, key=cls._clau_utf8)
+        seccions = {
+            **TaulaCadenes.seccions("formes", formes, amb_dispersio=True),
+            **TaulaCadenes.seccions("lemes", lemes, amb_dispersio=True),
+            "forma_mapejada": array("B", (f in dicc.mapping_flexions_multi for f in formes)),
+            "forma_lemes.off": forma_lemes_off,
+            "forma_lemes.idx": forma_lemes,
+            "lema_formes.off": lema_formes_off,
+            "lema_formes.idx": lema_formes,
+            "lema_freq": array("q", (int(dicc.freq.get(l, 0)) for l in lemes)),
+            "lema_cats": array("I", (sum(bit_categoria[c] for c in dicc.lema_categories.get(l, ())) for l in lemes)),
+            "lema_canonic": array("B", (l in dicc.canoniques for l in lemes)),
+            **TaulaCadenes.seccions("resolucio", formes_resolucio, amb_dispersio=True),
+            "resolucio.lema": array("i", (-1 if resolucio[f][0] is None else id_lema[resolucio[f][0]] for f in formes_resolucio)),
+            "resolucio.flexio": array("B", (resolucio[f][1] for f in formes_resolucio)),
+        }
+        empremta = hashlib.sha1()
+        for nom in sorted(seccions):
+            valor = seccions[nom]
+            empremta.update(valor.tobytes() if isinstance(valor, array) else valor)
+        return seccions, {"versio": cls.VERSIO, "categories": categories, "empremta": empremta.hexdigest()[:16]}
+
+    @classmethod
+    def de_diccionari(cls, dicc: Diccionari) -> "DiccionariCompacte":
+        return DiccionariCompacte(*cls.seccions(dicc))
+
+    def a_diccionari(self) -> Diccionari:
+        """Reconstrueix el Diccionari amb dicts de sets (p. ex. per modificar-lo o desar-lo)."""
+        mapping = {}
+        for i in range(len(self._formes)):
+            if self._forma_mapejada[i]:
+                forma = self._formes[i]
+                mapping[forma] = self.lemes(forma)
+        canoniques, lema_categories, freq = {}, {}, {}
+        for i in range(len(self._lemes)):
+            lema = self._lemes[i]
+            if self._lema_canonic[i]:
+                canoniques[lema] = set(self.totes_les_flexions(lema))
+            if self._lema_cats[i]:
+                lema_categories[lema] = self.categories_lema(lema)
+            if self._lema_freq[i]:
+                freq[lema] = self._lema_freq[i]
+        return Diccionari(mapping, canoniques, freq=freq, lema_categories=lema_categories)
+
+    def compactar(self) -> "DiccionariCompacte":
+        return self
+
+    def _reconstruir(self) -> Diccionari:
+        if self._dicts is None:
+            self._dicts = self.a_diccionari()
+        return self._dicts
+
+    @property
+    def mapping_flexions_multi(self) -> Dict[str, Set[str]]:
+        return self._reconstruir().mapping_flexions_multi
+
+    @property
+    def canoniques(self) -> Dict[str, Set[str]]:
+        return self._reconstruir().canoniques
+
+    @property
+    def lema_categories(self) -> Dict[str, Set[str]]:
+        return self._reconstruir().lema_categories
+
+    @property
+    def freq(self) -> Dict[str, int]:
+        return self._reconstruir().freq
+
+    @property
+    def nbytes(self) -> int:
+        """Mida de les taules (sense comptar els objectes Python que les embolcallen)."""
+        return sum(memoryview(v).nbytes for v in self._seccions.values())
+
+    # ------------------------------ Consultes ------------------------------
+    def conte_forma(self, flexio: str) -> bool:
+        i = self._formes.index(flexio)
+        return i is not None and bool(self._forma_mapejada[i])
+
+    def lemes(self, flexio: str) -> Set[str]:
+        i = self._formes.index(flexio)
+        if i is None:
+            return set()
+        ids = self._forma_lemes[self._forma_lemes_off[i]:self._forma_lemes_off[i + 1]]
+        return {self._lemes[j] for j in ids}
+
+    def lema(self, flexio: str) -> Optional[str]:
+        return next(iter(sorted(self.lemes(flexio))), None)
+
+    def categories_lema(self, lema: str) -> Set[str]:
+        i = self._lemes.index(lema)
+        if i is None:
+            return set()
+        mascara = self._lema_cats[i]
+        return {c for b, c in enumerate(self._categories) if mascara & (1 << b)}
+
+    def freq_lema(self, lema: str) -> int:
+        i = self._lemes.index(lema)
+        return 0 if i is None else self._lema_freq[i]
+
+    def totes_les_lemes(self, freq_min: int = 0):
+        return [self._lemes[i] for i in range(len(self._lemes))
+                if self._lema_canonic[i] and self._lema_freq[i] >= freq_min]
+
+    def obtenir_forma_canonica(self, paraula: str) -> Tuple[Optional[str], bool]:
+        i = self._resolucio_formes.index(self.normalitzar_paraula(paraula))
+        if i is None or self._resolucio_lema[i] < 0:
+            return None, False
+        return self._lemes[self._resolucio_lema[i]], bool(self._resolucio_flexio[i])
+
+    def totes_les_flexions(self, lema: str):
+        i = self._lemes.index(lema)
+        if i is None:
+            return []
+        ids = self._lema_formes[self._lema_formes_off[i]:self._lema_formes_off[i + 1]]
+        return [self._formes[j] for j in ids]
+
+
+class DiccionariCompartit(DiccionariCompacte):
+    """
+    DiccionariCompacte amb les taules en un fitxer obert amb mmap (vegeu taules.py).
+
+    Pensat pel servidor amb diversos workers: les taules es compilen un cop a partir de
+    data/diccionari.json i cada procés s'hi adjunta sense copiar-les. No té cap taula pròpia:
+    el format és el de DiccionariCompacte.seccions, i aquesta classe només hi afegeix el fitxer
+    compartit i la compilació per un sol procés.
+    """
+
+    EXTENSIO = ".bin"
+
+    def __init__(self, path: str, verificar: bool = False):
+        taules = Taules(path, verificar=verificar)
+        self.path = path
+        super().__init__(taules, taules.meta)
+
+    @classmethod
+    def compilar(cls, dicc: Diccionari, path: str) -> None:
+        """Escriu les taules compactes d'un Diccionari a 'path'."""
+        seccions, meta = cls.seccions(dicc)
+        Taules.escriure(path, seccions, meta=meta)
+
+    @classmethod
+    def obrir_o_compilar(cls, path: str) -> "DiccionariCompartit":
+        """
+        Obre la instantània 'path'. Si és un JSON (format antic), o una instantània d'una versió
+        anterior amb un .json germà, compila la instantània .bin germana a partir del JSON.
+        """
+        if Taules.es_fitxer_taules(path):
+            try:
+                return cls(path, verificar=True)
+            except (ValueError, KeyError):
+                if not os.path.exists(os.path.splitext(path)[0] + ".json"):
+                    raise
+        path_json = path if path.endswith(".json") else os.path.splitext(path)[0] + ".json"
+        path_bin = os.path.splitext(path_json)[0] + cls.EXTENSIO
+
+        def obrir_si_actualitzat() -> Optional["DiccionariCompartit"]:
+            if not os.path.exists(path_bin) or os.stat(path_bin).st_mtime_ns < os.stat(path_json).st_mtime_ns:
+                return None
+            try:
+                return cls(path_bin, verificar=True)
+            except (ValueError, KeyError):
+                return None  # format antic o malmès: es recompila
+
+        dicc = obrir_si_actualitzat()
+        if dicc is None:
+            # Només un procés compila; la resta espera i obre el resultat
+            with bloqueig_fitxer(path_bin, temps_maxim=300):
+                dicc = obrir_si_actualitzat()
+                if dicc is None:
+                    cls.compilar(Diccionari.load_json(path_json), path_bin)
+                    dicc = cls(path_bin)
+        return dicc
+
+    @property
+    def nbytes(self) -> int:
+        return self._seccions.nbytes
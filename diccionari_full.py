@@ -2,11 +2,157 @@ import os
 import re
 import json
 import sqlite3
+import threading
+import time
+from array import array
 from collections import defaultdict
-from typing import Dict, Set, Tuple, Optional, List
+from itertools import combinations
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Set, Tuple, Optional, List
 
 import requests
 from rapidfuzz import fuzz
+from rapidfuzz.distance import OSA
+
+from cache import CacheLRU
+from taules import Taules, TaulaCadenes, bloqueig_fitxer
+
+
+class IndexPropers:
+    """
+    Índex d'esborrats (estil SymSpell) sobre forma_simplified per trobar paraules properes.
+
+    Per cada forma simplificada es desen totes les cadenes que s'obtenen esborrant-ne fins a
+    'distancia' lletres del prefix de 'prefix' lletres. Dues paraules a distància d'edició <= k
+    comparteixen algun d'aquests esborrats, de manera que els candidats d'una consulta surten de
+    consultar a la taula de dispersió els esborrats de la consulta (uns quants desenes) i
+    verificar-los amb la distància OSA real. No depèn de la primera lletra ni de cap límit de files.
+
+    Només s'indexen les formes que near pot suggerir (lema principal NC/VM i freqüència >= 20),
+    amb la freqüència del lema principal, perquè el filtrat ja no calgui a cada consulta.
+    Es desa com a Taules (mmap) al costat de la base de dades.
+    """
+
+    EXTENSIO = ".propers"
+    VERSIO = 1
+
+    SQL_FORMES = """
+        SELECT f.forma, f.forma_simplified, COALESCE(l.freq, 0) AS freq
+        FROM formes f
+        LEFT JOIN lemmes l ON l.lemma = f.primary_lemma
+        WHERE EXISTS (
+                SELECT 1 FROM lemma_categories lc
+                WHERE lc.lemma = f.primary_lemma
+                    AND lc.category IN ('NC','VM')
+            )
+            AND COALESCE(l.freq, 0) >= 20
+    """
+
+    def __init__(self, taules, distancia: int, prefix: int):
+        self.distancia = distancia
+        self.prefix = prefix
+        self.simplificades = TaulaCadenes.de_taules(taules, "simp")
+        self.simp_formes = taules["simp_formes.off"]
+        self.formes = TaulaCadenes.de_taules(taules, "formes")
+        self.freq = taules["formes_freq"]
+        self.claus = TaulaCadenes.de_taules(taules, "claus")
+        self.claus_off = taules["claus_simp.off"]
+        self.claus_idx = taules["claus_simp.idx"]
+
+    @staticmethod
+    def esborrats(text: str, distancia: int) -> Set[str]:
+        """'text' i totes les cadenes que en surten esborrant-ne entre 1 i 'distancia' lletres."""
+        resultat = {text}
+        for n in range(1, min(distancia, len(text)) + 1):
+            for posicions in combinations(range(len(text)), n):
+                resultat.add("".join(c for i, c in enumerate(text) if i not in posicions))
+        return resultat
+
+    @classmethod
+    def seccions(cls, files: Iterable[Tuple[str, str, int]], distancia: int = 2, prefix: int = 7):
+        """Seccions de l'índex a partir de files (forma, forma_simplified, freq)."""
+        per_simp: Dict[str, List[Tuple[str, int]]] = defaultdict(list)
+        for forma, simp, freq in files:
+            per_simp[simp].append((forma, int(freq)))
+        simplificades = sorted(per_simp)
+
+        formes: List[str] = []
+        freq = array("i")
+        simp_formes = array("I", [0])
+        claus: Dict[str, List[int]] = defaultdict(list)
+        for i, simp in enumerate(simplificades):
+            for forma, f in sorted(per_simp[simp]):
+                formes.append(forma)
+                freq.append(f)
+            simp_formes.append(len(formes))
+            for clau in cls.esborrats(simp[:prefix], distancia):
+                claus[clau].append(i)
+
+        claus_ordenades = sorted(claus)
+        claus_off = array("I", [0])
+        claus_idx = array("I")
+        for clau in claus_ordenades:
+            claus_idx.extend(claus[clau])
+            claus_off.append(len(claus_idx))
+
+        seccions = {}
+        seccions.update(TaulaCadenes.seccions("simp", simplificades))
+        seccions.update(TaulaCadenes.seccions("formes", formes))
+        seccions.update(TaulaCadenes.seccions("claus", claus_ordenades, amb_dispersio=True))
+        seccions.update({"simp_formes.off": simp_formes, "formes_freq": freq,
+                         "claus_simp.off": claus_off, "claus_simp.idx": claus_idx})
+        return seccions
+
+    @staticmethod
+    def empremta(db_path: str) -> str:
+        estat = os.stat(db_path)
+        return f"{estat.st_size}:{estat.st_mtime_ns}"
+
+    @classmethod
+    def obrir_o_construir(cls, conn: sqlite3.Connection, db_path: str, distancia: int = 2,
+                          prefix: int = 7) -> "IndexPropers":
+        """
+        Obre l'índex desat al costat de 'db_path' si correspon a aquesta base de dades i paràmetres;
+        si no, el construeix a partir de 'conn' i el desa (un sol procés a la vegada).
+        """
+        path = f"{db_path}{cls.EXTENSIO}"
+        meta = {"versio": cls.VERSIO, "empremta": cls.empremta(db_path), "distancia": distancia, "prefix": prefix}
+
+        def obrir() -> Optional["IndexPropers"]:
+            try:
+                taules = Taules(path)
+            except (FileNotFoundError, ValueError):
+                return None
+            if taules.meta != meta:
+                return None
+            return cls(taules, distancia, prefix)
+
+        index = obrir()
+        if index is not None:
+            return index
+        with bloqueig_fitxer(path, temps_maxim=300.0):
+            index = obrir()
+            if index is None:
+                Taules.escriure(path, cls.seccions(conn.execute(cls.SQL_FORMES), distancia, prefix), meta)
+                index = obrir()
+        return index
+
+    def candidats(self, q_simp: str) -> List[Tuple[str, int]]:
+        """Formes (forma, freq) la forma simplificada de les quals és a distància OSA <= 'distancia'."""
+        k = self.distancia
+        vistos: Set[int] = set()
+        for clau in self.esborrats(q_simp[:self.prefix], k):
+            i = self.claus.index(clau)
+            if i is not None:
+                vistos.update(self.claus_idx[self.claus_off[i]:self.claus_off[i + 1]])
+        resultat = []
+        for i in vistos:
+            simp = self.simplificades[i]
+            if abs(len(simp) - len(q_simp)) > k or OSA.distance(q_simp, simp, score_cutoff=k) > k:
+                continue
+            for j in range(self.simp_formes[i], self.simp_formes[i + 1]):
+                resultat.append((self.formes[j], self.freq[j]))
+        return resultat
 
 
 class DiccionariFull:
@@ -64,13 +210,117 @@ class DiccionariFull:
         "I": "una interjecció",
     }
 
-    def __init__(self, db_path: str):
+    # Consultes fixes: el sqlite3 de cada connexió guarda les sentències preparades per text SQL,
+    # de manera que cada consulta es compila una sola vegada per fil
+    SQL_NEAR_EXACTE = """
+        SELECT f.forma,
+               COALESCE((SELECT freq FROM lemmes l WHERE l.lemma = f.primary_lemma), 0) AS freq
+        FROM formes f
+        WHERE f.forma_simplified = ?
+        ORDER BY freq DESC
+        LIMIT ?
+    """
+    SQL_NEAR_PREFILTRE = """
+        SELECT f.forma, f.forma_simplified,
+               COALESCE((SELECT freq FROM lemmes l WHERE l.lemma = f.primary_lemma), 0) AS freq
+        FROM formes f
+        WHERE LENGTH(f.forma_simplified) BETWEEN ? AND ?
+            AND substr(f.forma_simplified, 1, 1) = ?
+            AND EXISTS (
+                SELECT 1 FROM lemma_categories lc
+                WHERE lc.lemma = f.primary_lemma
+                    AND lc.category IN ('NC','VM')
+            )
+            AND COALESCE((SELECT freq FROM lemmes l WHERE l.lemma = f.primary_lemma), 0) >= 20
+        ORDER BY ABS(LENGTH(f.forma_simplified) - ?) ASC, freq DESC
+        LIMIT 1000
+    """
+    # Tot el que info i reason_* necessiten d'una forma en una sola consulta: una fila per
+    # (lema, categoria), o una sola fila amb lema NULL si la forma no té lemes
+    SQL_FORMA = """
+        SELECT f.forma IS NOT NULL AS existeix, f.primary_lemma, fl.lemma,
+               COALESCE(l.freq, 0) AS freq, lc.category
+        FROM (SELECT ? AS forma) w
+        LEFT JOIN formes f ON f.forma = w.forma
+        LEFT JOIN forma_lemma fl ON fl.forma = w.forma
+        LEFT JOIN lemmes l ON l.lemma = fl.lemma
+        LEFT JOIN lemma_categories lc ON lc.lemma = fl.lemma
+        ORDER BY fl.lemma, lc.category
+    """
+
+    def __init__(self, db_path: str, immutable: bool = True, mida_cache_mb: int = 16,
+                 mmap_mb: int = 256, sentencies: int = 64, distancia_propers: int = 2,
+                 mida_cache_formes: int = 4096):
         """
-        Inicialitza el diccionari amb una connexió a la base de dades SQLite.
+        Prepara l'accés de només lectura a la base de dades SQLite.
+
+        Cada fil obre la seva pròpia connexió ('conn') la primera vegada que fa una consulta, de
+        manera que near, info, explain_invalid... es poden cridar alhora des de diversos fils.
+        Les connexions s'obren amb mode=ro i, si 'immutable', amb immutable=1: SQLite no fa
+        bloquejos ni comprova canvis al fitxer, però cal reiniciar si es reconstrueix la base
+        de dades mentre està oberta (obtenir_diccionari_full la substitueix de manera atòmica).
+        Les dades de cada forma consultada es guarden en una cache LRU de 'mida_cache_formes'
+        entrades (vegeu dades_forma).
         """
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path)
-        self.conn.row_factory = sqlite3.Row  # Per accedir a columnes per nom
+        self.immutable = immutable
+        self.mida_cache_mb = mida_cache_mb
+        self.mmap_mb = mmap_mb
+        self.sentencies = sentencies
+        self._uri = Path(db_path).resolve().as_uri() + "?mode=ro" + ("&immutable=1" if immutable else "")
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connexions: List[sqlite3.Connection] = []
+        self.distancia_propers = distancia_propers
+        self._index_propers: Optional[IndexPropers] = None
+        self._lock_index = threading.Lock()
+        self.cache_formes = CacheLRU(mida_cache_formes)
+        # Funció opcional (nom_consulta, segons) que rep la durada de cada consulta SQL (p. ex. mètriques)
+        self.observador_consultes: Optional[Callable[[str, float], None]] = None
+
+    def _obrir_connexio(self) -> sqlite3.Connection:
+        # check_same_thread=False només perquè close() pugui tancar les connexions de tots els fils;
+        # cada connexió la fa servir exclusivament el fil que l'ha oberta
+        conn = sqlite3.connect(self._uri, uri=True, check_same_thread=False, cached_statements=self.sentencies)
+        conn.row_factory = sqlite3.Row  # Per accedir a columnes per nom
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_mb) * 1024 * 1024}")
+        conn.execute(f"PRAGMA cache_size = -{int(self.mida_cache_mb) * 1024}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA query_only = 1")
+        with self._lock:
+            self._connexions.append(conn)
+        return conn
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Connexió de només lectura del fil actual (s'obre la primera vegada)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._obrir_connexio()
+        return conn
+
+    def _consultar(self, nom: str, sql: str, parametres: tuple) -> List[sqlite3.Row]:
+        """Executa una consulta a la connexió del fil actual i en notifica la durada a l'observador."""
+        inici = time.perf_counter()
+        files = self.conn.execute(sql, parametres).fetchall()
+        if self.observador_consultes is not None:
+            self.observador_consultes(nom, time.perf_counter() - inici)
+        return files
+
+    def index_propers(self) -> Optional[IndexPropers]:
+        """Índex d'esborrats per near (el servidor el prepara en arrencar; si no, la primera vegada que cal)."""
+        if self._index_propers is None:
+            with self._lock_index:
+                if self._index_propers is None:
+                    try:
+                        self._index_propers = IndexPropers.obrir_o_construir(
+                            self.conn, self.db_path, distancia=self.distancia_propers
+                        )
+                    except (OSError, TimeoutError) as e:
+                        # Sense l'índex (p. ex. directori de només lectura) near fa el prefiltrat SQL
+                        print(f"[WARN] No s'ha pogut preparar l'índex de paraules properes: {e}")
+                        return None
+        return self._index_propers
 
     # ------------------------------ Construcció i càrrega ------------------------------
     @staticmethod
@@ -204,8 +454,12 @@ class DiccionariFull:
                 best = sorted(lemes)[0]
             forma_primary[forma] = best
 
-        # 5) Crea la base de dades SQLite
-        conn = sqlite3.connect(db_path)
+        # 5) Crea la base de dades SQLite en un fitxer temporal: els lectors (oberts amb immutable=1)
+        # continuen veient la versió anterior fins que se substitueix
+        tmp_path = f"{db_path}.{os.getpid()}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        conn = sqlite3.connect(tmp_path)
         cursor = conn.cursor()
         
         # Crea taules
@@ -285,13 +539,24 @@ class DiccionariFull:
         
         conn.commit()
         conn.close()
+        os.replace(tmp_path, db_path)
 
-        return cls(db_path)
+        dicc_full = cls(db_path)
+        dicc_full.index_propers()
+        return dicc_full
 
     def close(self) -> None:
-        """Tanca la connexió a la base de dades."""
-        if hasattr(self, 'conn'):
-            self.conn.close()
+        """Tanca les connexions de tots els fils (se'n tornen a obrir si es fa una altra consulta)."""
+        if not hasattr(self, '_lock'):
+            return
+        with self._lock:
+            connexions, self._connexions = self._connexions, []
+            self._local = threading.local()
+        for conn in connexions:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
     
     def __del__(self):
         """Assegura que la connexió es tanqui quan l'objecte es destrueix."""
@@ -326,8 +591,9 @@ class DiccionariFull:
 
     def near(self, text: str, limit: int = 10, min_score: int = 60) -> dict:
         """
-        Cerca paraules properes a 'text' amb un filtrat bàsic a SQLite i puntuació determinista
-        basada en penalitzacions ortogràfiques (_score_ortografic).
+        Cerca paraules properes a 'text': els candidats surten de l'índex d'esborrats (IndexPropers,
+        distància d'edició <= distancia_propers sobre el text sense accents) i es puntuen de manera
+        determinista amb penalitzacions ortogràfiques (_score_ortografic).
         - limit: màxim de resultats retornats
         - min_score: puntuació mínima (0-100) per acceptar un candidat
         Retorna dict amb camp 'query' i llista 'candidates' (word, score, freq).
@@ -337,21 +603,8 @@ class DiccionariFull:
             return {"query": q_norm, "simplified": "", "candidates": []}
         q_simp = self._simplificar_text(q_norm)
 
-        cursor = self.conn.cursor()
-
         # Primer: match exacte (sense accents) sobre forma_simplified
-        cursor.execute(
-            """
-            SELECT f.forma,
-                   COALESCE((SELECT freq FROM lemmes l WHERE l.lemma = f.primary_lemma), 0) AS freq
-            FROM formes f
-            WHERE f.forma_simplified = ?
-            ORDER BY freq DESC
-            LIMIT ?
-            """,
-            (q_simp, limit)
-        )
-        exact_matches = cursor.fetchall()
+        exact_matches = self._consultar("near_exacte", self.SQL_NEAR_EXACTE, (q_simp, limit))
         if exact_matches:
             candidates = [
                 {"word": forma, "score": 100, "freq": int(freq)}
@@ -359,36 +612,20 @@ class DiccionariFull:
             ]
             return {"query": q_norm, "simplified": q_simp, "candidates": candidates}
 
-        # Prefiltrat SQL per longitud i primera lletra simplificada
-        L = len(q_simp)
-        low = max(1, L - 2)
-        high = L + 2
-        first = q_simp[0]
-        cursor.execute(
-                """
-                SELECT f.forma, f.forma_simplified,
-                                COALESCE((SELECT freq FROM lemmes l WHERE l.lemma = f.primary_lemma), 0) AS freq
-                FROM formes f
-                WHERE LENGTH(f.forma_simplified) BETWEEN ? AND ?
-                    AND substr(f.forma_simplified, 1, 1) = ?
-                    AND EXISTS (
-                            SELECT 1 FROM lemma_categories lc
-                            WHERE lc.lemma = f.primary_lemma
-                                AND lc.category IN ('NC','VM')
-                    )
-                    AND COALESCE((SELECT freq FROM lemmes l WHERE l.lemma = f.primary_lemma), 0) >= 20
-                ORDER BY ABS(LENGTH(f.forma_simplified) - ?) ASC, freq DESC
-                LIMIT 1000
-                """,
-                (low, high, first, L)
-        )
-        rows = cursor.fetchall()
+        index = self.index_propers()
+        if index is not None:
+            # Candidats a distància d'edició acotada via l'índex d'esborrats (ja filtrats per NC/VM i freqüència)
+            rows = index.candidats(q_simp)
+        else:
+            # Prefiltrat SQL per longitud i primera lletra simplificada
+            L = len(q_simp)
+            low = max(1, L - 2)
+            high = L + 2
+            first = q_simp[0]
+            rows = [(row[0], row[2]) for row in self._consultar("near_prefiltre", self.SQL_NEAR_PREFILTRE, (low, high, first, L))]
 
         candidates = []
-        for row in rows:
-            forma = row[0]
-            forma_simp = row[1]
-            freq = row[2]
+        for forma, freq in rows:
             score = self._score_ortografic(q_norm, forma)
             if score < min_score:
                 continue
@@ -399,6 +636,50 @@ class DiccionariFull:
         candidates = candidates[: max(0, int(limit))]
         return {"query": q_norm, "simplified": q_simp, "candidates": candidates}
 
+    def dades_forma(self, paraula: str) -> dict:
+        """
+        Dades de la forma normalitzada 'paraula' tal com surten de la base de dades (una sola
+        consulta, amb cache LRU per forma):
+          {
+            'existeix': bool,                  # és a la taula de formes
+            'primary_lemma': str|None,
+            'lemmas': [str],                   # tots els lemes associats, ordenats
+            'lemma_categories': {lema: [cat2, ...]},
+            'lemma_freq': {lema: int}
+          }
+        El resultat és compartit: no s'ha de modificar.
+        """
+        dades = self.cache_formes.obtenir(paraula)
+        if dades is not None:
+            return dades
+        existeix = False
+        primary = None
+        lcats: Dict[str, List[str]] = {}
+        lfreq: Dict[str, int] = {}
+        for row in self._consultar("forma", self.SQL_FORMA, (paraula,)):
+            existeix = bool(row[0])
+            primary = row[1]
+            lema = row[2]
+            if lema is None:
+                continue
+            cats = lcats.setdefault(lema, [])
+            lfreq[lema] = row[3]
+            if row[4] is not None:
+                cats.append(row[4])
+        dades = {
+            "existeix": existeix,
+            "primary_lemma": primary,
+            "lemmas": list(lcats),
+            "lemma_categories": lcats,
+            "lemma_freq": lfreq,
+        }
+        self.cache_formes.desar(paraula, dades)
+        return dades
+
+    def _lemes_propis(self, w: str, dades: dict) -> List[str]:
+        # Si la paraula és també un lema, es restringeix als lemes propis (només ella mateixa)
+        return [w] if w in dades["lemma_freq"] else dades["lemmas"]
+
     def info(self, paraula: str) -> dict:
         """
         Retorna informació detallada d'una paraula/flexió:
@@ -413,54 +694,24 @@ class DiccionariFull:
           }
         """
         w = self._normalitzar_paraula(paraula)
-        cursor = self.conn.cursor()
-        
-        # Obté lemes associats a la forma
-        cursor.execute("""
-            SELECT fl.lemma
-            FROM forma_lemma fl
-            WHERE fl.forma = ?
-        """, (w,))
-        raw_lemes = [row[0] for row in cursor.fetchall()]
-        
-        # Si la paraula és també un lema, restringeix als lemes propis (només ella mateixa)
-        if w in raw_lemes:
-            lemes = [w]
-        else:
-            lemes = raw_lemes
+        dades = self.dades_forma(w)
+        lemes = self._lemes_propis(w, dades)
         
         known = len(lemes) > 0
-        
-        # Obté lema principal
-        cursor.execute("SELECT primary_lemma FROM formes WHERE forma = ?", (w,))
-        row = cursor.fetchone()
-        primary = row[0] if row else None
+        primary = dades["primary_lemma"]
         
         is_inflection = None
         if known and primary is not None:
             is_inflection = w != primary
 
-        # Obté categories per lema
-        lcats = {}
-        for l in lemes:
-            cursor.execute("SELECT category FROM lemma_categories WHERE lemma = ?", (l,))
-            lcats[l] = [row[0] for row in cursor.fetchall()]
-        
-        # Obté freqüències per lema
-        lfreq = {}
-        for l in lemes:
-            cursor.execute("SELECT freq FROM lemmes WHERE lemma = ?", (l,))
-            row = cursor.fetchone()
-            lfreq[l] = row[0] if row else 0
-
         return {
             "word": w,
             "known_form": known,
-            "lemmas": lemes,
+            "lemmas": list(lemes),
             "primary_lemma": primary,
             "is_inflection": is_inflection,
-            "lemma_categories": lcats,
-            "lemma_freq": lfreq,
+            "lemma_categories": {l: list(dades["lemma_categories"][l]) for l in lemes},
+            "lemma_freq": {l: dades["lemma_freq"][l] for l in lemes},
         }
 
     def _cat2_label(self, cat2: str) -> str:
@@ -469,33 +720,23 @@ class DiccionariFull:
     def reason_invalid_category(self, paraula: str) -> Optional[str]:
         """Si la paraula existeix però cap dels seus lemes té categoria permesa, retorna missatge d'error."""
         w = self._normalitzar_paraula(paraula)
-        cursor = self.conn.cursor()
-        
-        # Obté lemes associats
-        cursor.execute("SELECT lemma FROM forma_lemma WHERE forma = ?", (w,))
-        lemes = {row[0] for row in cursor.fetchall()}
-        
-        if w in lemes:
-            # només el lema propi
-            lemes = {w}
+        dades = self.dades_forma(w)
+        lemes = self._lemes_propis(w, dades)
         
         if not lemes:
             return None  # Desconeguda: que ho gestioni qui crida
         
         # Comprova si algun lema és permès
-        for l in lemes:
-            cursor.execute("SELECT category FROM lemma_categories WHERE lemma = ?", (l,))
-            cats = {row[0] for row in cursor.fetchall()}
-            if any(c in self.ALLOWED_CAT2 for c in cats):
-                return None
+        lcats = dades["lemma_categories"]
+        if any(c in self.ALLOWED_CAT2 for l in lemes for c in lcats[l]):
+            return None
         
         # No hi ha cap lema permès; construeix etiqueta predominant per feedback
         # Tria la categoria més freqüent entre els candidats per mostrar al missatge
         counter: Dict[str, int] = defaultdict(int)
         for l in lemes:
-            cursor.execute("SELECT category FROM lemma_categories WHERE lemma = ?", (l,))
-            for row in cursor.fetchall():
-                counter[row[0]] += 1
+            for cat in lcats[l]:
+                counter[cat] += 1
         
         if counter:
             # primera per major nombre i, si empat, ordre alfabètic
@@ -510,25 +751,13 @@ class DiccionariFull:
         Si la paraula existeix però tots els lemes candidats tenen freq < freq_min, retorna missatge.
         """
         w = self._normalitzar_paraula(paraula)
-        cursor = self.conn.cursor()
-        
-        # Obté lemes associats
-        cursor.execute("SELECT lemma FROM forma_lemma WHERE forma = ?", (w,))
-        lemes = {row[0] for row in cursor.fetchall()}
-        
-        if w in lemes:
-            lemes = {w}
+        dades = self.dades_forma(w)
+        lemes = self._lemes_propis(w, dades)
         
         if not lemes:
             return None
         
-        best = 0
-        for l in lemes:
-            cursor.execute("SELECT freq FROM lemmes WHERE lemma = ?", (l,))
-            row = cursor.fetchone()
-            freq = row[0] if row else 0
-            best = max(best, freq)
-        
+        best = max(dades["lemma_freq"][l] for l in lemes)
         if best < freq_min:
             return "Disculpa, la paraula no és vàlida, busca'n una de més comuna."
         return None
@@ -542,10 +771,7 @@ class DiccionariFull:
         """
         # Si no existeix al diccionari complet
         w = self._normalitzar_paraula(paraula)
-        cursor = self.conn.cursor()
-        
-        cursor.execute("SELECT 1 FROM formes WHERE forma = ?", (w,))
-        if not cursor.fetchone():
+        if not self.dades_forma(w)["existeix"]:
             return "Disculpa, aquesta paraula no està ben escrita."
         
         msg = self.reason_invalid_category(w)
@@ -560,7 +786,7 @@ if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser(description="Genera/consulta el diccionari complet sense filtre")
-    parser.add_argument("--rebuild", action="store_true", help="Força reconstrucció i desat a data/diccionari_full.pkl")
+    parser.add_argument("--rebuild", action="store_true", help="Força reconstrucció de data/diccionari_full.db i del seu índex de paraules properes")
     parser.add_argument("--near", type=str, default=None, help="Cerca paraules properes a un text (fuzzy)")
     parser.add_argument("--near-limit", type=int, default=50, help="Nombre màxim de suggeriments per --near")
     parser.add_argument("--near-min-score", type=int, default=60, help="Puntuació mínima (0-100) per acceptar un suggeriment")
@@ -0,0 +1,228 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from taules import bloqueig_fitxer
+
+# Límits superiors (inclosos) dels intervals de posició; l'últim interval és "més de 10000"
+LIMITS_POSICIO = [1, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+class EstadistiquesPartida:
+    """Agregats d'un repte (una paraula rebuscada). Cada esdeveniment s'hi afegeix en O(1)."""
+
+    def __init__(self, max_invalides: int = 50):
+        self.max_invalides = max_invalides
+        self.intents = 0
+        self.valids = 0
+        self.encerts = 0
+        self.fora_diccionari = 0
+        self.invalids = 0
+        self.no_trobats = 0
+        self.restaurats = 0
+        self.pistes = 0
+        self.pistes_fallides = 0
+        self.rendicions = 0
+        self.whynot = 0
+        self.posicions = [0] * (len(LIMITS_POSICIO) + 1)
+        self.paraules_invalides: Counter = Counter()
+        self.primer_ts: Optional[float] = None
+        self.darrer_ts: Optional[float] = None
+
+    def _afegir_invalida(self, paraula: str) -> None:
+        self.paraules_invalides[paraula] += 1
+        # Comptador aproximat de mida fitada: quan dobla la capacitat es queda amb les més freqüents
+        # (cost amortitzat O(1) per esdeveniment)
+        if len(self.paraules_invalides) > 2 * self.max_invalides:
+            self.paraules_invalides = Counter(dict(self.paraules_invalides.most_common(self.max_invalides)))
+
+    def processar(self, esdeveniment: Dict) -> None:
+        tipus = esdeveniment.get("tipus")
+        ts = esdeveniment.get("ts")
+        if ts is not None:
+            self.primer_ts = ts if self.primer_ts is None else min(self.primer_ts, ts)
+            self.darrer_ts = ts if self.darrer_ts is None else max(self.darrer_ts, ts)
+        if tipus == "guess":
+            if esdeveniment.get("endpoint") == "/guess-batch":
+                # Restauració de partides: són intents que ja s'havien comptat
+                self.restaurats += 1
+                return
+            self.intents += 1
+            estat = esdeveniment.get("estat")
+            if estat in ("trobada", "correcta", "fora_diccionari"):
+                self.valids += 1
+                posicio = esdeveniment.get("posicio")
+                if posicio is not None:
+                    self.posicions[bisect_left(LIMITS_POSICIO, posicio)] += 1
+                if estat == "correcta":
+                    self.encerts += 1
+                elif estat == "fora_diccionari":
+                    self.fora_diccionari += 1
+            elif estat == "invalida":
+                self.invalids += 1
+                self._afegir_invalida(esdeveniment.get("paraula") or "")
+            elif estat == "no_trobada":
+                self.no_trobats += 1
+                self._afegir_invalida(esdeveniment.get("paraula") or "")
+        elif tipus == "pista":
+            if esdeveniment.get("paraula") is None:
+                self.pistes_fallides += 1
+            else:
+                self.pistes += 1
+        elif tipus == "rendicio":
+            self.rendicions += 1
+        elif tipus == "whynot":
+            self.whynot += 1
+
+    def fusionar(self, altra: "EstadistiquesPartida") -> None:
+        """Hi suma els agregats d'una altra (p. ex. els d'un altre procés)."""
+        for camp in ("intents", "valids", "encerts", "fora_diccionari", "invalids", "no_trobats",
+                     "restaurats", "pistes", "pistes_fallides", "rendicions", "whynot"):
+            setattr(self, camp, getattr(self, camp) + getattr(altra, camp))
+        self.posicions = [a + b for a, b in zip(self.posicions, altra.posicions)]
+        for paraula, n in altra.paraules_invalides.items():
+            self.paraules_invalides[paraula] += n
+        if len(self.paraules_invalides) > 2 * self.max_invalides:
+            self.paraules_invalides = Counter(dict(self.paraules_invalides.most_common(self.max_invalides)))
+        if altra.primer_ts is not None:
+            self.primer_ts = altra.primer_ts if self.primer_ts is None else min(self.primer_ts, altra.primer_ts)
+        if altra.darrer_ts is not None:
+            self.darrer_ts = altra.darrer_ts if self.darrer_ts is None else max(self.darrer_ts, altra.darrer_ts)
+
+    def a_dict(self, top_invalides: int = 20) -> Dict:
+        etiquetes = [f"<={l}" for l in LIMITS_POSICIO] + [f">{LIMITS_POSICIO[-1]}"]
+        return {
+            "intents": self.intents,
+            "valids": self.valids,
+            "encerts": self.encerts,
+            "fora_diccionari": self.fora_diccionari,
+            "invalids": self.invalids,
+            "no_trobats": self.no_trobats,
+            "restaurats": self.restaurats,
+            "pistes": self.pistes,
+            "pistes_fallides": self.pistes_fallides,
+            "rendicions": self.rendicions,
+            "whynot": self.whynot,
+            "posicions": dict(zip(etiquetes, self.posicions)),
+            "paraules_invalides": self.paraules_invalides.most_common(top_invalides),
+            "primer_ts": self.primer_ts,
+            "darrer_ts": self.darrer_ts,
+        }
+
+    @classmethod
+    def de_dict(cls, dades: Dict, max_invalides: int = 50) -> "EstadistiquesPartida":
+        partida = cls(max_invalides)
+        for camp in ("intents", "valids", "encerts", "fora_diccionari", "invalids", "no_trobats",
+                     "restaurats", "pistes", "pistes_fallides", "rendicions", "whynot", "primer_ts", "darrer_ts"):
+            if camp in dades:
+                setattr(partida, camp, dades[camp])
+        posicions = dades.get("posicions")
+        if isinstance(posicions, dict) and len(posicions) == len(partida.posicions):
+            partida.posicions = [int(v) for v in posicions.values()]
+        partida.paraules_invalides = Counter(dict(dades.get("paraules_invalides", [])))
+        return partida
+
+
+class Estadistiques:
+    """
+    Estadístiques agregades per repte, alimentades pels esdeveniments del registre de joc
+    (vegeu registre.RegistreEsdeveniments.afegir_subscriptor).
+
+    Es desen periòdicament a 'path' (JSON compacte, escrit de manera atòmica) i es recuperen en
+    arrencar, de manera que sobreviuen als reinicis sense haver de tornar a llegir els logs.
+
+    Amb diversos workers tots comparteixen el mateix fitxer: cada procés només hi suma el que ha
+    comptat des de l'últim desat ('_pendents'), amb un bloqueig de fitxer al voltant de la
+    lectura-fusió-escriptura, i es queda amb el resultat fusionat (que inclou els altres workers).
+    """
+
+    def __init__(self, path: str, interval_desat: float = 60.0, max_invalides: int = 50):
+        self.path = Path(path)
+        self.interval_desat = interval_desat
+        self.max_invalides = max_invalides
+        self._lock = threading.Lock()
+        self._partides: Dict[str, EstadistiquesPartida] = {}
+        # Agregats d'aquest procés encara no sumats al fitxer
+        self._pendents: Dict[str, EstadistiquesPartida] = {}
+        self._darrer_desat = time.monotonic()
+        self._carregar()
+
+    def _carregar(self) -> None:
+        self._partides = self._llegir()
+
+    def _llegir(self) -> Dict[str, EstadistiquesPartida]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                dades = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"[WARN] No s'han pogut llegir les estadístiques de {self.path}: {e}")
+            return {}
+        return {objectiu: EstadistiquesPartida.de_dict(partida, self.max_invalides)
+                for objectiu, partida in dades.get("partides", {}).items()}
+
+    def processar_lot(self, lot: Iterable[Dict]) -> None:
+        """Subscriptor del registre d'esdeveniments: actualitza els agregats i desa si toca."""
+        with self._lock:
+            for esdeveniment in lot:
+                objectiu = esdeveniment.get("objectiu")
+                if not objectiu:
+                    continue
+                for partides in (self._partides, self._pendents):
+                    partida = partides.get(objectiu)
+                    if partida is None:
+                        partida = partides[objectiu] = EstadistiquesPartida(self.max_invalides)
+                    partida.processar(esdeveniment)
+        if time.monotonic() - self._darrer_desat >= self.interval_desat:
+            self.desar()
+
+    def desar(self) -> None:
+        """Suma al fitxer el que s'ha comptat des de l'últim desat (si hi ha res a sumar)."""
+        with self._lock:
+            self._darrer_desat = time.monotonic()
+            if not self._pendents:
+                return
+            pendents, self._pendents = self._pendents, {}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            with bloqueig_fitxer(self.path):
+                partides = self._llegir()
+                self._fusionar(partides, pendents)
+                dades = {"versio": 1, "partides": {o: p.a_dict(self.max_invalides) for o, p in partides.items()}}
+                tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(dades, f, ensure_ascii=False, separators=(",", ":"))
+                os.replace(tmp, self.path)
+        except (OSError, TimeoutError):
+            # Es tornarà a provar al proper desat
+            with self._lock:
+                self._fusionar(pendents, self._pendents)
+                self._pendents = pendents
+            raise
+        with self._lock:
+            # El fitxer ja inclou els altres workers; s'hi tornen a aplicar els esdeveniments
+            # arribats durant l'escriptura, que continuen pendents
+            self._fusionar(partides, self._pendents)
+            self._partides = partides
+
+    def _fusionar(self, desti: Dict[str, EstadistiquesPartida], origen: Dict[str, EstadistiquesPartida]) -> None:
+        for objectiu, partida in origen.items():
+            if objectiu not in desti:
+                desti[objectiu] = EstadistiquesPartida(self.max_invalides)
+            desti[objectiu].fusionar(partida)
+
+    def partida(self, objectiu: str, top_invalides: int = 20) -> Dict:
+        """Agregats d'un repte (tot a zero si encara no hi ha hagut cap esdeveniment)."""
+        with self._lock:
+            partida = self._partides.get(objectiu) or EstadistiquesPartida(self.max_invalides)
+            return partida.a_dict(top_invalides)
+
+    def reptes(self) -> List[str]:
+        with self._lock:
+            return list(self._partides)
@@ -22,8 +22,8 @@ def main():
 
     print("Carregant i generant diccionari...")
     dicc = Diccionari.obtenir_diccionari(freq_min=args.freq_min)
-    dicc.save("data/diccionari.json")
-    print(f"Diccionari filtrat guardat a data/diccionari.json amb {len(dicc.canoniques)} lemes.")
+    dicc.save("data/diccionari.bin")
+    print(f"Diccionari filtrat guardat a data/diccionari.bin amb {len(dicc.canoniques)} lemes.")
 
     FT_MODEL = carregar_model_fasttext()
     paraules = dicc.totes_les_lemes(freq_min=args.freq_min)
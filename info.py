@@ -4,15 +4,15 @@ from pathlib import Path
 from diccionari import Diccionari
 
 # Ruta del diccionari serialitzat (compatible amb generate.py)
-DICC_PATH = Path("data/diccionari.json")
+DICC_PATH = Path("data/diccionari.bin")
 
 def carregar_diccionari_complet():
     """Carrega el diccionari si existeix; si no, el genera sense filtre de freqüència.
     Si el fitxer existent no conté 'freq', es regenera per obtenir les freqüències."""
-    if DICC_PATH.exists():
+    if Diccionari.existeix(str(DICC_PATH)):
         try:
             dicc = Diccionari.load(str(DICC_PATH))
-            if dicc.freq:  # ja tenim freq
+            if any(dicc.freq_lema(l) for l in dicc.totes_les_lemes()):  # ja tenim freq
                 return dicc
             print("[info] El fitxer existent no té freqüències; es regenera...")
         except Exception as e:
@@ -25,7 +25,7 @@ def llistar_ordenat(max_len: int = 0):
     """Retorna tots els lemes ordenats per freq desc, aplicant filtre de longitud màxima si cal."""
     dicc = carregar_diccionari_complet()
     result = []
-    for lema in dicc.canoniques.keys():
+    for lema in dicc.totes_les_lemes():
         if max_len and len(lema) > max_len:
             continue
         result.append((lema, dicc.freq_lema(lema)))
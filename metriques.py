@@ -0,0 +1,284 @@
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Límits (segons) per defecte dels histogrames de latència
+LIMITS_LATENCIA = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Etiquetes = Tuple[str, ...]
+# Un col·lector retorna mostres calculades en el moment de la lectura: (nom, tipus, ajuda, [(etiquetes, valor)])
+Mostres = Iterable[Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]]
+
+
+def _format_etiquetes(noms: Sequence[str], valors: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escapar(str(v))}"' for n, v in zip(noms, valors)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_valor(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if isinstance(valor, float) and not valor.is_integer() else str(int(valor))
+
+
+class _Metrica:
+    tipus = ""
+
+    def __init__(self, nom: str, ajuda: str, etiquetes: Sequence[str] = ()):
+        self.nom = nom
+        self.ajuda = ajuda
+        self.etiquetes = tuple(etiquetes)
+        self._lock = threading.Lock()
+
+    def _clau(self, valors: Dict[str, str]) -> Etiquetes:
+        return tuple(str(valors.get(e, "")) for e in self.etiquetes)
+
+    def linies(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Comptador(_Metrica):
+    """Comptador monòton (p. ex. peticions servides)."""
+
+    tipus = "counter"
+
+    def __init__(self, nom: str, ajuda: str, etiquetes: Sequence[str] = ()):
+        super().__init__(nom, ajuda, etiquetes)
+        self._valors: Dict[Etiquetes, float] = {}
+
+    def inc(self, quantitat: float = 1, **etiquetes) -> None:
+        clau = self._clau(etiquetes)
+        with self._lock:
+            self._valors[clau] = self._valors.get(clau, 0) + quantitat
+
+    def linies(self) -> List[str]:
+        with self._lock:
+            valors = list(self._valors.items())
+        return [f"{self.nom}{_format_etiquetes(self.etiquetes, k)} {_format_valor(v)}" for k, v in valors]
+
+
+class Indicador(_Metrica):
+    """Valor instantani (gauge); amb 'funcio' es calcula en el moment de la lectura."""
+
+    tipus = "gauge"
+
+    def __init__(self, nom: str, ajuda: str, funcio: Optional[Callable[[], float]] = None):
+        super().__init__(nom, ajuda)
+        self.funcio = funcio
+        self._valor = 0.0
+
+    def set(self, valor: float) -> None:
+        self._valor = valor
+
+    def linies(self) -> List[str]:
+        valor = self.funcio() if self.funcio is not None else self._valor
+        return [f"{self.nom} {_format_valor(valor)}"]
+
+
+class Histograma(_Metrica):
+    """Histograma acumulat (buckets, suma i recompte) per cada combinació d'etiquetes."""
+
+    tipus = "histogram"
+
+    def __init__(self, nom: str, ajuda: str, etiquetes: Sequence[str] = (), limits: Sequence[float] = LIMITS_LATENCIA):
+        super().__init__(nom, ajuda, etiquetes)
+        self.limits = tuple(sorted(limits))
+        self._series: Dict[Etiquetes, List[float]] = {}
+
+    def observe(self, valor: float, **etiquetes) -> None:
+        clau = self._clau(etiquetes)
+        with self._lock:
+            serie = self._series.get(clau)
+            if serie is None:
+                # [recomptes per bucket..., +Inf, suma]
+                serie = self._series[clau] = [0] * (len(self.limits) + 1) + [0.0]
+            serie[bisect_left(self.limits, valor)] += 1
+            serie[-1] += valor
+
+    def cronometrar(self, **etiquetes) -> "_Cronometre":
+        """Context per observar la durada d'un bloc: with histograma.cronometrar(etiqueta=...): ..."""
+        return _Cronometre(self, etiquetes)
+
+    def linies(self) -> List[str]:
+        with self._lock:
+            series = [(k, list(v)) for k, v in self._series.items()]
+        linies = []
+        for clau, serie in series:
+            acumulat = 0
+            for limit, n in zip(self.limits + (float("inf"),), serie[:-1]):
+                acumulat += n
+                le = 'le="' + _format_valor(limit) + '"'
+                linies.append(f"{self.nom}_bucket{_format_etiquetes(self.etiquetes, clau, le)} {acumulat}")
+            linies.append(f"{self.nom}_sum{_format_etiquetes(self.etiquetes, clau)} {serie[-1]!r}")
+            linies.append(f"{self.nom}_count{_format_etiquetes(self.etiquetes, clau)} {acumulat}")
+        return linies
+
+
+class _Cronometre:
+    def __init__(self, histograma: Histograma, etiquetes: Dict[str, str]):
+        self.histograma = histograma
+        self.etiquetes = etiquetes
+
+    def __enter__(self):
+        self.inici = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histograma.observe(time.perf_counter() - self.inici, **self.etiquetes)
+        return False
+
+
+class RegistreMetriques:
+    """
+    Conjunt de mètriques d'un procés exposades en format de text de Prometheus (versió 0.0.4).
+
+    Cada procés (worker d'uvicorn) té les seves pròpies mètriques; Prometheus les agrega si es
+    consulten per separat o s'hi afegeix l'etiqueta del procés.
+    """
+
+    def __init__(self):
+        self._metriques: List[_Metrica] = []
+        self._collectors: List[Callable[[], Mostres]] = []
+
+    def _afegir(self, metrica):
+        self._metriques.append(metrica)
+        return metrica
+
+    def comptador(self, nom: str, ajuda: str, etiquetes: Sequence[str] = ()) -> Comptador:
+        return self._afegir(Comptador(nom, ajuda, etiquetes))
+
+    def indicador(self, nom: str, ajuda: str, funcio: Optional[Callable[[], float]] = None) -> Indicador:
+        return self._afegir(Indicador(nom, ajuda, funcio))
+
+    def histograma(self, nom: str, ajuda: str, etiquetes: Sequence[str] = (),
+                   limits: Sequence[float] = LIMITS_LATENCIA) -> Histograma:
+        return self._afegir(Histograma(nom, ajuda, etiquetes, limits))
+
+    def afegir_collector(self, collector: Callable[[], Mostres]) -> None:
+        """Afegeix mètriques calculades a cada lectura (p. ex. comptadors que ja manté una cache)."""
+        self._collectors.append(collector)
+
+    def exposar(self) -> str:
+        linies = []
+        for metrica in self._metriques:
+            linies.append(f"# HELP {metrica.nom} {metrica.ajuda}")
+            linies.append(f"# TYPE {metrica.nom} {metrica.tipus}")
+            linies.extend(metrica.linies())
+        for collector in self._collectors:
+            for nom, tipus, ajuda, mostres in collector():
+                linies.append(f"# HELP {nom} {ajuda}")
+                linies.append(f"# TYPE {nom} {tipus}")
+                for etiquetes, valor in mostres:
+                    linies.append(f"{nom}{_format_etiquetes(list(etiquetes), list(etiquetes.values()))} {_format_valor(valor)}")
+        return "\n".join(linies) + "\n"
+
+
+def memoria_proces() -> Dict[str, float]:
+    """Memòria resident i virtual del procés en bytes (Linux; a altres sistemes, el màxim resident)."""
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            valors = dict(linia.split(":", 1) for linia in f if ":" in linia)
+        return {"resident": int(valors["VmRSS"].split()[0]) * 1024, "virtual": int(valors["VmSize"].split()[0]) * 1024}
+    except (OSError, KeyError, ValueError):
+        try:
+            import resource
+            maxim = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # ru_maxrss és en KB a Linux i en bytes a macOS
+            return {"resident": maxim if sys.platform == "darwin" else maxim * 1024, "virtual": 0}
+        except (ImportError, OSError):
+            return {"resident": 0, "virtual": 0}
+
+
+def collector_proces() -> Mostres:
+    memoria = memoria_proces()
+    return [
+        ("process_resident_memory_bytes", "gauge", "Memòria resident del procés", [({}, memoria["resident"])]),
+        ("process_virtual_memory_bytes", "gauge", "Memòria virtual del procés", [({}, memoria["virtual"])]),
+        ("process_pid", "gauge", "PID del procés (per distingir workers)", [({}, os.getpid())]),
+    ]
+
+
+def collector_caches(caches: Dict[str, object]) -> Callable[[], Mostres]:
+    """Col·lector amb els comptadors de diverses caches (CacheLRU o qualsevol objecte amb estadistiques())."""
+    def collector() -> Mostres:
+        estadistiques = {nom: cache.estadistiques() for nom, cache in caches.items() if cache is not None}
+        mostres = []
+        for clau, nom, tipus, ajuda in (
+            ("encerts", "rebuscada_cache_hits_total", "counter", "Encerts de cache"),
+            ("fallades", "rebuscada_cache_misses_total", "counter", "Fallades de cache"),
+            ("expulsions", "rebuscada_cache_evictions_total", "counter", "Entrades expulsades per mida"),
+            ("entrades", "rebuscada_cache_entries", "gauge", "Entrades a la cache"),
+            ("bytes", "rebuscada_cache_bytes", "gauge", "Bytes ocupats (caches fitades per memòria)"),
+        ):
+            valors = [({"cache": c}, e[clau]) for c, e in estadistiques.items() if clau in e]
+            if valors:
+                mostres.append((nom, tipus, ajuda, valors))
+        return mostres
+    return collector
+
+
+class MiddlewareMetriques:
+    """
+    Middleware ASGI que compta les peticions i la seva latència per mètode, ruta i codi d'estat.
+
+    La ruta és la plantilla de FastAPI (p. ex. '/api/rankings/{filename}') i no el path concret,
+    de manera que el nombre de sèries queda fitat; les peticions que no coincideixen amb cap
+    ruta es compten a '<altres>'.
+    """
+
+    def __init__(self, app, registre: RegistreMetriques, rutes=None):
+        self.app = app
+        self.rutes = rutes
+        self.peticions = registre.comptador(
+            "http_requests_total", "Peticions HTTP servides", ("method", "endpoint", "status"))
+        self.latencia = registre.histograma(
+            "http_request_duration_seconds", "Latència de les peticions HTTP", ("method", "endpoint"))
+
+    def _ruta(self, scope) -> str:
+        from starlette.routing import Match
+
+        for ruta in getattr(self.rutes, "routes", ()):
+            coincidencia, _ = ruta.matches(scope)
+            if coincidencia == Match.FULL:
+                return getattr(ruta, "path", "<altres>")
+        return "<altres>"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        inici = time.perf_counter()
+        estat = {"codi": 500}
+
+        async def send_amb_estat(missatge):
+            if missatge["type"] == "http.response.start":
+                estat["codi"] = missatge["status"]
+            await send(missatge)
+
+        try:
+            await self.app(scope, receive, send_amb_estat)
+        finally:
+            ruta = self._ruta(scope)
+            self.latencia.observe(time.perf_counter() - inici, method=scope["method"], endpoint=ruta)
+            self.peticions.inc(method=scope["method"], endpoint=ruta, status=estat["codi"])
+
+
+def instrumentar(app, registre: RegistreMetriques) -> None:
+    """Afegeix a una aplicació FastAPI el middleware de mètriques i l'endpoint GET /metrics."""
+    from starlette.responses import Response
+
+    app.add_middleware(MiddlewareMetriques, registre=registre, rutes=app.router)
+    registre.afegir_collector(collector_proces)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return Response(registre.exposar(), media_type="text/plain; version=0.0.4; charset=utf-8")
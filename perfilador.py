@@ -0,0 +1,198 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+
+class Perfilador:
+    """
+    Perfilador per mostreig de les piles de crides del procés en marxa, per veure on va el temps
+    de /pista o /whynot a producció sense tornar a desplegar.
+
+    Un fil dedicat llegeix cada 'interval' segons les piles de tots els fils (sys._current_frames)
+    i les agrega en format "collapsed" (una línia 'fil;mòdul:funció;... N' per pila), el que
+    accepten flamegraph.pl, speedscope o inferno. Hi ha dues maneres d'activar-lo:
+
+      - finestra(segons): mostreja tot el procés durant un temps i escriu
+        '<directori>/finestra-<AAAAMMDD-HHMMSS>-<pid>.folded'.
+      - cada_n: una de cada N peticions als endpoints seleccionats es mostreja mentre és en curs
+        (vegeu MiddlewarePerfilador). Les piles porten l'endpoint com a primer marc i s'acumulen a
+        '<directori>/peticions-<pid>.folded', que es reescriu com a molt cada 'interval_desat' segons.
+
+    Mentre està desactivat el fil de mostreig espera en un Event i el middleware només comprova
+    cada_n, de manera que es pot deixar sempre instal·lat.
+    """
+
+    def __init__(self, directori: str = "data/perfils", interval: float = 0.005, cada_n: int = 0,
+                 endpoints: Iterable[str] = ("/pista", "/whynot"), interval_desat: float = 10.0,
+                 profunditat_maxima: int = 128):
+        self.directori = Path(directori)
+        self.interval = interval
+        self.cada_n = cada_n
+        self.endpoints = frozenset(endpoints)
+        self.interval_desat = interval_desat
+        self.profunditat_maxima = profunditat_maxima
+        self.mostres = 0
+        self._lock = threading.Lock()
+        self._actiu = threading.Event()
+        self._fil: Optional[threading.Thread] = None
+        # Peticions mostrejades en curs: id -> endpoint (les piles s'atribueixen a la més antiga)
+        self._peticions: Dict[int, str] = {}
+        self._piles_peticions: Counter = Counter()
+        self._canvis_peticions = False
+        self._darrer_desat = time.monotonic()
+        self._fi_finestra: Optional[float] = None
+        self._piles_finestra: Counter = Counter()
+        self._path_finestra: Optional[Path] = None
+
+    # ------------------------------ Control ------------------------------
+    def finestra(self, segons: float) -> Path:
+        """Mostreja tot el procés durant 'segons'; retorna el fitxer on s'escriurà el resultat."""
+        with self._lock:
+            if self._fi_finestra is not None:
+                raise Exception(f"Ja hi ha una finestra de perfilat en curs ({self._path_finestra})")
+            self._path_finestra = self.directori / f"finestra-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.folded"
+            self._piles_finestra = Counter()
+            self._fi_finestra = time.monotonic() + segons
+        self._activar()
+        return self._path_finestra
+
+    def inici_peticio(self, endpoint: str, id_peticio: int) -> None:
+        with self._lock:
+            self._peticions[id_peticio] = endpoint
+        self._activar()
+
+    def fi_peticio(self, id_peticio: int) -> None:
+        with self._lock:
+            self._peticions.pop(id_peticio, None)
+
+    def estat(self) -> Dict:
+        with self._lock:
+            return {
+                "cada_n": self.cada_n,
+                "endpoints": sorted(self.endpoints),
+                "interval_ms": self.interval * 1000,
+                "mostres": self.mostres,
+                "peticions_en_curs": len(self._peticions),
+                "finestra": str(self._path_finestra) if self._fi_finestra is not None else None,
+                "segons_restants": max(0.0, self._fi_finestra - time.monotonic()) if self._fi_finestra else None,
+                "fitxer_peticions": str(self._path_peticions()),
+            }
+
+    def tancar(self) -> None:
+        """Escriu el que hi hagi pendent (finestra a mig fer inclosa)."""
+        with self._lock:
+            self._fi_finestra = time.monotonic() if self._fi_finestra is not None else None
+        self._tancar_finestra_si_cal()
+        self._desar_peticions()
+
+    # ------------------------------ Fil de mostreig ------------------------------
+    def _activar(self) -> None:
+        self._actiu.set()
+        if self._fil is None or not self._fil.is_alive():
+            with self._lock:
+                if self._fil is None or not self._fil.is_alive():
+                    self._fil = threading.Thread(target=self._bucle, name="perfilador", daemon=True)
+                    self._fil.start()
+
+    def _bucle(self) -> None:
+        propi = threading.get_ident()
+        while True:
+            self._actiu.wait()
+            self._mostrejar(propi)
+            self._tancar_finestra_si_cal()
+            if time.monotonic() - self._darrer_desat >= self.interval_desat:
+                self._desar_peticions()
+            with self._lock:
+                if self._fi_finestra is None and not self._peticions:
+                    self._actiu.clear()
+            time.sleep(self.interval)
+
+    def _mostrejar(self, propi: int) -> None:
+        noms = {fil.ident: fil.name for fil in threading.enumerate()}
+        piles: List[str] = []
+        for ident, marc in sys._current_frames().items():
+            if ident == propi:
+                continue
+            piles.append(self._pila(noms.get(ident, str(ident)), marc))
+        with self._lock:
+            self.mostres += 1
+            if self._fi_finestra is not None:
+                self._piles_finestra.update(piles)
+            if self._peticions:
+                endpoint = next(iter(self._peticions.values()))
+                self._piles_peticions.update(f"{endpoint};{pila}" for pila in piles)
+                self._canvis_peticions = True
+
+    def _pila(self, nom_fil: str, marc) -> str:
+        marcs: List[str] = []
+        while marc is not None and len(marcs) < self.profunditat_maxima:
+            codi = marc.f_code
+            # Sense número de línia: els marcs d'una mateixa funció s'agrupen al flamegraph
+            marcs.append(f"{os.path.basename(codi.co_filename)}:{codi.co_name}")
+            marc = marc.f_back
+        marcs.append(nom_fil)
+        # ';' separa marcs i l'espai separa el comptador: no poden aparèixer dins d'un marc
+        return ";".join(m.replace(";", ",").replace(" ", "_") for m in reversed(marcs))
+
+    # ------------------------------ Escriptura ------------------------------
+    def _tancar_finestra_si_cal(self) -> None:
+        with self._lock:
+            if self._fi_finestra is None or time.monotonic() < self._fi_finestra:
+                return
+            piles, path = self._piles_finestra, self._path_finestra
+            self._fi_finestra, self._piles_finestra = None, Counter()
+        self._escriure(path, piles)
+
+    def _path_peticions(self) -> Path:
+        return self.directori / f"peticions-{os.getpid()}.folded"
+
+    def _desar_peticions(self) -> None:
+        with self._lock:
+            self._darrer_desat = time.monotonic()
+            if not self._canvis_peticions:
+                return
+            piles = Counter(self._piles_peticions)
+            self._canvis_peticions = False
+        self._escriure(self._path_peticions(), piles)
+
+    def _escriure(self, path: Path, piles: Counter) -> None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.writelines(f"{pila} {n}\n" for pila, n in sorted(piles.items()))
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[WARN] No s'ha pogut escriure el perfil a {path}: {e}")
+
+
+class MiddlewarePerfilador:
+    """
+    Middleware ASGI que mostreja una de cada 'perfilador.cada_n' peticions als endpoints del
+    perfilador mentre és en curs. Amb cada_n = 0 passa la petició directament.
+    """
+
+    def __init__(self, app, perfilador: Perfilador):
+        self.app = app
+        self.perfilador = perfilador
+        self._comptador = 0
+
+    async def __call__(self, scope, receive, send):
+        perfilador = self.perfilador
+        if not perfilador.cada_n or scope["type"] != "http" or scope["path"] not in perfilador.endpoints:
+            await self.app(scope, receive, send)
+            return
+        self._comptador += 1
+        if self._comptador % perfilador.cada_n:
+            await self.app(scope, receive, send)
+            return
+        id_peticio = self._comptador
+        perfilador.inici_peticio(scope["path"], id_peticio)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            perfilador.fi_peticio(id_peticio)
@@ -0,0 +1,408 @@
+import heapq
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from pathlib import Path
+from typing import Any, Callable, Collection, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from cache import Cache2Q
+from taules import Taules, TaulaCadenes, bloqueig_fitxer
+
+
+class Vocabulari:
+    """
+    Vocabulari compartit per tots els rànquings compilats (paraula <-> id enter).
+
+    Es desa com a taules binàries (vegeu taules.py) obertes amb mmap: les paraules en ordre d'id
+    i una taula de dispersió per cercar-les, de manera que tots els processos del servidor s'adjunten a la
+    mateixa còpia. Només s'hi afegeixen paraules al final, de manera que els ids ja assignats no
+    canvien mai i els rànquings compilats amb una versió anterior del vocabulari continuen sent vàlids.
+    """
+
+    # Nom del fitxer dins la carpeta dels rànquings compilats (servidor i scripts han de coincidir)
+    FITXER = "vocabulari.bin"
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._taula = TaulaCadenes(array("I", [0]), b"", array("i"))
+        self._migrar_text()
+        self._recarregar()
+
+    def _migrar_text(self) -> None:
+        """Converteix el vocabulari antic en text (una paraula per línia) conservant els ids."""
+        antic = self.path.with_suffix(".txt")
+        if self.path.exists() or not antic.exists():
+            return
+        paraules = antic.read_bytes().decode("utf-8").split("\n")
+        if paraules and paraules[-1] == "":
+            paraules.pop()
+        with bloqueig_fitxer(self.path):
+            if not self.path.exists():
+                Taules.escriure(self.path, TaulaCadenes.seccions("paraules", paraules, amb_dispersio=True))
+
+    def recarregar(self) -> None:
+        """Torna a obrir el fitxer (p. ex. si un altre procés hi ha afegit paraules)."""
+        with self._lock:
+            self._recarregar()
+
+    def _recarregar(self) -> None:
+        if self.path.exists():
+            self._taula = TaulaCadenes.de_taules(Taules(self.path), "paraules")
+
+    def __len__(self) -> int:
+        return len(self._taula)
+
+    def id(self, paraula: str) -> Optional[int]:
+        return self._taula.index(paraula)
+
+    def paraula(self, id_paraula: int) -> str:
+        return self._taula[id_paraula]
+
+    def ids(self) -> Dict[str, int]:
+        """Diccionari {paraula: id} temporal, per operacions en bloc com la compilació."""
+        ids: Dict[str, int] = {}
+        for i, p in enumerate(self._taula):
+            # Si una paraula apareix dues vegades (vocabularis antics), val la primera aparició
+            ids.setdefault(p, i)
+        return ids
+
+    def assegurar(self, paraules: Iterable[str]) -> Dict[str, int]:
+        """Afegeix al final del vocabulari les paraules que encara no hi són i retorna {paraula: id}."""
+        with self._lock:
+            paraules = list(dict.fromkeys(paraules))
+            ids = self.ids()
+            if all(p in ids for p in paraules):
+                return ids
+            # Bloqueig entre processos: un altre worker pot estar afegint paraules alhora
+            with bloqueig_fitxer(self.path):
+                self._recarregar()
+                ids = self.ids()
+                noves = [p for p in paraules if p not in ids]
+                if noves:
+                    paraules_totals = list(self._taula) + noves
+                    Taules.escriure(self.path, TaulaCadenes.seccions("paraules", paraules_totals, amb_dispersio=True))
+                    self._recarregar()
+                    ids = self.ids()
+            return ids
+
+
+class RankingCompilat:
+    """
+    Rànquing d'una paraula objectiu en format binari, obert amb mmap.
+
+    Format del fitxer (little-endian):
+      - capçalera: magic 'RBQR', versió, id de la paraula objectiu, total de paraules
+        i nombre de posicions desades (mida del vocabulari en el moment de compilar)
+      - posicions: array int32 indexat per id del vocabulari; -1 si la paraula no hi és
+      - ordre: array int32 amb els ids de les paraules ordenats per posició (vista posició -> paraula)
+
+    S'utilitza com un diccionari de només lectura {paraula: posició}, i l'ordre precalculat
+    permet obtenir qualsevol tram del rànquing en O(k) sense tornar a ordenar.
+    """
+
+    MAGIC = b"RBQR"
+    VERSIO = 2
+    EXTENSIO = ".rank"
+    # magic, versió, reservat, id objectiu, total paraules, nombre de posicions
+    CAPCALERA = struct.Struct("<4sHHiII")
+
+    def __init__(self, vocabulari: Vocabulari, posicions, ordre, id_objectiu: int, total: int,
+                 mm=None, versio: str = ""):
+        self.vocabulari = vocabulari
+        self.posicions = posicions
+        self.ordre = ordre
+        self.id_objectiu = id_objectiu
+        self.total = total
+        self.index_pistes: Optional["IndexPistes"] = None
+        # Identifica el contingut del fitxer compilat (mtime + mida)
+        self.versio = versio
+        self._mm = mm
+
+    # ------------------------------ Compilació i càrrega ------------------------------
+    @classmethod
+    def compilar(cls, ranking: Dict[str, int], vocabulari: Vocabulari, desti) -> None:
+        """Escriu el fitxer compilat a partir d'un rànquing {paraula: posició}."""
+        if not ranking:
+            raise ValueError("No es pot compilar un rànquing buit.")
+        ids = vocabulari.assegurar(ranking.keys())
+        n = len(vocabulari)
+        posicions = array("i", [-1]) * n
+        id_objectiu = -1
+        millor = None
+        ids_ranking = []
+        for paraula, pos in ranking.items():
+            pos = int(pos)
+            if pos < 0:
+                raise ValueError(f"Posició negativa per la paraula '{paraula}'.")
+            id_paraula = ids[paraula]
+            posicions[id_paraula] = pos
+            ids_ranking.append(id_paraula)
+            # Igual que min(): en cas d'empat, la primera paraula en ordre d'aparició
+            if millor is None or pos < millor:
+                millor = pos
+                id_objectiu = id_paraula
+        # Ordenació estable: a igual posició es manté l'ordre d'aparició
+        ids_ranking.sort(key=posicions.__getitem__)
+        ordre = array("i", ids_ranking)
+        if sys.byteorder == "big":
+            posicions.byteswap()
+            ordre.byteswap()
+
+        desti = Path(desti)
+        desti.parent.mkdir(parents=True, exist_ok=True)
+        tmp = desti.with_name(f"{desti.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(cls.CAPCALERA.pack(cls.MAGIC, cls.VERSIO, 0, id_objectiu, len(ranking), n))
+            f.write(posicions.tobytes())
+            f.write(ordre.tobytes())
+        os.replace(tmp, desti)
+
+    @classmethod
+    def obrir(cls, path, vocabulari: Vocabulari) -> "RankingCompilat":
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(mm) < cls.CAPCALERA.size:
+            raise ValueError(f"Fitxer de rànquing compilat massa curt: {path}")
+        magic, versio, _, id_objectiu, total, n = cls.CAPCALERA.unpack_from(mm, 0)
+        if magic != cls.MAGIC or versio != cls.VERSIO:
+            raise ValueError(f"Format de rànquing compilat desconegut: {path}")
+        inici = cls.CAPCALERA.size
+        if len(mm) < inici + 4 * (n + total):
+            raise ValueError(f"Fitxer de rànquing compilat truncat: {path}")
+        if n > len(vocabulari):
+            vocabulari.recarregar()
+        posicions = cls._array_int32(mm, inici, n)
+        ordre = cls._array_int32(mm, inici + 4 * n, total)
+        return cls(vocabulari, posicions, ordre, id_objectiu, total, mm=mm,
+                   versio=f"{st.st_mtime_ns:x}-{st.st_size:x}")
+
+    @staticmethod
+    def _array_int32(mm, inici: int, n: int):
+        if sys.byteorder == "little":
+            return memoryview(mm)[inici:inici + 4 * n].cast("i")
+        arr = array("i", mm[inici:inici + 4 * n])
+        arr.byteswap()
+        return arr
+
+    # ------------------------------ Consultes ------------------------------
+    @property
+    def objectiu(self) -> str:
+        return self.vocabulari.paraula(self.id_objectiu)
+
+    @property
+    def nbytes(self) -> int:
+        mida = (len(self.posicions) + len(self.ordre)) * 4 + self.CAPCALERA.size
+        if self.index_pistes is not None:
+            mida += self.index_pistes.nbytes
+        return mida
+
+    def construir_index_pistes(self, freq_lema: Callable[[str], int], path=None,
+                               empremta_diccionari: str = "") -> "IndexPistes":
+        """Construeix l'índex de pistes; amb 'path' el desa/reutilitza com a fitxer compartit."""
+        if path is None:
+            self.index_pistes = IndexPistes.construir(self, freq_lema)
+        else:
+            self.index_pistes = IndexPistes.obrir_o_construir(self, freq_lema, path, empremta_diccionari)
+        return self.index_pistes
+
+    def get(self, paraula: str, default: Optional[int] = None) -> Optional[int]:
+        id_paraula = self.vocabulari.id(paraula)
+        if id_paraula is None or id_paraula >= len(self.posicions):
+            return default
+        pos = self.posicions[id_paraula]
+        return default if pos < 0 else pos
+
+    def __getitem__(self, paraula: str) -> int:
+        pos = self.get(paraula)
+        if pos is None:
+            raise KeyError(paraula)
+        return pos
+
+    def __contains__(self, paraula: str) -> bool:
+        return self.get(paraula) is not None
+
+    def __len__(self) -> int:
+        return self.total
+
+    def paraula(self, index: int) -> str:
+        """Paraula que ocupa l'índex 'index' dins l'ordre del rànquing (0 = objectiu)."""
+        return self.vocabulari.paraula(self.ordre[index])
+
+    def paraules_ordenades(self, inici: int = 0, fi: Optional[int] = None) -> List[str]:
+        """Paraules entre els índexs [inici, fi) en ordre de rànquing."""
+        paraula = self.vocabulari.paraula
+        return [paraula(i) for i in self.ordre[inici:fi]]
+
+    def items_ordenats(self, inici: int = 0, fi: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Parelles (paraula, posició) entre els índexs [inici, fi) en ordre de rànquing."""
+        paraula = self.vocabulari.paraula
+        posicions = self.posicions
+        return [(paraula(i), posicions[i]) for i in self.ordre[inici:fi]]
+
+    def iter_ordenades(self) -> Iterator[str]:
+        paraula = self.vocabulari.paraula
+        return (paraula(i) for i in self.ordre)
+
+    def items(self) -> Iterator[Tuple[str, int]]:
+        paraula = self.vocabulari.paraula
+        posicions = self.posicions
+        return ((paraula(i), posicions[i]) for i in self.ordre)
+
+    def keys(self) -> Iterator[str]:
+        return self.iter_ordenades()
+
+    __iter__ = keys
+
+
+class IndexPistes:
+    """
+    Índex per triar pistes: arbre de segments (argmax) sobre l'ordre del rànquing.
+
+    Cada índex del rànquing té una puntuació que reprodueix el criteri de /pista: més freqüència
+    de lema, després millor posició i després ordre alfabètic. L'arbre respon "quina és la paraula
+    amb més puntuació a [a, b]" en O(log n); per excloure les paraules ja provades es parteix el
+    rang al voltant de cada màxim exclòs, de manera que el cost és O((k + 1) log n) on k és el
+    nombre de paraules provades que queden dins el rang, independentment de quants intents hi hagi.
+    """
+
+    EXTENSIO = ".pistes"
+
+    def __init__(self, ranking: RankingCompilat, puntuacio, arbre):
+        self.ranking = ranking
+        self.puntuacio = puntuacio
+        self._arbre = arbre
+        self._mida = len(arbre) // 2
+
+    @classmethod
+    def construir(cls, ranking: RankingCompilat, freq_lema: Callable[[str], int]) -> "IndexPistes":
+        n = ranking.total
+        paraules = ranking.paraules_ordenades()
+        posicions = ranking.posicions
+        ordre = ranking.ordre
+        claus = sorted(range(n), key=lambda i: (freq_lema(paraules[i]), -posicions[ordre[i]], paraules[i]))
+        puntuacio = array("i", [0]) * n
+        for p, i in enumerate(claus):
+            puntuacio[i] = p
+
+        mida = 1
+        while mida < n:
+            mida *= 2
+        arbre = array("i", [-1]) * (2 * mida)
+        arbre[mida:mida + n] = array("i", range(n))
+        index = cls(ranking, puntuacio, arbre)
+        for node in range(mida - 1, 0, -1):
+            arbre[node] = index._millor(arbre[2 * node], arbre[2 * node + 1])
+        return index
+
+    @classmethod
+    def obrir_o_construir(cls, ranking: RankingCompilat, freq_lema: Callable[[str], int],
+                          path, empremta_diccionari: str) -> "IndexPistes":
+        """
+        Obre l'índex desat a 'path' (mmap compartit entre processos) si correspon a aquesta versió
+        del rànquing i del diccionari; si no, el construeix i el desa per als altres processos.
+        """
+        empremta = f"{ranking.versio}:{empremta_diccionari}"
+        try:
+            taules = Taules(path)
+            if taules.meta.get("empremta") == empremta:
+                return cls(ranking, taules.array("puntuacio"), taules.array("arbre"))
+        except (FileNotFoundError, ValueError, KeyError):
+            pass
+        index = cls.construir(ranking, freq_lema)
+        Taules.escriure(path, {"puntuacio": index.puntuacio, "arbre": index._arbre}, meta={"empremta": empremta})
+        taules = Taules(path)
+        return cls(ranking, taules.array("puntuacio"), taules.array("arbre"))
+
+    @property
+    def nbytes(self) -> int:
+        return (len(self.puntuacio) + len(self._arbre)) * 4
+
+    def _millor(self, a: int, b: int) -> int:
+        if a < 0:
+            return b
+        if b < 0:
+            return a
+        return a if self.puntuacio[a] > self.puntuacio[b] else b
+
+    def _maxim(self, inici: int, fi: int) -> int:
+        """Índex amb més puntuació dins [inici, fi] (inclusiu)."""
+        arbre = self._arbre
+        millor = -1
+        esq = inici + self._mida
+        dre = fi + self._mida + 1
+        while esq < dre:
+            if esq & 1:
+                millor = self._millor(millor, arbre[esq])
+                esq += 1
+            if dre & 1:
+                dre -= 1
+                millor = self._millor(millor, arbre[dre])
+            esq //= 2
+            dre //= 2
+        return millor
+
+    def millor_candidat(self, inici: int, fi: int, excloses: Collection[str] = ()) -> Optional[str]:
+        """Paraula amb més puntuació dins els índexs [inici, fi] que no sigui a 'excloses' ni l'objectiu."""
+        inici = max(0, inici)
+        fi = min(fi, self.ranking.total - 1)
+        if fi < inici:
+            return None
+        vocabulari = self.ranking.vocabulari
+        ordre = self.ranking.ordre
+        id_objectiu = self.ranking.id_objectiu
+        if not isinstance(excloses, (set, frozenset)):
+            excloses = set(excloses)
+
+        puntuacio = self.puntuacio
+        m = self._maxim(inici, fi)
+        pendents = [(-puntuacio[m], m, inici, fi)]
+        while pendents:
+            _, m, a, b = heapq.heappop(pendents)
+            if ordre[m] != id_objectiu:
+                paraula = vocabulari.paraula(ordre[m])
+                if paraula not in excloses:
+                    return paraula
+            for a2, b2 in ((a, m - 1), (m + 1, b)):
+                if a2 <= b2:
+                    m2 = self._maxim(a2, b2)
+                    heapq.heappush(pendents, (-puntuacio[m2], m2, a2, b2))
+        return None
+
+
+def carregar_ranking_compilat(fitxer_json, dir_compilat, vocabulari: Vocabulari) -> RankingCompilat:
+    """Obre el rànquing compilat d'un fitxer JSON; el (re)compila si no existeix o és antic."""
+    fitxer_json = Path(fitxer_json)
+    fitxer_bin = Path(dir_compilat) / (fitxer_json.stem + RankingCompilat.EXTENSIO)
+    if fitxer_bin.exists() and fitxer_bin.stat().st_mtime_ns >= fitxer_json.stat().st_mtime_ns:
+        try:
+            return RankingCompilat.obrir(fitxer_bin, vocabulari)
+        except ValueError:
+            pass  # format antic o malmès: es recompila
+    with open(fitxer_json, "r", encoding="utf-8") as f:
+        ranking = json.load(f)
+    RankingCompilat.compilar(ranking, vocabulari, fitxer_bin)
+    return RankingCompilat.obrir(fitxer_bin, vocabulari)
+
+
+class CacheRankings(Cache2Q):
+    """
+    Cache de rànquings carregats, segura entre fils, fitada pels bytes dels rànquings i dels seus
+    índexs de pistes (RankingCompilat.nbytes).
+
+    Permet consultar si un rànquing ja és a memòria sense carregar-lo, de manera que el servidor
+    pot resoldre els encerts directament al bucle d'esdeveniments i enviar només les fallades
+    (lectura de disc + construcció d'índexs) al pool de fils. La política 2Q fa que consultar
+    molts reptes antics no expulsi els rànquings d'ús freqüent, i els reptes d'avui i de demà es
+    fixen perquè no s'expulsin mai.
+    """
+
+    def mida_entrada(self, valor: Any) -> int:
+        # El servidor hi desa (rànquing, total, objectiu)
+        ranking = valor[0] if isinstance(valor, tuple) else valor
+        return getattr(ranking, "nbytes", 0)
@@ -0,0 +1,146 @@
+import glob
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+Esdeveniment = Dict[str, object]
+
+_FINAL = object()
+
+
+class RegistreEsdeveniments:
+    """
+    Registre d'esdeveniments de joc en format JSON lines, escrit en segon pla.
+
+    registrar() només afegeix l'esdeveniment a una cua en memòria i torna de seguida; un fil
+    dedicat els escriu per lots (com a molt 'mida_lot' línies o cada 'interval' segons) amb una
+    sola escriptura per lot. El fitxer actiu rota quan supera 'mida_maxima' bytes o quan fa més de
+    'rotacio_segons' que es va obrir: es renomena a '<path>.<AAAAMMDD-HHMMSS>' i es conserven les
+    'copies' rotacions més recents. Si la cua s'omple (disc bloquejat), els esdeveniments nous es
+    descarten i es compten a 'descartats' en lloc de bloquejar les peticions.
+
+    Els subscriptors (afegir_subscriptor) reben cada lot al mateix fil d'escriptura, p. ex. per
+    mantenir estadístiques en temps real sense tornar a llegir el fitxer.
+    """
+
+    def __init__(self, path: str, mida_maxima: int = 50 * 1024 * 1024, rotacio_segons: float = 24 * 3600,
+                 copies: int = 14, mida_lot: int = 256, interval: float = 1.0, mida_cua: int = 100_000):
+        self.path = path
+        self.mida_maxima = mida_maxima
+        self.rotacio_segons = rotacio_segons
+        self.copies = copies
+        self.mida_lot = mida_lot
+        self.interval = interval
+        self.descartats = 0
+        self._cua: "queue.Queue" = queue.Queue(maxsize=mida_cua)
+        self._subscriptors: List[Callable[[List[Esdeveniment]], None]] = []
+        self._fitxer = None
+        self._obert_des_de = 0.0
+        self._fil = threading.Thread(target=self._bucle, name="registre-esdeveniments", daemon=True)
+        self._fil.start()
+
+    def registrar(self, tipus: str, **camps) -> None:
+        """Afegeix un esdeveniment a la cua (no bloqueja mai)."""
+        esdeveniment = {"ts": round(time.time(), 3), "tipus": tipus, **camps}
+        try:
+            self._cua.put_nowait(esdeveniment)
+        except queue.Full:
+            self.descartats += 1
+
+    def afegir_subscriptor(self, subscriptor: Callable[[List[Esdeveniment]], None]) -> None:
+        self._subscriptors.append(subscriptor)
+
+    def tancar(self, temps_maxim: Optional[float] = 10.0) -> None:
+        """Escriu els esdeveniments pendents i atura el fil d'escriptura."""
+        if not self._fil.is_alive():
+            return
+        self._cua.put(_FINAL)
+        self._fil.join(temps_maxim)
+
+    # ------------------------------ Fil d'escriptura ------------------------------
+    def _bucle(self) -> None:
+        obert = True
+        while obert:
+            lot: List[Esdeveniment] = []
+            limit = time.monotonic() + self.interval
+            while len(lot) < self.mida_lot:
+                try:
+                    element = self._cua.get(timeout=max(0.0, limit - time.monotonic()))
+                except queue.Empty:
+                    break
+                if element is _FINAL:
+                    obert = False
+                    break
+                lot.append(element)
+            if lot:
+                try:
+                    self._escriure(lot)
+                except Exception as e:
+                    logger.error(f"REGISTRE: error escrivint a {self.path}: {e}")
+                for subscriptor in self._subscriptors:
+                    try:
+                        subscriptor(lot)
+                    except Exception as e:
+                        logger.error(f"REGISTRE: error en un subscriptor: {e}")
+        if self._fitxer is not None:
+            self._fitxer.close()
+            self._fitxer = None
+
+    def _escriure(self, lot: List[Esdeveniment]) -> None:
+        dades = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in lot).encode("utf-8")
+        if self._fitxer is not None and (
+            self._fitxer.tell() + len(dades) > self.mida_maxima
+            or time.time() - self._obert_des_de > self.rotacio_segons
+        ):
+            self._rotar()
+        if self._fitxer is None:
+            directori = os.path.dirname(self.path)
+            if directori:
+                os.makedirs(directori, exist_ok=True)
+            self._fitxer = open(self.path, "ab")
+            # Un fitxer que ja existia compta des de la seva última modificació
+            self._obert_des_de = os.path.getmtime(self.path) if self._fitxer.tell() else time.time()
+        self._fitxer.write(dades)
+        self._fitxer.flush()
+
+    def _rotar(self) -> None:
+        self._fitxer.close()
+        self._fitxer = None
+        base = f"{self.path}.{time.strftime('%Y%m%d-%H%M%S')}"
+        desti, n = base, 1
+        while os.path.exists(desti):
+            desti, n = f"{base}.{n}", n + 1
+        os.replace(self.path, desti)
+        antics = sorted(glob.glob(glob.escape(self.path) + ".*"))
+        for antic in antics[:max(0, len(antics) - self.copies)]:
+            try:
+                os.remove(antic)
+            except OSError:
+                pass
+
+
+def configurar_logging_asincron(handlers: List[logging.Handler], formatacio: str,
+                                nivell: int = logging.INFO) -> QueueListener:
+    """
+    Configura el logging arrel perquè els registres passin per una cua i els 'handlers' (fitxer,
+    consola...) s'executin en un fil a part. Retorna el QueueListener ja iniciat (cal aturar-lo
+    amb stop() en tancar, per buidar la cua).
+    """
+    formatter = logging.Formatter(formatacio)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    cua: "queue.SimpleQueue" = queue.SimpleQueue()
+    handler_cua = QueueHandler(cua)
+    # El format definitiu l'aplica cada handler; a la cua només es fixa el missatge
+    handler_cua.setFormatter(logging.Formatter("%(message)s"))
+    logging.basicConfig(level=nivell, handlers=[handler_cua], force=True)
+    escoltador = QueueListener(cua, *handlers, respect_handler_level=True)
+    escoltador.start()
+    return escoltador
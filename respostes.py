@@ -0,0 +1,21 @@
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # Opcional: sense orjson es fa servir el mòdul json estàndard
+    orjson = None
+
+MEDIA_TYPE = "application/json"
+
+
+def json_bytes(dades: Any) -> bytes:
+    """
+    Serialitza 'dades' (dicts, llistes, str, int...) a JSON UTF-8 compacte, amb orjson si hi és.
+
+    El resultat és idèntic al de la JSONResponse de FastAPI (ensure_ascii=False, sense espais),
+    de manera que es pot desar i reenviar tal qual sense passar pels models de pydantic.
+    """
+    if orjson is not None:
+        return orjson.dumps(dades)
+    return json.dumps(dades, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Micro-benchmarks dels camins calents del joc, amb resultats en JSON i comparació amb una base.
+
+Benchmarks (µs per operació, mediana de diverses repeticions):
+  diccionari.load                      Diccionari.load de la instantània binària
+  forma_canonica.{lemes,flexions,pronominals,inexistents}
+                                       Diccionari.obtenir_forma_canonica per tipus de paraula
+  ranking.carregar_fred                compilar el JSON del rànquing + construir l'índex de pistes
+  ranking.carregar_calent              obrir el rànquing compilat i l'índex de pistes ja desats
+  pista.millor_candidat                selecció de pista de /pista (IndexPistes) amb intents provats
+  diccionari_full.near                 suggeriments per paraules mal escrites
+  diccionari_full.info                 info d'una forma (sense i amb la cache LRU)
+  proximitat.calcular_ranking_complet  rànquing complet amb un model de vectors sintètic
+
+Fa servir les dades reals de data/ si hi són (diccionari.bin, words/*.json, diccionari_full.db);
+si no, o amb --synthetic, genera fixtures sintètiques deterministes en un directori temporal.
+Els fitxers compilats es generen sempre al directori temporal (data/ no es modifica, excepte
+l'índex de paraules properes de diccionari_full.db, que és el mateix que fa servir el servidor).
+Els benchmarks que depenen de paquets no instal·lats (rapidfuzz, numpy...) es marquen com a omesos.
+
+Amb --baseline es compara cada mediana amb la d'una execució anterior i es marca com a regressió
+tot el que sigui més lent que el llindar (--threshold); llavors el procés acaba amb codi 1.
+
+Ús (des de l'arrel del projecte):
+  python scripts/benchmark.py --output data/benchmarks/base.json
+  python scripts/benchmark.py --baseline data/benchmarks/base.json [--threshold 0.15]
+  python scripts/benchmark.py --synthetic 50000 --filter forma_canonica
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+
+class Benchmark:
+    """Un benchmark: 'executar' fa 'operacions' operacions; 'preparar' (opcional, no cronometrat) s'executa abans de cada repetició."""
+
+    def __init__(self, nom: str, executar: Callable[[], None], operacions: int = 1,
+                 preparar: Optional[Callable[[], None]] = None):
+        self.nom = nom
+        self.executar = executar
+        self.operacions = max(1, operacions)
+        self.preparar = preparar
+
+
+def cronometrar(benchmark: Benchmark, repeticions: int, escalfament: int = 1) -> dict:
+    for _ in range(escalfament):
+        if benchmark.preparar:
+            benchmark.preparar()
+        benchmark.executar()
+    temps = []
+    for _ in range(repeticions):
+        if benchmark.preparar:
+            benchmark.preparar()
+        inici = time.perf_counter()
+        benchmark.executar()
+        temps.append((time.perf_counter() - inici) / benchmark.operacions * 1e6)
+    return {
+        "mediana_us": statistics.median(temps),
+        "min_us": min(temps),
+        "mitjana_us": statistics.fmean(temps),
+        "desviacio_us": statistics.stdev(temps) if len(temps) > 1 else 0.0,
+        "repeticions": repeticions,
+        "operacions": benchmark.operacions,
+    }
+
+
+# ------------------------------ Fixtures ------------------------------
+class Fixtures:
+    """Dades dels benchmarks: reals (data/) o sintètiques, i directori temporal pels fitxers compilats."""
+
+    def __init__(self, tmp: Path, sintetic: int, rebuscada: Optional[str], seed: int = 1):
+        from diccionari import Diccionari
+
+        self.tmp = tmp
+        self.rnd = random.Random(seed)
+        self.origen: Dict[str, str] = {}
+        data = ROOT / "data"
+
+        # Diccionari (instantània binària)
+        self.path_diccionari = tmp / "diccionari.bin"
+        real = data / "diccionari.bin"
+        if not sintetic and real.exists():
+            shutil.copy(real, self.path_diccionari)
+            self.origen["diccionari"] = str(real)
+        elif not sintetic and real.with_suffix(".json").exists():
+            Diccionari.load_json(str(real.with_suffix(".json"))).save(str(self.path_diccionari))
+            self.origen["diccionari"] = str(real.with_suffix(".json"))
+        else:
+            from dictionary_memory import diccionari_sintetic
+            path_json = tmp / "diccionari.json"
+            diccionari_sintetic(sintetic or 50000, path_json, seed)
+            Diccionari.load_json(str(path_json)).save(str(self.path_diccionari))
+            self.origen["diccionari"] = f"sintètic ({sintetic or 50000} lemes)"
+        self.dicc = Diccionari.load(str(self.path_diccionari))
+
+        # Rànquing (JSON {paraula: posició})
+        words = data / "words"
+        candidats = sorted(words.glob("*.json")) if words.exists() and not sintetic else []
+        if rebuscada and (words / f"{rebuscada}.json").exists():
+            candidats = [words / f"{rebuscada}.json"]
+        self.dir_rankings = tmp / "words"
+        self.dir_rankings.mkdir()
+        if candidats:
+            shutil.copy(candidats[0], self.dir_rankings / candidats[0].name)
+            self.fitxer_ranking = self.dir_rankings / candidats[0].name
+            self.origen["ranking"] = str(candidats[0])
+        else:
+            lemes = sorted(self.dicc.totes_les_lemes())
+            self.rnd.shuffle(lemes)
+            self.fitxer_ranking = self.dir_rankings / f"{lemes[0]}.json"
+            with open(self.fitxer_ranking, "w", encoding="utf-8") as f:
+                json.dump({p: i for i, p in enumerate(lemes)}, f, ensure_ascii=False)
+            self.origen["ranking"] = f"sintètic ({len(lemes)} paraules)"
+
+        # Diccionari complet (SQLite)
+        real_full = data / "diccionari_full.db"
+        if not sintetic and real_full.exists():
+            self.path_full = real_full
+            self.origen["diccionari_full"] = str(real_full)
+        else:
+            from dictionary_full_latency import base_sintetica
+            self.path_full = tmp / "diccionari_full.db"
+            base_sintetica(sintetic or 50000, str(self.path_full), seed)
+            self.origen["diccionari_full"] = f"sintètic ({sintetic or 50000} lemes)"
+
+    def mostra(self, paraules: List[str], n: int) -> List[str]:
+        paraules = sorted(paraules)
+        self.rnd.shuffle(paraules)
+        return paraules[:n]
+
+
+# ------------------------------ Benchmarks ------------------------------
+def benchmarks_diccionari(fx: Fixtures, n: int) -> List[Benchmark]:
+    from diccionari import Diccionari
+
+    dicc = fx.dicc
+    lemes = fx.mostra(list(dicc.totes_les_lemes()), n)
+    flexions = []
+    for lema in lemes:
+        flexions.extend(f for f in dicc.totes_les_flexions(lema) if f != lema)
+    flexions = fx.mostra(flexions, n)
+    verbs = [l for l in lemes if "VM" in dicc.categories_lema(l)]
+    pronominals = fx.mostra([v + "-se" for v in verbs] + [v + "'s" for v in verbs if v[-1] in "aeiou"], n)
+    inexistents = [l + "zqx" for l in lemes]
+    # La primera consulta construeix la taula de resolució: queda fora del temps (escalfament)
+    dicc.obtenir_forma_canonica(lemes[0])
+
+    def resoldre(paraules):
+        def executar():
+            for p in paraules:
+                dicc.obtenir_forma_canonica(p)
+        return executar
+
+    return [
+        Benchmark("diccionari.load", lambda: Diccionari.load(str(fx.path_diccionari))),
+        Benchmark("forma_canonica.lemes", resoldre(lemes), len(lemes)),
+        Benchmark("forma_canonica.flexions", resoldre(flexions), len(flexions)),
+        Benchmark("forma_canonica.pronominals", resoldre(pronominals), len(pronominals)),
+        Benchmark("forma_canonica.inexistents", resoldre(inexistents), len(inexistents)),
+    ]
+
+
+def benchmarks_ranking(fx: Fixtures, n: int) -> List[Benchmark]:
+    from ranking import IndexPistes, RankingCompilat, Vocabulari, carregar_ranking_compilat
+
+    dir_compilat = fx.tmp / "words" / "bin"
+    dir_compilat.mkdir(exist_ok=True)
+    vocabulari = Vocabulari(dir_compilat / Vocabulari.FITXER)
+    fitxer_bin = dir_compilat / (fx.fitxer_ranking.stem + RankingCompilat.EXTENSIO)
+    path_pistes = dir_compilat / f"{fx.fitxer_ranking.stem}{IndexPistes.EXTENSIO}"
+
+    def carregar():
+        # El mateix que fa server._carregar_ranking_disc
+        ranking = carregar_ranking_compilat(fx.fitxer_ranking, dir_compilat, vocabulari)
+        ranking.construir_index_pistes(fx.dicc.freq_lema, path_pistes, fx.dicc.empremta)
+        return ranking
+
+    def esborrar_compilats():
+        for path in (fitxer_bin, path_pistes):
+            if path.exists():
+                path.unlink()
+
+    ranking = carregar()
+    total = ranking.total
+    paraules = [p for p, _ in ranking.items_ordenats(0, min(total, 5000))]
+    # Peticions de /pista: una millor posició i uns quants intents ja provats
+    peticions = []
+    for _ in range(n):
+        millor = fx.rnd.randint(2, max(2, min(total - 1, 3000)))
+        provades = set(fx.rnd.sample(paraules, min(len(paraules), fx.rnd.randint(5, 60))))
+        objectiu = millor // 2
+        peticions.append((max(0, objectiu - 10), max(objectiu + 10, millor - 1), provades))
+
+    def pistes():
+        index = ranking.index_pistes
+        for inici, fi, provades in peticions:
+            index.millor_candidat(inici, fi, provades)
+
+    return [
+        Benchmark("ranking.carregar_fred", carregar, preparar=esborrar_compilats),
+        Benchmark("ranking.carregar_calent", carregar),
+        Benchmark("pista.millor_candidat", pistes, len(peticions)),
+    ]
+
+
+def benchmarks_diccionari_full(fx: Fixtures, n: int) -> List[Benchmark]:
+    from diccionari_full import DiccionariFull
+
+    dicc_full = DiccionariFull(str(fx.path_full))
+    formes = [row[0] for row in dicc_full.conn.execute("SELECT forma FROM formes")]
+    mostra = fx.mostra(formes, n)
+    errades = []
+    for w in mostra:
+        i = fx.rnd.randrange(len(w))
+        errades.append(w[:i] + fx.rnd.choice("aeiou") + w[i + 1:])
+    # Construeix (o obre) l'índex de paraules properes fora del temps
+    dicc_full.index_propers()
+
+    def near():
+        for w in errades:
+            dicc_full.near(w, limit=6, min_score=60)
+
+    def info_fred():
+        for w in mostra:
+            dicc_full.cache_formes.descartar(w)
+            dicc_full.info(w)
+
+    def info_cache():
+        for w in mostra:
+            dicc_full.info(w)
+
+    return [
+        Benchmark("diccionari_full.near", near, len(errades)),
+        Benchmark("diccionari_full.info", info_fred, len(mostra)),
+        Benchmark("diccionari_full.info_cache", info_cache, len(mostra)),
+    ]
+
+
+def benchmarks_proximitat(fx: Fixtures, n: int) -> List[Benchmark]:
+    import numpy as np
+    from proximitat import calcular_ranking_complet
+
+    class ModelSintetic:
+        """Vectors aleatoris deterministes per paraula (substitueix el model de fastText)."""
+
+        def __init__(self, dimensions: int = 300):
+            self.dimensions = dimensions
+            self._vectors: Dict[str, "np.ndarray"] = {}
+
+        def get_word_vector(self, paraula: str):
+            vector = self._vectors.get(paraula)
+            if vector is None:
+                llavor = sum(ord(c) * 31 ** i for i, c in enumerate(paraula)) % (2 ** 32)
+                vector = self._vectors[paraula] = np.random.default_rng(llavor).standard_normal(self.dimensions, dtype=np.float32)
+            return vector
+
+    paraules = fx.mostra(list(fx.dicc.totes_les_lemes()), n * 10)
+    model = ModelSintetic()
+    for p in paraules:
+        model.get_word_vector(p)
+    # calcular_ranking_complet escriu data/ranking_debug.txt relatiu al directori actual
+    directori = fx.tmp / "proximitat"
+    (directori / "data").mkdir(parents=True, exist_ok=True)
+
+    def executar():
+        anterior = os.getcwd()
+        os.chdir(directori)
+        try:
+            calcular_ranking_complet(paraules[0], paraules, model)
+        finally:
+            os.chdir(anterior)
+
+    return [Benchmark("proximitat.calcular_ranking_complet", executar, len(paraules))]
+
+
+GRUPS = [
+    ("diccionari", benchmarks_diccionari),
+    ("ranking", benchmarks_ranking),
+    ("diccionari_full", benchmarks_diccionari_full),
+    ("proximitat", benchmarks_proximitat),
+]
+
+
+def versio_codi() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(resultats: dict, base: dict, llindar: float) -> List[str]:
+    """Imprimeix la comparació amb la base i retorna els noms dels benchmarks que han empitjorat."""
+    regressions = []
+    print(f"\n{'benchmark':<38}{'base µs':>12}{'ara µs':>12}{'canvi':>9}")
+    for nom, r in resultats.items():
+        anterior = base.get("resultats", {}).get(nom)
+        if not anterior or "mediana_us" not in anterior or "mediana_us" not in r:
+            continue
+        canvi = r["mediana_us"] / anterior["mediana_us"] - 1 if anterior["mediana_us"] else 0.0
+        marca = ""
+        if canvi > llindar:
+            marca = "  REGRESSIÓ"
+            regressions.append(nom)
+        elif canvi < -llindar:
+            marca = "  millora"
+        print(f"{nom:<38}{anterior['mediana_us']:>12.2f}{r['mediana_us']:>12.2f}{canvi * 100:>+8.1f}%{marca}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks de diccionari, rànquings i pistes")
+    parser.add_argument("--synthetic", type=int, default=0, help="Fes servir fixtures sintètiques amb N lemes encara que hi hagi dades reals")
+    parser.add_argument("--rebuscada", type=str, default=None, help="Rànquing real a fer servir (per defecte, el primer de data/words)")
+    parser.add_argument("--sample", type=int, default=2000, help="Paraules per benchmark")
+    parser.add_argument("--repeat", type=int, default=7, help="Repeticions cronometrades per benchmark")
+    parser.add_argument("--filter", type=str, default=None, help="Executa només els benchmarks que contenen aquest text")
+    parser.add_argument("--output", type=str, default=None, help="Desa els resultats en JSON")
+    parser.add_argument("--baseline", type=str, default=None, help="Resultats JSON anteriors amb què comparar")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Empitjorament relatiu que es considera regressió")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    resultats: Dict[str, dict] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        fx = Fixtures(Path(tmp), args.synthetic, args.rebuscada, args.seed)
+        for grup, constructor in GRUPS:
+            try:
+                benchmarks = constructor(fx, args.sample)
+            except ImportError as e:
+                print(f"[omès] {grup}: {e}")
+                resultats[grup] = {"omes": str(e)}
+                continue
+            for benchmark in benchmarks:
+                if args.filter and args.filter not in benchmark.nom:
+                    continue
+                r = resultats[benchmark.nom] = cronometrar(benchmark, args.repeat)
+                print(f"{benchmark.nom:<38}{r['mediana_us']:>12.2f} µs/op  (min {r['min_us']:.2f}, "
+                      f"±{r['desviacio_us']:.2f}, {r['operacions']} op x {r['repeticions']})")
+        origen = fx.origen
+
+    informe = {
+        "metadades": {
+            "data": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": versio_codi(),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "fixtures": origen,
+            "sample": args.sample,
+        },
+        "resultats": resultats,
+    }
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(informe, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            base = json.load(f)
+        if base.get("metadades", {}).get("fixtures") != origen:
+            print("[WARN] Les fixtures de la base no són les mateixes: la comparació pot no ser representativa")
+        regressions = comparar(resultats, base, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regressions (> {args.threshold * 100:.0f}%): {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Compila els fitxers de rànquing JSON (data/words/*.json) al format binari que obre el servidor.
+
+Per a cada rànquing es genera data/words/bin/<paraula>.rank (array int32 de posicions indexat
+pel vocabulari compartit data/words/bin/vocabulari.bin, el mateix fitxer que obre el servidor).
+El servidor ja compila sota demanda, però fer-ho abans evita que el primer jugador d'un repte
+pagui el cost de la compilació.
+
+Ús:
+  python scripts/compile_rankings.py [carpeta_o_fitxer.json] [--force]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# Posa al path l'arrel del projecte
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+ROOT = Path(__file__).resolve().parent.parent
+
+from ranking import RankingCompilat, Vocabulari, carregar_ranking_compilat  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compila els rànquings JSON al format binari del servidor")
+    parser.add_argument("path", nargs="?", type=Path, default=ROOT / "data" / "words",
+                        help="Carpeta amb fitxers .json o un fitxer concret (per defecte: data/words)")
+    parser.add_argument("--out", type=Path, default=None,
+                        help="Carpeta de sortida (per defecte: <carpeta>/bin)")
+    parser.add_argument("--force", action="store_true", help="Recompila encara que el fitxer binari sigui recent")
+    args = parser.parse_args()
+
+    if args.path.is_file():
+        fitxers = [args.path]
+        base = args.path.parent
+    elif args.path.is_dir():
+        fitxers = sorted(p for p in args.path.glob("*.json") if p.is_file())
+        base = args.path
+    else:
+        print(f"Ruta no vàlida: {args.path}")
+        return 1
+
+    out_dir = args.out or (base / "bin")
+    vocabulari = Vocabulari(out_dir / Vocabulari.FITXER)
+    errors = 0
+    inici = time.perf_counter()
+    for fitxer in fitxers:
+        try:
+            if args.force:
+                with open(fitxer, "r", encoding="utf-8") as f:
+                    RankingCompilat.compilar(json.load(f), vocabulari, out_dir / (fitxer.stem + RankingCompilat.EXTENSIO))
+            ranking = carregar_ranking_compilat(fitxer, out_dir, vocabulari)
+            print(f"✓ {fitxer.name}: {ranking.total} paraules, objectiu '{ranking.objectiu}' ({ranking.nbytes // 1024} KB)")
+        except Exception as e:
+            errors += 1
+            print(f"✗ {fitxer.name}: {e}")
+    print(f"\n{len(fitxers) - errors}/{len(fitxers)} rànquings compilats en {time.perf_counter() - inici:.1f}s "
+          f"(vocabulari: {len(vocabulari)} paraules)")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
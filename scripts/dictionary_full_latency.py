@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Latència per crida de DiccionariFull.info + explain_invalid (el camí de /whynot): consultes N+1
+antigues vs una sola consulta per forma, en fred i amb la cache LRU de formes.
+
+Escenaris:
+  abans      les consultes d'abans: lemes, lema principal, i categories i freqüència per lema
+             (explain_invalid repetia les de lemes i categories)
+  consulta   DiccionariFull amb la consulta única, buidant la cache abans de cada paraula
+  cache      DiccionariFull amb la cache ja plena (mateixes paraules, segona passada)
+
+Ús (des de l'arrel del projecte):
+  python scripts/dictionary_full_latency.py [--db data/diccionari_full.db] [--sample 5000]
+  python scripts/dictionary_full_latency.py --synthetic 50000   # sense dades, base de dades sintètica
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from diccionari_full import DiccionariFull  # noqa: E402
+
+
+def percentil(valors, p):
+    if not valors:
+        return 0.0
+    ordenats = sorted(valors)
+    k = min(len(ordenats) - 1, max(0, int(round(p / 100 * (len(ordenats) - 1)))))
+    return ordenats[k]
+
+
+def base_sintetica(n_lemes: int, desti: str, seed: int = 1) -> None:
+    """Crea una base de dades amb l'esquema de DiccionariFull (~5 formes i 1-2 categories per lema)."""
+    rnd = random.Random(seed)
+    lletres = "abcdefghijlmnopqrstuvxàèéíòóúç"
+    conn = sqlite3.connect(desti)
+    conn.executescript("""
+        CREATE TABLE formes (forma TEXT PRIMARY KEY, forma_simplified TEXT NOT NULL, primary_lemma TEXT NOT NULL);
+        CREATE TABLE lemmes (lemma TEXT PRIMARY KEY, lemma_simplified TEXT NOT NULL, freq INTEGER DEFAULT 0);
+        CREATE TABLE forma_lemma (forma TEXT NOT NULL, lemma TEXT NOT NULL, PRIMARY KEY (forma, lemma));
+        CREATE TABLE lemma_categories (lemma TEXT NOT NULL, category TEXT NOT NULL, PRIMARY KEY (lemma, category));
+    """)
+    for _ in range(n_lemes):
+        lema = "".join(rnd.choice(lletres) for _ in range(rnd.randint(3, 10)))
+        conn.execute("INSERT OR IGNORE INTO lemmes VALUES (?, ?, ?)",
+                     (lema, DiccionariFull._simplificar_text(lema), int(rnd.paretovariate(1.2) * 10)))
+        for cat in rnd.sample(["NC", "VM", "AQ", "RG", "SP"], rnd.randint(1, 2)):
+            conn.execute("INSERT OR IGNORE INTO lemma_categories VALUES (?, ?)", (lema, cat))
+        for sufix in [""] + rnd.sample(["s", "es", "a", "em", "eu", "en", "ava"], rnd.randint(1, 5)):
+            forma = lema + sufix
+            conn.execute("INSERT OR IGNORE INTO formes VALUES (?, ?, ?)",
+                         (forma, DiccionariFull._simplificar_text(forma), lema))
+            conn.execute("INSERT OR IGNORE INTO forma_lemma VALUES (?, ?)", (forma, lema))
+    conn.execute("CREATE INDEX idx_forma_lemma_forma ON forma_lemma(forma)")
+    conn.execute("CREATE INDEX idx_lemma_categories_lemma ON lemma_categories(lemma)")
+    conn.commit()
+    conn.close()
+
+
+def consultes_antigues(conn: sqlite3.Connection, w: str, freq_min: int) -> None:
+    """Reprodueix les consultes d'info + explain_invalid abans d'unificar-les."""
+    cursor = conn.cursor()
+    # info
+    cursor.execute("SELECT fl.lemma FROM forma_lemma fl WHERE fl.forma = ?", (w,))
+    raw_lemes = [row[0] for row in cursor.fetchall()]
+    lemes = [w] if w in raw_lemes else raw_lemes
+    cursor.execute("SELECT primary_lemma FROM formes WHERE forma = ?", (w,))
+    cursor.fetchone()
+    for l in lemes:
+        cursor.execute("SELECT category FROM lemma_categories WHERE lemma = ?", (l,))
+        cursor.fetchall()
+    for l in lemes:
+        cursor.execute("SELECT freq FROM lemmes WHERE lemma = ?", (l,))
+        cursor.fetchone()
+    # explain_invalid
+    cursor.execute("SELECT 1 FROM formes WHERE forma = ?", (w,))
+    if not cursor.fetchone():
+        return
+    # reason_invalid_category
+    cursor.execute("SELECT lemma FROM forma_lemma WHERE forma = ?", (w,))
+    lemes = {row[0] for row in cursor.fetchall()}
+    if w in lemes:
+        lemes = {w}
+    permes = False
+    for l in lemes:
+        cursor.execute("SELECT category FROM lemma_categories WHERE lemma = ?", (l,))
+        if any(row[0] in DiccionariFull.ALLOWED_CAT2 for row in cursor.fetchall()):
+            permes = True
+            break
+    if not permes:
+        for l in lemes:
+            cursor.execute("SELECT category FROM lemma_categories WHERE lemma = ?", (l,))
+            cursor.fetchall()
+        return
+    # reason_too_uncommon
+    cursor.execute("SELECT lemma FROM forma_lemma WHERE forma = ?", (w,))
+    lemes = {row[0] for row in cursor.fetchall()}
+    if w in lemes:
+        lemes = {w}
+    for l in lemes:
+        cursor.execute("SELECT freq FROM lemmes WHERE lemma = ?", (l,))
+        cursor.fetchone()
+
+
+def cronometrar(fn, paraules):
+    temps = []
+    for w in paraules:
+        inici = time.perf_counter()
+        fn(w)
+        temps.append((time.perf_counter() - inici) * 1e6)
+    return temps
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Latència d'info + explain_invalid: consultes N+1 vs consulta única + LRU")
+    parser.add_argument("--db", type=str, default=str(ROOT / "data" / DiccionariFull.DB_FILE), help="Base de dades SQLite")
+    parser.add_argument("--synthetic", type=int, default=0, help="Genera una base de dades sintètica amb N lemes")
+    parser.add_argument("--sample", type=int, default=5000, help="Paraules per escenari")
+    parser.add_argument("--freq-min", type=int, default=20, help="Llindar de freqüència d'explain_invalid")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = args.db
+        if args.synthetic:
+            db = os.path.join(tmp, DiccionariFull.DB_FILE)
+            base_sintetica(args.synthetic, db)
+        elif not os.path.exists(db):
+            raise SystemExit(f"No existeix {db} (fes servir --synthetic N per una base de dades sintètica)")
+
+        conn = sqlite3.connect(db)
+        formes = [row[0] for row in conn.execute("SELECT forma FROM formes")]
+        rnd = random.Random(7)
+        # Una part de paraules inexistents, com les que arriben a /whynot
+        paraules = rnd.sample(formes, min(args.sample, len(formes)))
+        paraules += [w + "xq" for w in paraules[:len(paraules) // 5]]
+        rnd.shuffle(paraules)
+
+        dicc_full = DiccionariFull(db, mida_cache_formes=len(paraules) + 1)
+
+        def nou(w):
+            dicc_full.info(w)
+            dicc_full.explain_invalid(w, args.freq_min)
+
+        def fred(w):
+            dicc_full.cache_formes.buidar()
+            nou(w)
+
+        # Escalfament (page cache de SQLite i del sistema) abans de mesurar
+        for w in paraules[:200]:
+            consultes_antigues(conn, w, args.freq_min)
+            fred(w)
+
+        resultats = [
+            ("abans", cronometrar(lambda w: consultes_antigues(conn, w, args.freq_min), paraules)),
+            ("consulta", cronometrar(fred, paraules)),
+        ]
+        dicc_full.cache_formes.buidar()
+        for w in paraules:
+            nou(w)
+        resultats.append(("cache", cronometrar(nou, paraules)))
+        conn.close()
+        dicc_full.close()
+
+    print(f"{len(paraules)} paraules per escenari (info + explain_invalid)")
+    print(f"{'escenari':<10}{'mitjana µs':>12}{'p50 µs':>10}{'p95 µs':>10}{'p99 µs':>10}")
+    for nom, temps in resultats:
+        print(f"{nom:<10}{sum(temps) / len(temps):>12.1f}{percentil(temps, 50):>10.1f}"
+              f"{percentil(temps, 95):>10.1f}{percentil(temps, 99):>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Informe de memòria i temps de càrrega del diccionari: JSON amb dicts de sets vs arrays compactes.
+
+Per cada representació es carrega el diccionari en un subprocés net i es mesura:
+  - heap Python (tracemalloc) que queda viu després de carregar-lo
+  - RSS del procés abans i després (Linux, /proc/self/status)
+  - mida de les taules compactes (DiccionariCompacte / DiccionariCompartit)
+i es comprova que totes les representacions resolen igual una mostra de formes.
+
+Representacions:
+  dicts      Diccionari.load_json (l'antic diccionari.json)
+  compacte   Diccionari.load_json(...).compactar(), sense el Diccionari original
+  compartit  Diccionari.load sobre la instantània binària (mmap + verificació del resum;
+             la memòria és page cache compartida)
+
+Ús (des de l'arrel del projecte):
+  python scripts/dictionary_memory.py [--path data/diccionari.bin]   # .bin o .json
+  python scripts/dictionary_memory.py --synthetic 200000   # sense dades, diccionari sintètic
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+MODES = ("dicts", "compacte", "compartit")
+
+
+def rss_kb() -> int:
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for linia in f:
+                if linia.startswith("VmRSS:"):
+                    return int(linia.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def diccionari_sintetic(n_lemes: int, desti: Path, seed: int = 1) -> None:
+    """Genera un diccionari.json amb una forma semblant al real (~5 formes per lema)."""
+    rnd = random.Random(seed)
+    lletres = "abcdefghijlmnopqrstuvxàèéíòóúç"
+    categories = ["NC", "VM", "AQ", "RG"]
+    mapping, canoniques, lema_categories, freq = {}, {}, {}, {}
+    for _ in range(n_lemes):
+        lema = "".join(rnd.choice(lletres) for _ in range(rnd.randint(3, 10)))
+        if rnd.random() < 0.3:
+            lema += "ar"
+        formes = {lema} | {lema + s for s in rnd.sample(["s", "es", "a", "em", "eu", "en", "ava", "ant"], rnd.randint(1, 6))}
+        canoniques[lema] = sorted(formes)
+        lema_categories[lema] = ["VM"] if lema.endswith("ar") else [rnd.choice(categories)]
+        freq[lema] = int(rnd.paretovariate(1.2) * 10)
+        for forma in formes:
+            mapping.setdefault(forma, []).append(lema)
+    with open(desti, "w", encoding="utf-8") as f:
+        json.dump({"mapping_flexions_multi": mapping, "canoniques": canoniques,
+                   "lema_categories": lema_categories, "freq": freq}, f, ensure_ascii=False)
+
+
+def mesurar(mode: str, path_json: str, path_bin: str, mostra: int) -> dict:
+    from diccionari import Diccionari
+
+    gc.collect()
+    rss_inici = rss_kb()
+    tracemalloc.start()
+    inici = time.perf_counter()
+    if mode == "dicts":
+        dicc = Diccionari.load_json(path_json)
+    elif mode == "compacte":
+        dicc = Diccionari.load_json(path_json).compactar()
+    else:
+        dicc = Diccionari.load(path_bin)
+    segons = time.perf_counter() - inici
+    gc.collect()
+    heap, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_final = rss_kb()
+
+    with open(path_json, "r", encoding="utf-8") as f:
+        formes = sorted(json.load(f)["mapping_flexions_multi"])
+    random.Random(7).shuffle(formes)
+    mostra_formes = formes[:mostra] + [f + "-se" for f in formes[:mostra // 10]]
+    inici = time.perf_counter()
+    resolucio = [dicc.obtenir_forma_canonica(f) for f in mostra_formes]
+    us_consulta = (time.perf_counter() - inici) / max(1, len(mostra_formes)) * 1e6
+    if resolucio:
+        # Es compta la segona passada, amb les pàgines i les caches ja calentes
+        inici = time.perf_counter()
+        resolucio = [dicc.obtenir_forma_canonica(f) for f in mostra_formes]
+        us_consulta = (time.perf_counter() - inici) / len(mostra_formes) * 1e6
+    return {
+        "mode": mode,
+        "heap_mb": heap / 1e6,
+        "rss_delta_mb": (rss_final - rss_inici) / 1e3,
+        "taules_mb": getattr(dicc, "nbytes", 0) / 1e6,
+        "carrega_s": segons,
+        "consulta_us": us_consulta,
+        "resolucio": resolucio,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Informe de memòria i càrrega del diccionari (JSON vs arrays compactes)")
+    parser.add_argument("--path", type=str, default=str(ROOT / "data" / "diccionari.bin"), help="Diccionari (.bin o .json)")
+    parser.add_argument("--json", type=str, help=argparse.SUPPRESS)
+    parser.add_argument("--bin", type=str, help=argparse.SUPPRESS)
+    parser.add_argument("--synthetic", type=int, default=0, help="Genera un diccionari sintètic amb N lemes")
+    parser.add_argument("--sample", type=int, default=20000, help="Formes per comprovar i cronometrar la resolució")
+    parser.add_argument("--mode", choices=MODES, help="Mesura només aquesta representació (intern)")
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(mesurar(args.mode, args.json, args.bin, args.sample), ensure_ascii=False))
+        return 0
+
+    from diccionari import Diccionari
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Es preparen els dos formats (JSON i instantània) del mateix diccionari
+        path_json = str(Path(tmp) / "diccionari.json")
+        path_bin = str(Path(tmp) / "diccionari.bin")
+        if args.synthetic:
+            diccionari_sintetic(args.synthetic, Path(path_json))
+        elif not os.path.exists(args.path):
+            raise SystemExit(f"No existeix {args.path} (fes servir --synthetic N per un diccionari sintètic)")
+        elif args.path.endswith(".json"):
+            path_json = args.path
+        else:
+            Diccionari.load(args.path).exportar_json(path_json)
+        Diccionari.load_json(path_json).save(path_bin)
+
+        resultats = []
+        for mode in MODES:
+            cmd = [sys.executable, __file__, "--mode", mode, "--json", path_json, "--bin", path_bin,
+                   "--sample", str(args.sample)]
+            sortida = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+            resultats.append(json.loads(sortida.strip().splitlines()[-1]))
+
+    referencia = resultats[0]["resolucio"]
+    for r in resultats[1:]:
+        if r["resolucio"] != referencia:
+            print(f"[WARN] La resolució de '{r['mode']}' no coincideix amb la de 'dicts'")
+
+    print(f"{'mode':<12}{'heap MB':>10}{'RSS Δ MB':>10}{'taules MB':>11}{'càrrega s':>11}{'consulta µs':>13}")
+    for r in resultats:
+        print(f"{r['mode']:<12}{r['heap_mb']:>10.1f}{r['rss_delta_mb']:>10.1f}{r['taules_mb']:>11.1f}"
+              f"{r['carrega_s']:>11.2f}{r['consulta_us']:>13.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
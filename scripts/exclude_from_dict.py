@@ -248,7 +248,7 @@ def main(argv: Optional[Iterable[str]] = None) -> int:
 
 	# Carrega el diccionari reduït i filtra perquè només entri el que ja existeix al diccionari
 	from diccionari import Diccionari
-	reduced_path = ROOT / "data" / "diccionari.json"
+	reduced_path = ROOT / "data" / "diccionari.bin"
 	try:
 		dicc_reduced = Diccionari.load(str(reduced_path))
 		reduced_forms: Set[str] = set(dicc_reduced.mapping_flexions_multi.keys()) | set(dicc_reduced.mapping_flexions.keys())
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Prova de càrrega del servidor de joc (server.py) reproduint trànsit real o sintètic.
+
+La traça de peticions surt de:
+  - game.log: línies 'GUESS:', 'PISTA:' i 'WHYNOT:' del log de text (format antic)
+  - game.jsonl: esdeveniments 'guess', 'pista' i 'whynot' del registre de joc (registre.py)
+  - data/test.json: si no es dona cap log, es genera una traça sintètica amb aquestes paraules
+    (intents, alguna pista i paraules mal escrites per /whynot)
+
+i es reprodueix contra un servidor local amb N connexions concurrents (keep-alive), sense límit
+o a un ritme fix de peticions per segon. Amb --start s'arrenca el servidor en un subprocés
+(uvicorn server:app) i s'atura en acabar; tot funciona sense xarxa externa.
+
+Informe: peticions per segon i, per endpoint, p50/p95/p99/max de latència i taxa d'errors
+(4xx a part: /guess i /whynot en retornen per paraules no vàlides). Amb --output es desa en JSON
+per comparar execucions.
+
+Ús (des de l'arrel del projecte):
+  python scripts/load_test.py --start --log game.jsonl --concurrency 32
+  python scripts/load_test.py --url http://127.0.0.1:8000 --synthetic 20000 --rate 500 --output abans.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlparse
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Una petició de la traça: (mètode, path amb query, cos JSON o None)
+Peticio = Tuple[str, str, Optional[dict]]
+
+RE_GUESS = re.compile(r"GUESS: '(?P<paraula>[^']*)'.*\(objectiu: (?P<objectiu>[^)]*)\)")
+RE_PISTA = re.compile(r"PISTA: .*\(objectiu: (?P<objectiu>[^,)]*)")
+RE_WHYNOT = re.compile(r"WHYNOT: '(?P<paraula>[^']*)'")
+
+
+def percentil(valors, p):
+    if not valors:
+        return 0.0
+    ordenats = sorted(valors)
+    k = min(len(ordenats) - 1, max(0, int(round(p / 100 * (len(ordenats) - 1)))))
+    return ordenats[k]
+
+
+class ConstructorTraca:
+    """Converteix intents, pistes i whynot en peticions, recordant els intents de cada repte per /pista."""
+
+    def __init__(self, amb_rebuscada: bool = True):
+        self.amb_rebuscada = amb_rebuscada
+        self.peticions: List[Peticio] = []
+        self._intents: Dict[str, deque] = defaultdict(lambda: deque(maxlen=30))
+        self._darrer_objectiu: Optional[str] = None
+
+    def _rebuscada(self, objectiu: Optional[str]) -> Optional[str]:
+        objectiu = objectiu or self._darrer_objectiu
+        return objectiu if self.amb_rebuscada else None
+
+    def guess(self, paraula: str, objectiu: Optional[str]) -> None:
+        self._darrer_objectiu = objectiu or self._darrer_objectiu
+        self.peticions.append(("POST", "/guess", {"paraula": paraula, "rebuscada": self._rebuscada(objectiu)}))
+        self._intents[objectiu or ""].append(paraula)
+
+    def pista(self, objectiu: Optional[str]) -> None:
+        intents = [{"paraula": p, "forma_canonica": p, "posicio": 100 + i}
+                   for i, p in enumerate(self._intents[objectiu or ""])]
+        self.peticions.append(("POST", "/pista", {"intents": intents, "rebuscada": self._rebuscada(objectiu)}))
+
+    def whynot(self, paraula: str, objectiu: Optional[str]) -> None:
+        self.peticions.append(("POST", "/whynot", {"paraula": paraula, "rebuscada": self._rebuscada(objectiu)}))
+
+    def ranking(self, objectiu: Optional[str], limit: int = 300) -> None:
+        query = {"limit": limit}
+        if self._rebuscada(objectiu):
+            query["rebuscada"] = self._rebuscada(objectiu)
+        self.peticions.append(("GET", "/ranking?" + urlencode(query), None))
+
+
+def traca_de_log(path: Path, amb_rebuscada: bool) -> List[Peticio]:
+    """Traça a partir d'un game.log (text) o d'un registre d'esdeveniments JSON lines."""
+    traca = ConstructorTraca(amb_rebuscada)
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for linia in f:
+            linia = linia.strip()
+            if linia.startswith("{"):
+                try:
+                    e = json.loads(linia)
+                except ValueError:
+                    continue
+                tipus = e.get("tipus")
+                if tipus == "guess" and e.get("endpoint") != "/guess-batch" and e.get("paraula"):
+                    traca.guess(e["paraula"], e.get("objectiu"))
+                elif tipus == "pista":
+                    traca.pista(e.get("objectiu"))
+                elif tipus == "whynot" and e.get("paraula"):
+                    traca.whynot(e["paraula"], e.get("objectiu"))
+                continue
+            m = RE_GUESS.search(linia)
+            if m:
+                traca.guess(m["paraula"], m["objectiu"])
+                continue
+            m = RE_PISTA.search(linia)
+            if m and "No s'ha trobat" not in linia:
+                traca.pista(m["objectiu"])
+                continue
+            m = RE_WHYNOT.search(linia)
+            if m:
+                traca.whynot(m["paraula"], None)
+    return traca.peticions
+
+
+def traca_sintetica(n: int, paraules: List[str], rebuscades: List[Optional[str]], seed: int = 1) -> List[Peticio]:
+    """
+    Traça sintètica de 'n' peticions: partides de 10-60 intents amb les paraules de test.json
+    (amb repeticions, com les paraules populars), ~10% de paraules mal escrites seguides de /whynot,
+    una pista cada ~15 intents i alguna consulta de /ranking.
+    """
+    rnd = random.Random(seed)
+    traca = ConstructorTraca(amb_rebuscada=True)
+    # Distribució de Zipf aproximada: poques paraules concentren la majoria d'intents
+    pesos = [1.0 / (i + 1) for i in range(len(paraules))]
+    while len(traca.peticions) < n:
+        objectiu = rnd.choice(rebuscades)
+        for _ in range(rnd.randint(10, 60)):
+            paraula = rnd.choices(paraules, pesos)[0]
+            if rnd.random() < 0.1 and len(paraula) > 3:
+                i = rnd.randrange(len(paraula))
+                paraula = paraula[:i] + rnd.choice("aeiou") + paraula[i + 1:]
+                traca.guess(paraula, objectiu)
+                traca.whynot(paraula, objectiu)
+            else:
+                traca.guess(paraula, objectiu)
+            if rnd.random() < 1 / 15:
+                traca.pista(objectiu)
+        if rnd.random() < 0.3:
+            traca.ranking(objectiu)
+    return traca.peticions[:n]
+
+
+def endpoint(path: str) -> str:
+    return path.split("?", 1)[0]
+
+
+def reproduir(peticions: List[Peticio], url: str, concurrencia: int, ritme: float, temps_maxim: float) -> dict:
+    """Envia les peticions amb 'concurrencia' connexions; amb 'ritme' > 0, a 'ritme' peticions/s."""
+    desti = urlparse(url)
+    local = threading.local()
+    seguent = iter(range(len(peticions)))
+    lock = threading.Lock()
+    resultats: List[Tuple[str, int, float]] = []
+    inici = time.perf_counter()
+
+    def connexio() -> http.client.HTTPConnection:
+        conn = getattr(local, "conn", None)
+        if conn is None:
+            conn = local.conn = http.client.HTTPConnection(desti.hostname, desti.port or 80, timeout=temps_maxim)
+        return conn
+
+    def treballador() -> None:
+        propis = []
+        while True:
+            with lock:
+                i = next(seguent, None)
+            if i is None:
+                break
+            if ritme > 0:
+                # Planificació oberta: la latència es compta des de l'hora prevista, de manera que
+                # les cues del servidor no queden amagades per un client que s'espera
+                previst = inici + i / ritme
+                espera = previst - time.perf_counter()
+                if espera > 0:
+                    time.sleep(espera)
+            else:
+                previst = time.perf_counter()
+            metode, path, cos = peticions[i]
+            dades = json.dumps(cos).encode("utf-8") if cos is not None else None
+            capcaleres = {"Content-Type": "application/json"} if dades is not None else {}
+            try:
+                conn = connexio()
+                conn.request(metode, path, body=dades, headers=capcaleres)
+                resposta = conn.getresponse()
+                resposta.read()
+                estat = resposta.status
+            except (OSError, http.client.HTTPException):
+                estat = 0
+                local.conn = None
+            propis.append((endpoint(path), estat, time.perf_counter() - previst))
+        with lock:
+            resultats.extend(propis)
+
+    with ThreadPoolExecutor(max_workers=concurrencia) as executor:
+        for _ in range(concurrencia):
+            executor.submit(treballador)
+    durada = time.perf_counter() - inici
+
+    per_endpoint: Dict[str, dict] = {}
+    for nom in sorted({r[0] for r in resultats}):
+        propis = [r for r in resultats if r[0] == nom]
+        latencies = [r[2] * 1000 for r in propis]
+        per_endpoint[nom] = {
+            "peticions": len(propis),
+            "p50_ms": percentil(latencies, 50),
+            "p95_ms": percentil(latencies, 95),
+            "p99_ms": percentil(latencies, 99),
+            "max_ms": max(latencies) if latencies else 0.0,
+            "errors_4xx": sum(1 for r in propis if 400 <= r[1] < 500) / len(propis),
+            "errors": sum(1 for r in propis if r[1] == 0 or r[1] >= 500) / len(propis),
+        }
+    return {
+        "peticions": len(resultats),
+        "durada_s": durada,
+        "peticions_s": len(resultats) / durada if durada else 0.0,
+        "concurrencia": concurrencia,
+        "ritme": ritme,
+        "endpoints": per_endpoint,
+    }
+
+
+def arrencar_servidor(port: int, entorn: Dict[str, str]) -> subprocess.Popen:
+    cmd = [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(port),
+           "--log-level", "warning"]
+    proces = subprocess.Popen(cmd, cwd=ROOT, env={**os.environ, **entorn})
+    limit = time.monotonic() + 120
+    while time.monotonic() < limit:
+        if proces.poll() is not None:
+            raise SystemExit(f"El servidor s'ha aturat en arrencar (codi {proces.returncode})")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/paraula-dia")
+            conn.getresponse().read()
+            return proces
+        except OSError:
+            time.sleep(0.5)
+    proces.terminate()
+    raise SystemExit("El servidor no ha respost en 120 s")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Prova de càrrega de server.py reproduint una traça de peticions")
+    parser.add_argument("--url", type=str, default="http://127.0.0.1:8000", help="Servidor (si no es fa servir --start)")
+    parser.add_argument("--start", action="store_true", help="Arrenca server.py en un subprocés i l'atura en acabar")
+    parser.add_argument("--port", type=int, default=8765, help="Port del servidor arrencat amb --start")
+    parser.add_argument("--log", type=str, default=None, help="game.log o game.jsonl a reproduir")
+    parser.add_argument("--test-words", type=str, default=str(ROOT / "data" / "test.json"), help="Paraules per la traça sintètica")
+    parser.add_argument("--synthetic", type=int, default=10000, help="Peticions de la traça sintètica (sense --log)")
+    parser.add_argument("--rebuscada", action="append", default=None,
+                        help="Repte(s) de la traça sintètica (per defecte, el del dia)")
+    parser.add_argument("--no-rebuscada", action="store_true", help="Reprodueix el log contra el repte del dia del servidor")
+    parser.add_argument("--limit", type=int, default=0, help="Màxim de peticions de la traça (0 = totes)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Connexions concurrents")
+    parser.add_argument("--rate", type=float, default=0.0, help="Peticions per segon (0 = tan ràpid com es pugui)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Temps màxim per petició (s)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", type=str, default=None, help="Desa l'informe en JSON")
+    args = parser.parse_args()
+
+    if args.log:
+        peticions = traca_de_log(Path(args.log), amb_rebuscada=not args.no_rebuscada)
+        origen = args.log
+    else:
+        with open(args.test_words, "r", encoding="utf-8") as f:
+            paraules = [str(p).strip().lower() for p in json.load(f) if str(p).strip()]
+        peticions = traca_sintetica(args.synthetic, paraules, args.rebuscada or [None], args.seed)
+        origen = f"sintètica ({args.test_words})"
+    if args.limit:
+        peticions = peticions[:args.limit]
+    if not peticions:
+        raise SystemExit("La traça és buida")
+
+    proces = None
+    url = args.url
+    if args.start:
+        proces = arrencar_servidor(args.port, {"PORT": str(args.port)})
+        url = f"http://127.0.0.1:{args.port}"
+    try:
+        informe = reproduir(peticions, url, args.concurrency, args.rate, args.timeout)
+    finally:
+        if proces is not None:
+            proces.terminate()
+            proces.wait(30)
+    informe["traca"] = origen
+
+    print(f"Traça: {origen} — {informe['peticions']} peticions en {informe['durada_s']:.1f} s "
+          f"({informe['peticions_s']:.0f} pet/s, concurrència {args.concurrency}"
+          f"{f', ritme {args.rate:.0f}/s' if args.rate else ''})")
+    print(f"{'endpoint':<12}{'peticions':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'4xx %':>8}{'errors %':>10}")
+    for nom, r in informe["endpoints"].items():
+        print(f"{nom:<12}{r['peticions']:>10}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}"
+              f"{r['max_ms']:>9.1f}{r['errors_4xx'] * 100:>8.1f}{r['errors'] * 100:>10.1f}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(informe, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
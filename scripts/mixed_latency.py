@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Mesura la latència de cua de /guess sota trànsit mixt, amb i sense el pool de fils del servidor.
+
+Es crida l'aplicació ASGI de server.py directament (sense xarxa ni uvicorn) amb tres tipus de
+clients concurrents:
+  - jugadors enviant /guess contra un rànquing ja carregat (el trànsit que volem protegir)
+  - càrregues en fred: /ranking d'altres paraules després de treure-les de la cache
+  - /whynot amb paraules mal escrites (consultes SQLite + RapidFuzz)
+
+Per defecte executa dues vegades el mateix escenari en subprocessos, amb BLOCKING_WORKERS=0
+(tot al bucle d'esdeveniments, com abans) i amb el valor indicat, i mostra p50/p95/p99/max de /guess.
+
+Ús (des de l'arrel del projecte, amb data/ disponible):
+  python scripts/mixed_latency.py [--duration 10] [--guess-clients 20] [--cold-clients 2] [--whynot-clients 4]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def percentil(valors, p):
+    if not valors:
+        return 0.0
+    ordenats = sorted(valors)
+    k = min(len(ordenats) - 1, max(0, int(round(p / 100 * (len(ordenats) - 1)))))
+    return ordenats[k]
+
+
+async def peticio(app, metode: str, path: str, cos=None, query: str = "") -> int:
+    """Envia una petició HTTP a l'aplicació ASGI i retorna el codi d'estat."""
+    body = json.dumps(cos).encode("utf-8") if cos is not None else b""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": metode,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode("utf-8"),
+        "query_string": query.encode("utf-8"),
+        "root_path": "",
+        "headers": [(b"host", b"localhost"), (b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 80),
+    }
+    enviat = False
+
+    async def receive():
+        nonlocal enviat
+        if not enviat:
+            enviat = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.sleep(3600)
+        return {"type": "http.disconnect"}
+
+    estat = {"status": 0}
+
+    async def send(missatge):
+        if missatge["type"] == "http.response.start":
+            estat["status"] = missatge["status"]
+
+    await app(scope, receive, send)
+    return estat["status"]
+
+
+async def escenari(args) -> dict:
+    os.chdir(ROOT)
+    sys.path.insert(0, str(ROOT))
+    import server  # noqa: E402 - s'importa després de fixar BLOCKING_WORKERS
+
+    paraules_rebuscades = sorted(p.stem for p in (ROOT / "data" / "words").glob("*.json"))
+    if len(paraules_rebuscades) < 2:
+        raise SystemExit("Calen com a mínim dos rànquings a data/words per mesurar càrregues en fred.")
+    calenta = args.rebuscada or paraules_rebuscades[0]
+    fredes = [p for p in paraules_rebuscades if p != calenta]
+
+    ranking, _, _ = await server.obtenir_ranking_actiu(calenta)
+    vocab_guess = ranking.paraules_ordenades(0, 2000)
+    random.seed(args.seed)
+
+    latencies_guess = []
+    fi = time.perf_counter() + args.duration
+
+    async def jugador():
+        # La latència es compta des del moment en què el jugador volia enviar l'intent (final de
+        # l'anterior + pausa), no des que el bucle li torna el control: si el bucle està bloquejat,
+        # aquesta espera també la pateix el jugador
+        programat = time.perf_counter()
+        while programat < fi:
+            await peticio(server.app, "POST", "/guess", {"paraula": random.choice(vocab_guess), "rebuscada": calenta})
+            final = time.perf_counter()
+            latencies_guess.append(final - programat)
+            programat = final + args.think_time
+            await asyncio.sleep(args.think_time)
+
+    async def carrega_freda():
+        while time.perf_counter() < fi:
+            paraula = random.choice(fredes)
+            server.cache_rankings.descartar(paraula)
+            await peticio(server.app, "GET", "/ranking", query=f"limit=10&rebuscada={paraula}")
+            # Sense xarxa, amb BLOCKING_WORKERS=0 la petició no cedeix mai el bucle: es cedeix aquí,
+            # com ho faria l'anada i tornada del client
+            await asyncio.sleep(0)
+
+    async def whynot():
+        while time.perf_counter() < fi:
+            base = list(random.choice(vocab_guess))
+            base[random.randrange(len(base))] = random.choice("qxzkw")
+            await peticio(server.app, "POST", "/whynot", {"paraula": "".join(base), "rebuscada": calenta})
+            await asyncio.sleep(0)
+
+    tasques = [jugador() for _ in range(args.guess_clients)]
+    tasques += [carrega_freda() for _ in range(args.cold_clients)]
+    tasques += [whynot() for _ in range(args.whynot_clients)]
+    await asyncio.gather(*tasques)
+
+    ms = [x * 1000 for x in latencies_guess]
+    return {
+        "blocking_workers": server.BLOCKING_WORKERS,
+        "guess_requests": len(ms),
+        "p50_ms": percentil(ms, 50),
+        "p95_ms": percentil(ms, 95),
+        "p99_ms": percentil(ms, 99),
+        "max_ms": max(ms) if ms else 0.0,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Latència de cua de /guess sota trànsit mixt")
+    parser.add_argument("--duration", type=float, default=10.0, help="Durada de cada escenari (segons)")
+    parser.add_argument("--guess-clients", type=int, default=20)
+    parser.add_argument("--cold-clients", type=int, default=2)
+    parser.add_argument("--whynot-clients", type=int, default=4)
+    parser.add_argument("--think-time", type=float, default=0.005, help="Pausa entre intents d'un jugador (segons)")
+    parser.add_argument("--workers", type=int, default=4, help="BLOCKING_WORKERS per l'escenari amb pool")
+    parser.add_argument("--rebuscada", type=str, default=None, help="Rànquing calent (per defecte el primer de data/words)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--single", action="store_true", help="Executa només un escenari amb l'entorn actual (intern)")
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(asyncio.run(escenari(args))))
+        return 0
+
+    resultats = []
+    for workers in (0, args.workers):
+        entorn = dict(os.environ, BLOCKING_WORKERS=str(workers))
+        cmd = [sys.executable, __file__, "--single"] + [a for a in sys.argv[1:] if a != "--single"]
+        sortida = subprocess.run(cmd, env=entorn, capture_output=True, text=True, check=True).stdout
+        resultats.append(json.loads(sortida.strip().splitlines()[-1]))
+
+    print(f"{'mode':<12}{'n':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}  (ms, /guess)")
+    for r in resultats:
+        mode = "en línia" if r["blocking_workers"] == 0 else f"pool x{r['blocking_workers']}"
+        print(f"{mode:<12}{r['guess_requests']:>8}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['max_ms']:>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -110,8 +110,8 @@ def process_ranking_file(path: Path, dry_run: bool, auto_yes: bool) -> bool:
         return False
 
     # Lemas vàlids al diccionari reduït
-    reduced = Diccionari.load(str(ROOT / "data" / "diccionari.json"))
-    valid_lemmas: Set[str] = set(reduced.canoniques.keys())
+    reduced = Diccionari.load(str(ROOT / "data" / "diccionari.bin"))
+    valid_lemmas: Set[str] = set(reduced.totes_les_lemes())
 
     # Exclusions: només el fitxer d'exclusions és la font de veritat
     exc_forms, exc_lemmas = _load_exclusions_json()
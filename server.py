@@ -1,16 +1,28 @@
-
-from fastapi import FastAPI, HTTPException, Request, Query
+from fastapi import FastAPI, HTTPException, Request, Response, Query
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Dict, Optional
-from functools import lru_cache
+from typing import List, Dict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import hashlib
 import json
 import os
+import threading
+import time
 import logging
 from dotenv import load_dotenv
 from pathlib import Path
-from diccionari import Diccionari
+from diccionari import Diccionari, DiccionariCompartit
 from diccionari_full import DiccionariFull
+from calendari import Calendari
+from cache import CacheLRU, CacheTTL
+from respostes import MEDIA_TYPE, json_bytes
+from ranking import CacheRankings, IndexPistes, Vocabulari, carregar_ranking_compilat
+from registre import RegistreEsdeveniments, configurar_logging_asincron
+from estadistiques import Estadistiques
+from metriques import RegistreMetriques, collector_caches, instrumentar
+from perfilador import MiddlewarePerfilador, Perfilador
 
 class GuessRequest(BaseModel):
     paraula: str
@@ -23,6 +35,18 @@ class GuessResponse(BaseModel):
     total_paraules: int
     es_correcta: bool
 
+class GuessBatchRequest(BaseModel):
+    paraules: List[str]
+    rebuscada: Optional[str] = None  # Paraula del dia opcional
+
+class GuessBatchItem(BaseModel):
+    paraula: str  # Tal com s'ha enviat
+    resultat: Optional[GuessResponse] = None  # El mateix que retornaria /guess
+    error: Optional[str] = None  # El 'detail' del 400 que retornaria /guess
+
+class GuessBatchResponse(BaseModel):
+    resultats: List[GuessBatchItem]
+
 class ExplicacioNoValida(BaseModel):
     raó: str
     suggeriments: Optional[List[str]] = None
@@ -47,24 +71,41 @@ class RankingItem(BaseModel):
     paraula: str
     posicio: int
 
+class PrecarregaRequest(BaseModel):
+    paraules: List[str]  # Reptes a carregar (p. ex. els enllaçats des de l'arxiu)
+
 class RankingListResponse(BaseModel):
     rebuscada: str
     total_paraules: int
     objectiu: str
     ranking: List[RankingItem]
 
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('game.log'),
-        logging.StreamHandler()
-    ]
+# Configurar logging (els handlers escriuen des d'un fil a part, fora del camí de les peticions)
+escoltador_logs = configurar_logging_asincron(
+    [logging.FileHandler('game.log'), logging.StreamHandler()],
+    '%(asctime)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
 load_dotenv()
+
+# Esdeveniments de joc (guess, pista, whynot, rendició) en JSON lines, escrits per lots en segon pla.
+# Amb WORKERS > 1 cal un fitxer per procés: el camí admet '{pid}' (p. ex. game-{pid}.jsonl)
+registre = RegistreEsdeveniments(
+    os.getenv("EVENTS_LOG_PATH", "game.jsonl").format(pid=os.getpid()),
+    mida_maxima=int(os.getenv("EVENTS_LOG_MAX_MB", "50")) * 1024 * 1024,
+    rotacio_segons=float(os.getenv("EVENTS_LOG_ROTATE_HOURS", "24")) * 3600,
+    copies=int(os.getenv("EVENTS_LOG_BACKUPS", "14")),
+)
+
+# Estadístiques per repte calculades a partir dels mateixos esdeveniments (sense llegir logs).
+# Amb WORKERS > 1 tots els processos comparteixen STATS_PATH (sense '{pid}'): cada desat hi suma
+# el que ha comptat el procés, amb un bloqueig de fitxer, i recull el que han sumat els altres
+estadistiques = Estadistiques(
+    os.getenv("STATS_PATH", "data/estadistiques.json"),
+    interval_desat=float(os.getenv("STATS_FLUSH_SECONDS", "60")),
+)
+registre.afegir_subscriptor(estadistiques.processar_lot)
 app = FastAPI()
 
 # Configurar CORS
@@ -76,24 +117,134 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Mètriques en format Prometheus a GET /metrics (peticions i latència per endpoint, caches, memòria...)
+metriques = RegistreMetriques()
+instrumentar(app, metriques)
+temps_carrega_ranking = metriques.histograma(
+    "rebuscada_ranking_load_seconds", "Càrrega d'un rànquing des de disc (inclou compilar-lo i l'índex de pistes)")
+temps_consulta_sqlite = metriques.histograma(
+    "rebuscada_sqlite_query_seconds", "Durada de les consultes SQLite de DiccionariFull", ("consulta",))
+temps_pista = metriques.histograma("rebuscada_hint_selection_seconds", "Selecció de la paraula de /pista")
+
+# Perfilador per mostreig (piles en format collapsed a data/perfils): una de cada N peticions als
+# endpoints indicats, o una finestra de temps activada des de /admin/perfil. Desactivat per defecte.
+perfilador = Perfilador(
+    os.getenv("PROFILER_DIR", "data/perfils"),
+    interval=float(os.getenv("PROFILER_INTERVAL_MS", "5")) / 1000,
+    cada_n=int(os.getenv("PROFILER_EVERY_N", "0")),
+    endpoints=[e.strip() for e in os.getenv("PROFILER_ENDPOINTS", "/pista,/whynot").split(",") if e.strip()],
+)
+app.add_middleware(MiddlewarePerfilador, perfilador=perfilador)
+
 # Carregar diccionari
-DICCIONARI_PATH = os.getenv("DICCIONARI_PATH", "data/diccionari.json")
+DICCIONARI_PATH = os.getenv("DICCIONARI_PATH", "data/diccionari.bin")
 DEFAULT_REBUSCADA = os.getenv("DEFAULT_REBUSCADA", "paraula")
+# Calendari de reptes (data -> paraula); DEFAULT_REBUSCADA s'usa pels dies que no hi són
+CALENDARI_PATH = os.getenv("CALENDARI_PATH", os.path.join("data", "calendari.json"))
+CALENDARI_TZ = os.getenv("CALENDARI_TZ", "Europe/Madrid")
+# Dies posteriors a avui que es precarreguen (rànquing + índexs) en segon pla
+CALENDARI_PRECARREGA_DIES = int(os.getenv("CALENDARI_PRECARREGA_DIES", "2"))
+CALENDARI_INTERVAL = float(os.getenv("CALENDARI_INTERVAL", "300"))
 DICCIONARI_FULL_DB = os.path.join("data", DiccionariFull.DB_FILE)
 
-dicc = Diccionari.load(DICCIONARI_PATH)
-dicc_full = DiccionariFull(DICCIONARI_FULL_DB) if os.path.exists(DICCIONARI_FULL_DB) else None
+# Model d'execució: les consultes en memòria es resolen directament al bucle d'esdeveniments;
+# la feina bloquejant (lectura i compilació de rànquings, SQLite) va a pools de fils acotats.
+# BLOCKING_WORKERS=0 ho executa tot en línia (comportament antic, útil per comparar latències).
+BLOCKING_WORKERS = int(os.getenv("BLOCKING_WORKERS", "4"))
+executor_io = ThreadPoolExecutor(max_workers=BLOCKING_WORKERS, thread_name_prefix="rebuscada-io") if BLOCKING_WORKERS > 0 else None
+# DiccionariFull obre una connexió SQLite de només lectura per fil: /whynot escala amb SQLITE_WORKERS
+SQLITE_WORKERS = int(os.getenv("SQLITE_WORKERS", "4"))
+executor_sqlite = ThreadPoolExecutor(max_workers=max(1, SQLITE_WORKERS), thread_name_prefix="rebuscada-sqlite") if BLOCKING_WORKERS > 0 else None
+
+async def executar_bloquejant(executor: Optional[ThreadPoolExecutor], fn, *args, **kwargs):
+    """Executa 'fn' al pool indicat sense bloquejar el bucle d'esdeveniments (o en línia si no n'hi ha)."""
+    if executor is None:
+        return fn(*args, **kwargs)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+
+def _obrir_diccionari_full() -> Optional[DiccionariFull]:
+    if not os.path.exists(DICCIONARI_FULL_DB):
+        return None
+    return DiccionariFull(
+        DICCIONARI_FULL_DB,
+        mida_cache_mb=int(os.getenv("SQLITE_CACHE_MB", "16")),
+        mmap_mb=int(os.getenv("SQLITE_MMAP_MB", "256")),
+        mida_cache_formes=int(os.getenv("DICCIONARI_FULL_CACHE_SIZE", "4096")),
+    )
+
+# Taules del diccionari compilades a data/diccionari.bin i obertes amb mmap: amb diversos
+# workers totes comparteixen les mateixes pàgines en lloc de tenir cada una el seu dict
+dicc = DiccionariCompartit.obrir_o_compilar(DICCIONARI_PATH)
+dicc_full = _obrir_diccionari_full()
+if dicc_full is not None:
+    dicc_full.observador_consultes = lambda consulta, segons: temps_consulta_sqlite.observe(segons, consulta=consulta)
+    # L'índex de paraules properes de /whynot es prepara en arrencar (obert de disc, o construït i
+    # desat per un sol worker) perquè no el pagui la primera petició
+    dicc_full.index_propers()
 
-# Carregar llista d'exclusions
+calendari = Calendari(CALENDARI_PATH, zona=CALENDARI_TZ, paraula_per_defecte=DEFAULT_REBUSCADA)
+
+def paraula_del_dia() -> str:
+    """Paraula del dia segons el calendari (canvia a la mitjanit local sense reiniciar)"""
+    return calendari.paraula_avui()
+
+# Carregar llista d'exclusions (es torna a llegir en segon pla si el fitxer canvia)
 EXCLUSIONS_PATH = os.path.join("data", "exclusions.json")
 exclusions_set = set()
-if os.path.exists(EXCLUSIONS_PATH):
-    with open(EXCLUSIONS_PATH, "r", encoding="utf-8") as f:
-        exclusions_data = json.load(f)
-        exclusions_set = set(Diccionari.normalitzar_paraula(l) for l in exclusions_data.get("lemmas", []))
+exclusions_mtime = None
 
-# Cache per emmagatzemar fins a 10 rànquings carregats (evita recarregar constantment)
-CACHE_MAX_SIZE = int(os.getenv("RANKING_CACHE_SIZE", "10"))
+def recarregar_exclusions_si_cal() -> bool:
+    """Rellegeix data/exclusions.json si ha canviat des de l'última lectura. Retorna si s'ha recarregat."""
+    global exclusions_set, exclusions_mtime
+    mtime = os.path.getmtime(EXCLUSIONS_PATH) if os.path.exists(EXCLUSIONS_PATH) else None
+    if mtime == exclusions_mtime:
+        return False
+    noves = set()
+    if mtime is not None:
+        with open(EXCLUSIONS_PATH, "r", encoding="utf-8") as f:
+            exclusions_data = json.load(f)
+            noves = set(Diccionari.normalitzar_paraula(l) for l in exclusions_data.get("lemmas", []))
+    exclusions_set, exclusions_mtime = noves, mtime
+    return True
+
+recarregar_exclusions_si_cal()
+
+# Respostes ja serialitzades de /guess (per repte, versió del rànquing i paraula) i de /ranking (per ETag)
+cache_respostes_guess = CacheLRU(int(os.getenv("GUESS_RESPONSE_CACHE_SIZE", "50000")))
+cache_respostes_ranking = CacheLRU(int(os.getenv("RANKING_RESPONSE_CACHE_SIZE", "64")))
+
+# Explicacions de /whynot per (repte, versió del rànquing, paraula), amb caducitat
+cache_whynot = CacheTTL(int(os.getenv("WHYNOT_CACHE_SIZE", "10000")), float(os.getenv("WHYNOT_CACHE_TTL", "3600")))
+
+# Rànquings compilats (vocabulari compartit + un array de posicions per paraula, oberts amb mmap)
+WORDS_DIR = Path("data/words")
+COMPILAT_DIR = WORDS_DIR / "bin"
+vocabulari = Vocabulari(COMPILAT_DIR / Vocabulari.FITXER)
+
+# Cache de rànquings carregats (mmap del rànquing + índex de pistes), fitada per entrades i per
+# MB; els reptes d'avui i de demà hi queden fixats (vegeu precarregar_calendari)
+CACHE_MAX_SIZE = int(os.getenv("RANKING_CACHE_SIZE", "100"))
+CACHE_MAX_MB = float(os.getenv("RANKING_CACHE_MB", "256"))
+cache_rankings = CacheRankings(CACHE_MAX_SIZE, int(CACHE_MAX_MB * 1024 * 1024))
+metriques.indicador("rebuscada_rankings_loaded", "Rànquings (reptes) carregats a memòria", lambda: len(cache_rankings))
+metriques.afegir_collector(collector_caches({
+    "rankings": cache_rankings,
+    "whynot": cache_whynot,
+    "respostes_guess": cache_respostes_guess,
+    "respostes_ranking": cache_respostes_ranking,
+    "diccionari_full": dicc_full.cache_formes if dicc_full is not None else None,
+}))
+metriques.indicador("rebuscada_events_dropped", "Esdeveniments de joc descartats per cua plena", lambda: registre.descartats)
+recarregues_ranking = metriques.comptador(
+    "rebuscada_ranking_reloads_total", "Rànquings recarregats en segon pla perquè el JSON ha canviat", ("resultat",))
+
+# Versió (mtime, mida) del JSON de cada rànquing de la cache en el moment de carregar-lo. Les
+# edicions de server_admin.py es detecten comparant-la periòdicament amb el fitxer. S'escriu des
+# dels fils dels executors i es llegeix des del bucle de recàrrega: sempre amb lock_versions.
+versions_rankings: Dict[str, Tuple[int, int]] = {}
+lock_versions = threading.Lock()
+RANKING_RELOAD_INTERVAL = float(os.getenv("RANKING_RELOAD_INTERVAL", "5"))
 
 def is_catalan(word: str) -> bool:
     """Retorna false si hi ha un caràcter no alfabètic (català, accepta accents, ç, dièresis, punt volat i guionet)
@@ -104,97 +255,248 @@ def is_catalan(word: str) -> bool:
         return False
     return all(c.isalpha() or c in "àèéíïòóúüç·-" for c in word)
 
-@lru_cache(maxsize=CACHE_MAX_SIZE)
 def carregar_ranking(rebuscada: str):
-    """Carrega el rànquing per una paraula específica"""
+    """Carrega el rànquing per una paraula específica (bloquejant si no és a la cache)"""
+    # Qui crida normalment ja ha comptat la fallada (obtenir_ranking_actiu): 'in' no toca els
+    # comptadors, i obtenir només es fa si hi és (p. ex. carregat per una altra via mentrestant)
+    carregat = cache_rankings.obtenir(rebuscada) if rebuscada in cache_rankings else None
+    if carregat is None:
+        # La versió es llegeix abans de carregar: si el fitxer canvia mentre es llegeix, la
+        # comprovació següent el tornarà a carregar
+        versio = _versio_json(rebuscada)
+        with temps_carrega_ranking.cronometrar():
+            carregat = _carregar_ranking_disc(rebuscada)
+        with lock_versions:
+            versions_rankings[rebuscada] = versio
+        cache_rankings.desar(rebuscada, carregat)
+    return carregat
+
+def _versio_json(rebuscada: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = (WORDS_DIR / f"{rebuscada}.json").stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+def rankings_modificats() -> List[str]:
+    """Rànquings de la cache el JSON dels quals ha canviat des que es van carregar"""
+    carregats = cache_rankings.claus()
+    with lock_versions:
+        for paraula in set(versions_rankings) - set(carregats):
+            versions_rankings.pop(paraula, None)  # expulsats de la cache
+        versions = dict(versions_rankings)
+    modificats = []
+    for paraula in carregats:
+        versio = _versio_json(paraula)
+        # Si el fitxer s'ha esborrat es continua servint la versió carregada
+        if versio is not None and versio != versions.get(paraula):
+            modificats.append(paraula)
+    return modificats
+
+def recarregar_ranking(rebuscada: str) -> None:
+    """
+    Torna a carregar un rànquing modificat i el substitueix a la cache d'una sola vegada. Mentre
+    es carrega, les peticions continuen amb la versió anterior (els seus mmap segueixen vàlids:
+    el compilat nou substitueix l'antic amb os.replace).
+    """
+    versio = _versio_json(rebuscada)
+    try:
+        with temps_carrega_ranking.cronometrar():
+            carregat = _carregar_ranking_disc(rebuscada)
+    except Exception:
+        # Es marca la versió igualment per no reintentar-ho a cada volta; la propera edició ho tornarà a provar
+        with lock_versions:
+            versions_rankings[rebuscada] = versio
+        recarregues_ranking.inc(resultat="error")
+        raise
+    with lock_versions:
+        versions_rankings[rebuscada] = versio
+    cache_rankings.desar(rebuscada, carregat)
+    recarregues_ranking.inc(resultat="ok")
+
+def _carregar_ranking_disc(rebuscada: str):
+    """Llegeix (i si cal compila) el rànquing d'una paraula i en construeix els índexs"""
 
     # Comprova caràcters vàlids
     if not is_catalan(rebuscada):
         raise Exception(f"La paraula '{rebuscada}' conté caràcters no vàlids.")
 
-    words_dir = Path("data/words")
-    fitxer_paraula = words_dir / f"{rebuscada}.json"
+    fitxer_paraula = WORDS_DIR / f"{rebuscada}.json"
     
     if not fitxer_paraula.exists():
         raise Exception(f"No s'ha trobat el fitxer de rànquing per la paraula '{rebuscada}'")
     
     try:
-        with open(fitxer_paraula, "r", encoding="utf-8") as f:
-            ranking_diccionari = json.load(f)
+        # Obre la versió compilada (la genera si no existeix o el JSON és més nou)
+        ranking = carregar_ranking_compilat(fitxer_paraula, COMPILAT_DIR, vocabulari)
         
         # Si el rànquing està buit
-        if not ranking_diccionari:
+        if not ranking.total:
             raise Exception(f"El fitxer de rànquing per la paraula '{rebuscada}' està buit.")
         
-        total_paraules_ranking = len(ranking_diccionari)
-        paraula_objectiu = min(ranking_diccionari, key=lambda k: ranking_diccionari[k])
+        # Índex de pistes (freqüència de lema en ordre de rànquing), desat al costat del rànquing
+        # perquè els altres workers l'obrin en lloc de reconstruir-lo
+        path_pistes = COMPILAT_DIR / f"{rebuscada}{IndexPistes.EXTENSIO}"
+        ranking.construir_index_pistes(dicc.freq_lema, path_pistes, dicc.empremta)
         
-        return ranking_diccionari, total_paraules_ranking, paraula_objectiu
+        return ranking, ranking.total, ranking.objectiu
         
     except Exception as e:
         raise Exception(f"Error carregant el fitxer de rànquing: {str(e)}")
 
-def obtenir_ranking_actiu(rebuscada_request: Optional[str] = None):
+async def obtenir_ranking_actiu(rebuscada_request: Optional[str] = None):
     """Obté el rànquing actiu, sigui el global o el especificat"""
-    rebuscada = rebuscada_request.lower() if rebuscada_request else DEFAULT_REBUSCADA
+    rebuscada = rebuscada_request.lower() if rebuscada_request else paraula_del_dia()
     try:
-        return carregar_ranking(rebuscada)
+        # Encert de cache: consulta en memòria, es resol en línia
+        carregat = cache_rankings.obtenir(rebuscada)
+        if carregat is not None:
+            return carregat
+        # Fallada: la lectura del fitxer i la construcció d'índexs van al pool de fils. Amb shield,
+        # si el client es desconnecta la càrrega continua per a la resta de peticions que l'esperen
+        return await asyncio.shield(carregar_ranking_async(rebuscada))
     except Exception as e:
         logger.error(f"Error carregant el rànquing per la paraula '{rebuscada}': {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/guess", response_model=GuessResponse)
-async def guess(request: GuessRequest):
-    # Obtenir rànquing actiu (global o especificat)
-    ranking_diccionari, total_paraules, paraula_objectiu = obtenir_ranking_actiu(request.rebuscada)
-    
-    paraula_introduida = Diccionari.normalitzar_paraula(request.paraula)
+# Càrregues de rànquings en curs per repte: les peticions simultànies d'un repte que no és a la
+# cache esperen la mateixa càrrega en lloc de llegir i compilar el fitxer cadascuna
+carregues_en_curs: Dict[str, "asyncio.Task"] = {}
+
+def carregar_ranking_async(rebuscada: str, recarregar: bool = False) -> "asyncio.Task":
+    """
+    Tasca que carrega (o amb 'recarregar', torna a carregar) el rànquing al pool de fils. Si ja
+    n'hi ha una en curs pel mateix repte, sigui càrrega o recàrrega, retorna aquella.
+    """
+    tasca = carregues_en_curs.get(rebuscada)
+    if tasca is None:
+        funcio = recarregar_ranking if recarregar else carregar_ranking
+        tasca = asyncio.ensure_future(executar_bloquejant(executor_io, funcio, rebuscada))
+        carregues_en_curs[rebuscada] = tasca
+
+        def acabada(t):
+            if carregues_en_curs.get(rebuscada) is t:
+                del carregues_en_curs[rebuscada]
+        tasca.add_done_callback(acabada)
+    return tasca
+
+# Màxim de reptes per petició a /precarrega
+PREFETCH_MAX = int(os.getenv("PREFETCH_MAX", "20"))
+
+def precarregar_rankings(paraules: List[str]) -> Dict[str, List[str]]:
+    """
+    Comença a carregar en segon pla els rànquings que no són a memòria i torna de seguida.
+    Els reptes carregats així entren a la cache com qualsevol altre (sense desplaçar els freqüents).
+
+    La resposta no distingeix els reptes que ja són a memòria dels que s'acaben de demanar: els
+    d'avui i demà hi són sempre (fixats, vegeu precarregar_calendari) i ho delatarien.
+    """
+    resultat = {"en_curs": [], "no_trobats": []}
+    for paraula in dict.fromkeys(p.strip().lower() for p in paraules):
+        if not is_catalan(paraula) or not (WORDS_DIR / f"{paraula}.json").exists():
+            resultat["no_trobats"].append(paraula)
+            continue
+        if paraula not in cache_rankings and paraula not in carregues_en_curs:
+            carregar_ranking_async(paraula).add_done_callback(
+                functools.partial(_registrar_precarrega, paraula))
+        resultat["en_curs"].append(paraula)
+    return resultat
+
+def _registrar_precarrega(paraula: str, tasca: "asyncio.Task") -> None:
+    if tasca.cancelled():
+        return
+    if tasca.exception() is not None:
+        logger.error(f"PRECARREGA: no s'ha pogut carregar '{paraula}': {str(tasca.exception())}")
+
+# Màxim de paraules per petició a /guess-batch
+GUESS_BATCH_MAX = int(os.getenv("GUESS_BATCH_MAX", "500"))
+
+def avaluar_intent(paraula_introduida: str, ranking_diccionari, total_paraules: int,
+                   paraula_objectiu: str) -> Tuple[Optional[GuessResponse], Optional[str], Dict]:
+    """
+    Avalua un intent (ja normalitzat) contra un rànquing.
+    Retorna (resposta, error, esdeveniment): 'error' és el missatge del 400 de /guess quan no és
+    vàlid i 'esdeveniment' els camps pel registre de joc.
+    """
+    esdeveniment = {"paraula": paraula_introduida, "forma_canonica": None, "posicio": None, "objectiu": paraula_objectiu}
     forma_canonica, es_flexio = dicc.obtenir_forma_canonica(paraula_introduida)
     if forma_canonica is None:
         # Millora: si la paraula no és al diccionari però sí apareix literalment al rànquing, accepta-la.
         rank_directe = ranking_diccionari.get(paraula_introduida)
         if rank_directe is not None:
             es_correcta_directe = paraula_introduida == paraula_objectiu
-            logger.info(
-                f"GUESS: '{paraula_introduida}' (fora diccionari però trobat al rànquing) -> "
-                f"{'CORRECTA!' if es_correcta_directe else f'#'+str(rank_directe)} (objectiu: {paraula_objectiu})"
-            )
+            esdeveniment.update(posicio=rank_directe, estat="correcta" if es_correcta_directe else "fora_diccionari")
             return GuessResponse(
                 paraula=paraula_introduida,
                 forma_canonica=None,
                 posicio=rank_directe,
                 total_paraules=total_paraules,
                 es_correcta=es_correcta_directe
-            )
+            ), None, esdeveniment
         # Si no, rebutja la paraula
-        msg = "Disculpa, aquesta paraula no és vàlida."
-        logger.info(f"GUESS: '{paraula_introduida}' -> INVÀLIDA (objectiu: {paraula_objectiu}) | reason={msg}")
-        raise HTTPException(status_code=400, detail=msg)
+        esdeveniment["estat"] = "invalida"
+        return None, "Disculpa, aquesta paraula no és vàlida.", esdeveniment
+    esdeveniment["forma_canonica"] = forma_canonica
     rank = ranking_diccionari.get(forma_canonica)
     if rank is None:
-        logger.info(f"GUESS: '{paraula_introduida}' ({forma_canonica}) -> NO TROBADA (objectiu: {paraula_objectiu})")
-        raise HTTPException(
-            status_code=400,
-            detail="Disculpa, aquesta paraula no es troba al nostre llistat."
-        )
+        esdeveniment["estat"] = "no_trobada"
+        return None, "Disculpa, aquesta paraula no es troba al nostre llistat.", esdeveniment
     es_correcta = forma_canonica == paraula_objectiu
-    
-    # Log de l'intent
-    status = "CORRECTA!" if es_correcta else f"#{rank}"
-    logger.info(f"GUESS: '{paraula_introduida}'{' ('+ forma_canonica + ')' if es_flexio else ''} -> {status} (objectiu: {paraula_objectiu})")
-    
+    esdeveniment.update(posicio=rank, estat="correcta" if es_correcta else "trobada")
     return GuessResponse(
         paraula=paraula_introduida,
         forma_canonica=forma_canonica if es_flexio else None,
         posicio=rank,
         total_paraules=total_paraules,
         es_correcta=es_correcta
-    )
+    ), None, esdeveniment
+
+@app.post("/guess", response_model=GuessResponse)
+async def guess(request: GuessRequest):
+    # Obtenir rànquing actiu (global o especificat)
+    ranking_diccionari, total_paraules, paraula_objectiu = await obtenir_ranking_actiu(request.rebuscada)
+    
+    paraula_introduida = Diccionari.normalitzar_paraula(request.paraula)
+    # Dins un repte la resposta a una paraula no canvia mai: es desa ja serialitzada i els encerts
+    # s'envien tal qual, sense construir ni validar models
+    clau = (paraula_objectiu, getattr(ranking_diccionari, "versio", ""), paraula_introduida)
+    desat = cache_respostes_guess.obtenir(clau)
+    if desat is None:
+        resposta, error, esdeveniment = avaluar_intent(paraula_introduida, ranking_diccionari, total_paraules, paraula_objectiu)
+        if error is not None:
+            desat = (400, json_bytes({"detail": error}), esdeveniment)
+        else:
+            desat = (200, json_bytes(resposta.model_dump()), esdeveniment)
+        cache_respostes_guess.desar(clau, desat)
+    estat, contingut, esdeveniment = desat
+    
+    # Registre de l'intent
+    registre.registrar("guess", endpoint="/guess", **esdeveniment)
+    return Response(content=contingut, status_code=estat, media_type=MEDIA_TYPE)
+
+@app.post("/guess-batch", response_model=GuessBatchResponse)
+async def guess_batch(request: GuessBatchRequest):
+    """Avalua diversos intents contra un mateix rànquing (p. ex. en restaurar una partida)."""
+    if len(request.paraules) > GUESS_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"Massa paraules en una sola petició (màxim {GUESS_BATCH_MAX}).")
+    ranking_diccionari, total_paraules, paraula_objectiu = await obtenir_ranking_actiu(request.rebuscada)
+    
+    resultats = []
+    avaluats: Dict[str, Tuple[Optional[GuessResponse], Optional[str], Dict]] = {}
+    for paraula in request.paraules:
+        paraula_introduida = Diccionari.normalitzar_paraula(paraula)
+        # Les paraules repetides (o que normalitzen igual) s'avaluen i es registren un sol cop
+        if paraula_introduida not in avaluats:
+            avaluats[paraula_introduida] = avaluar_intent(paraula_introduida, ranking_diccionari, total_paraules, paraula_objectiu)
+            registre.registrar("guess", endpoint="/guess-batch", **avaluats[paraula_introduida][2])
+        resposta, error, _ = avaluats[paraula_introduida]
+        resultats.append(GuessBatchItem(paraula=paraula, resultat=resposta, error=error))
+    return GuessBatchResponse(resultats=resultats)
 
 @app.post("/pista", response_model=PistaResponse)
 async def donar_pista(request: PistaRequest):
     # Obtenir rànquing actiu (global o especificat)
-    ranking_diccionari, total_paraules, paraula_objectiu = obtenir_ranking_actiu(request.rebuscada)
+    ranking_diccionari, total_paraules, paraula_objectiu = await obtenir_ranking_actiu(request.rebuscada)
     intents_actuals = request.intents
     
     # Obtenir les formes canòniques de les paraules provades
@@ -209,9 +511,6 @@ async def donar_pista(request: PistaRequest):
     # Obtenir la millor posició actual
     millor_ranking = min([intent['posicio'] for intent in intents_actuals]) if intents_actuals else total_paraules
     
-    # Crear llista ordenada per posició (rànquing invers)
-    ranking_invers = sorted(ranking_diccionari.keys(), key=lambda k: ranking_diccionari[k])
-    
     # Determinar el rang de posicions per la pista
     if not intents_actuals or millor_ranking >= 1000:
         # Primera pista o molt lluny: començar a prop de la posició 500
@@ -252,33 +551,35 @@ async def donar_pista(request: PistaRequest):
         fi_rang = max(target_pos + variacio, millor_ranking - 1)
     
     # Buscar una paraula adequada (prioritza freqüència de lema dins del rang)
+    inici_seleccio = time.perf_counter()
     paraula_pista = None
     try:
-        subllista = ranking_invers[inici_rang:fi_rang + 1] if fi_rang >= inici_rang else []
-        candidats = [w for w in subllista if w not in formes_canoniques_provades and w != paraula_objectiu]
-        if candidats:
-            # Tria el candidat amb més freqüència al diccionari; si empata, el de millor rànquing (valor més petit), i després ordre alfabètic
-            paraula_pista = max(
-                candidats,
-                key=lambda w: (dicc.freq_lema(w), -ranking_diccionari.get(w, total_paraules), w)
-            )
+        # Tria el candidat no provat amb més freqüència al diccionari; si empata, el de millor rànquing
+        # (valor més petit), i després ordre alfabètic. L'índex de pistes ho resol en O(log n) per rang.
+        paraula_pista = ranking_diccionari.index_pistes.millor_candidat(
+            inici_rang, fi_rang, formes_canoniques_provades
+        )
     except Exception:
         paraula_pista = None
     
     # Si no trobem cap paraula adequada, buscar qualsevol paraula no provada
     if paraula_pista is None:
-        for paraula_candidata in ranking_invers:
+        for paraula_candidata in ranking_diccionari.iter_ordenades():
             if (paraula_candidata not in formes_canoniques_provades and 
                 paraula_candidata != paraula_objectiu):
                 paraula_pista = paraula_candidata
                 break
+    temps_pista.observe(time.perf_counter() - inici_seleccio)
     
     if paraula_pista is None:
         logger.warning(f"PISTA: No s'ha trobat cap pista adequada (objectiu: {paraula_objectiu}, millor: #{millor_ranking})")
+        registre.registrar("pista", endpoint="/pista", paraula=None, posicio=None, objectiu=paraula_objectiu,
+                           millor=millor_ranking, intents=len(intents_actuals))
         raise HTTPException(status_code=404, detail="No s'ha pogut trobar una pista adequada.")
     
-    # Log de la pista donada
-    logger.info(f"PISTA: '{paraula_pista}' -> #{ranking_diccionari[paraula_pista]} (objectiu: {paraula_objectiu}, millor: #{millor_ranking})")
+    # Registre de la pista donada
+    registre.registrar("pista", endpoint="/pista", paraula=paraula_pista, posicio=ranking_diccionari[paraula_pista],
+                       objectiu=paraula_objectiu, millor=millor_ranking, intents=len(intents_actuals))
     
     return PistaResponse(
         paraula=paraula_pista,
@@ -290,40 +591,57 @@ async def donar_pista(request: PistaRequest):
 @app.post("/whynot", response_model=ExplicacioNoValida)
 async def whynot(request: GuessRequest):
     """Endpoint per explicar per què una paraula no és vàlida"""
-    ranking_diccionari, total_paraules, paraula_objectiu = obtenir_ranking_actiu(request.rebuscada)
+    ranking_diccionari, total_paraules, paraula_objectiu = await obtenir_ranking_actiu(request.rebuscada)
     paraula_introduida = Diccionari.normalitzar_paraula(request.paraula)
+    # Dins un repte l'explicació només depèn de la paraula: les paraules (i errors) populars es
+    # responen sense tornar a consultar SQLite ni RapidFuzz. La versió del rànquing forma part de
+    # la clau i la cache es buida quan canvien les exclusions.
+    clau = (paraula_objectiu, getattr(ranking_diccionari, "versio", ""), paraula_introduida,
+            any(ch.isspace() for ch in request.paraula))
+    desat = cache_whynot.obtenir(clau)
+    if desat is None:
+        desat = await _explicar_no_valida(request.paraula, paraula_introduida, ranking_diccionari)
+        cache_whynot.desar(clau, desat)
+    resposta, motiu = desat
+    registre.registrar("whynot", endpoint="/whynot", paraula=paraula_introduida, objectiu=paraula_objectiu,
+                       motiu=motiu, suggeriments=len(resposta.suggeriments or ()))
+    return resposta
+
+async def _explicar_no_valida(paraula_original: str, paraula_introduida: str,
+                              ranking_diccionari) -> Tuple[ExplicacioNoValida, str]:
+    """Calcula l'explicació de /whynot i el motiu pel registre (HTTPException si la paraula és vàlida)"""
     # Cas específic: espais no permesos (només una paraula simple)
-    if any(ch.isspace() for ch in request.paraula):
+    if any(ch.isspace() for ch in paraula_original):
         suggeriments = None
         try:
             if dicc_full is not None:
                 # Prova sense espais per suggerir alternatives
                 sense_espais = "".join(paraula_introduida.split())
                 if sense_espais:
-                    near_result = dicc_full.near(sense_espais, limit=6, min_score=60)
+                    near_result = await executar_bloquejant(
+                        executor_sqlite, dicc_full.near, sense_espais, limit=6, min_score=60
+                    )
                     if near_result and near_result.get('candidates'):
                         suggeriments = [c['word'] for c in near_result['candidates']]
         except Exception:
             suggeriments = None
 
-        logger.info(f"WHYNOT: '{request.paraula}' -> conté espais")
         return ExplicacioNoValida(
             raó=(
                 "Sembla que has introduït un espai. Només s'accepten paraules simples (sense espais)."
             ),
             suggeriments=suggeriments
-        )
+        ), "espais"
 
     # Validació de caràcters catalans permesos
     if not is_catalan(paraula_introduida):
-        logger.info(f"WHYNOT: '{paraula_introduida}' -> caràcters no permesos")
         return ExplicacioNoValida(
             raó=(
                 "Aquesta paraula conté caràcters no permesos. Només s'accepten lletres catalanes amb accents, "
                 "dièresi, la ce trencada (ç), el punt volat (l·l) i el guionet (-)."
             ),
             suggeriments=None
-        )
+        ), "caracters"
     forma_canonica, es_flexio = dicc.obtenir_forma_canonica(paraula_introduida)
     rank_directe = ranking_diccionari.get(paraula_introduida)
 
@@ -343,7 +661,7 @@ async def whynot(request: GuessRequest):
         )
 
     # Obtenir informació de la paraula del diccionari complet
-    info = dicc_full.info(paraula_introduida)
+    info = await executar_bloquejant(executor_sqlite, dicc_full.info, paraula_introduida)
 
     explicacio = "Aquesta paraula simplement no és vàlida."
     suggeriments = None
@@ -352,7 +670,9 @@ async def whynot(request: GuessRequest):
     if not info['known_form']:
         explicacio = "Aquesta paraula probablement no està ben escrita."
         # Recomanar paraules similars amb la funció near
-        near_result = dicc_full.near(paraula_introduida, limit=6, min_score=60)
+        near_result = await executar_bloquejant(
+            executor_sqlite, dicc_full.near, paraula_introduida, limit=6, min_score=60
+        )
         if near_result['candidates']:
             suggeriments = [c['word'] for c in near_result['candidates']]
     
@@ -400,32 +720,190 @@ async def whynot(request: GuessRequest):
             elif forma_canonica is None and rank_directe is None:
                 explicacio = "Aquesta paraula és massa poc comuna i s'ha exclòs del joc, per facilitar la jugabilitat."
 
-    logger.info(f"WHYNOT: '{paraula_introduida}' -> {explicacio[:50]}...")
-    
     return ExplicacioNoValida(
         raó=explicacio,
         suggeriments=suggeriments
-    )
+    ), explicacio
 
 
+async def precarregar_calendari():
+    """Recarrega el calendari si ha canviat i deixa a memòria els rànquings d'avui i dels propers dies"""
+    try:
+        await executar_bloquejant(executor_io, calendari.recarregar_si_cal)
+    except Exception as e:
+        logger.error(f"CALENDARI: error llegint {CALENDARI_PATH}: {str(e)}")
+    try:
+        if await executar_bloquejant(executor_io, recarregar_exclusions_si_cal):
+            cache_whynot.buidar()
+            logger.info(f"EXCLUSIONS: recarregades ({len(exclusions_set)} lemes)")
+    except Exception as e:
+        logger.error(f"EXCLUSIONS: error llegint {EXCLUSIONS_PATH}: {str(e)}")
+    # Avui i demà no s'expulsen per molt trànsit que hi hagi de reptes antics
+    cache_rankings.fixar(calendari.propers(1))
+    for paraula in calendari.propers(CALENDARI_PRECARREGA_DIES):
+        if paraula in cache_rankings:
+            continue
+        try:
+            await carregar_ranking_async(paraula)
+            logger.info(f"CALENDARI: precarregat '{paraula}'")
+        except Exception as e:
+            logger.error(f"CALENDARI: no s'ha pogut precarregar '{paraula}': {str(e)}")
+
+async def bucle_calendari():
+    """Tasca de fons: precarrega periòdicament i just després de cada canvi de dia"""
+    while True:
+        await precarregar_calendari()
+        await asyncio.sleep(min(CALENDARI_INTERVAL, calendari.segons_fins_canvi() + 1))
+
+async def bucle_rankings():
+    """Tasca de fons: recarrega els rànquings de la cache que s'han editat (p. ex. des de server_admin.py)"""
+    while True:
+        await asyncio.sleep(RANKING_RELOAD_INTERVAL)
+        try:
+            modificats = await executar_bloquejant(executor_io, rankings_modificats)
+        except Exception as e:
+            logger.error(f"RANKING: error comprovant versions: {str(e)}")
+            continue
+        for paraula in modificats:
+            try:
+                # Si ja s'està carregant, s'espera aquella càrrega; si llegia una versió anterior
+                # del fitxer, la comprovació següent ho detecta
+                await carregar_ranking_async(paraula, recarregar=True)
+                logger.info(f"RANKING: recarregat '{paraula}' (el fitxer ha canviat)")
+            except Exception as e:
+                logger.error(f"RANKING: no s'ha pogut recarregar '{paraula}', es manté la versió anterior: {str(e)}")
+
+@app.on_event("startup")
+async def iniciar_calendari():
+    app.state.tasca_calendari = asyncio.create_task(bucle_calendari())
+    if RANKING_RELOAD_INTERVAL > 0:
+        app.state.tasca_rankings = asyncio.create_task(bucle_rankings())
+
+@app.on_event("shutdown")
+def tancar_executors():
+    for nom in ("tasca_calendari", "tasca_rankings"):
+        tasca = getattr(app.state, nom, None)
+        if tasca is not None:
+            tasca.cancel()
+    for executor in (executor_io, executor_sqlite):
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+    if dicc_full is not None:
+        dicc_full.close()
+    # Buida els esdeveniments i logs pendents abans de sortir
+    registre.tancar()
+    estadistiques.desar()
+    perfilador.tancar()
+    escoltador_logs.stop()
+
 @app.get("/")
 async def root():
     return {"message": "API del joc de paraules (refactoritzat)"}
 
+@app.get("/estadistiques")
+async def obtenir_estadistiques(request: Request, rebuscada: str, top: int = Query(20, ge=1, le=50)):
+    """Estadístiques agregades d'un repte ja jugat"""
+    rebuscada = rebuscada.strip().lower()
+    # Les del repte d'avui o d'un de futur delatarien la resposta (n'hi ha prou de comparar-les
+    # amb les d'una paraula qualsevol): només amb x-admin-token
+    if rebuscada in calendari.no_publicades() and not es_admin(request):
+        raise HTTPException(status_code=403, detail="Les estadístiques d'aquest repte encara no són públiques")
+    return {"rebuscada": rebuscada, **estadistiques.partida(rebuscada, top)}
+
+@app.get("/estadistiques/cache")
+async def obtenir_estadistiques_cache():
+    """Mida i taxa d'encerts de les caches del servidor"""
+    return {
+        "whynot": cache_whynot.estadistiques(),
+        "respostes_guess": cache_respostes_guess.estadistiques(),
+        "respostes_ranking": cache_respostes_ranking.estadistiques(),
+        "rankings": cache_rankings.estadistiques(),
+        "diccionari_full": dicc_full.cache_formes.estadistiques() if dicc_full is not None else None,
+    }
+
+ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "")
+
+def es_admin(request: Request) -> bool:
+    return bool(ADMIN_PASSWORD) and request.headers.get("x-admin-token") == ADMIN_PASSWORD
+
+def require_admin(request: Request):
+    """Els endpoints d'administració del servidor de joc necessiten ADMIN_PASSWORD (a x-admin-token)"""
+    if not ADMIN_PASSWORD:
+        raise HTTPException(status_code=403, detail="Administració desactivada (cal ADMIN_PASSWORD)")
+    if not es_admin(request):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+@app.get("/admin/perfil")
+async def estat_perfil(request: Request):
+    """Estat del perfilador d'aquest procés"""
+    require_admin(request)
+    return perfilador.estat()
+
+@app.post("/admin/perfil/finestra")
+async def perfil_finestra(request: Request, segons: float = Query(30, gt=0, le=600)):
+    """Mostreja tot el procés durant 'segons'; el resultat s'escriu en acabar"""
+    require_admin(request)
+    try:
+        path = perfilador.finestra(segons)
+    except Exception as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"fitxer": str(path), "segons": segons}
+
+@app.post("/admin/perfil/mostreig")
+async def perfil_mostreig(request: Request, cada_n: int = Query(..., ge=0)):
+    """Mostreja una de cada 'cada_n' peticions als endpoints del perfilador (0 desactiva)"""
+    require_admin(request)
+    perfilador.cada_n = cada_n
+    return perfilador.estat()
+
+# Cache HTTP (navegadors i proxies) de /ranking i /paraula-dia: segons màxims de validesa; les
+# respostes que depenen del dia caduquen com a molt a la mitjanit local
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "300"))
+
+def calcular_etag(*parts) -> str:
+    """ETag fort a partir de tot el que determina el contingut de la resposta"""
+    return '"' + hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:24] + '"'
+
+def capcaleres_cache(etag: str, segons: float) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": f"public, max-age={max(0, int(segons))}, must-revalidate"}
+
+def no_modificat(request: Request, etag: str) -> bool:
+    """Cert si l'If-None-Match de la petició ja inclou aquest ETag (el client té la resposta)"""
+    valor = request.headers.get("if-none-match")
+    if not valor:
+        return False
+    etiquetes = [e.strip() for e in valor.split(",")]
+    # Comparació feble (RFC 9110): W/"x" i "x" són equivalents per If-None-Match
+    return "*" in etiquetes or etag in (e[2:] if e.startswith("W/") else e for e in etiquetes)
+
 @app.get("/paraula-dia")
-async def get_rebuscada():
+async def get_rebuscada(request: Request, response: Response):
     """Retorna la paraula del dia actual"""
-    return {"paraula": DEFAULT_REBUSCADA}
+    avui = calendari.avui()
+    paraula = calendari.paraula(avui)
+    capcaleres = capcaleres_cache(calcular_etag(avui.isoformat(), paraula),
+                                  min(HTTP_CACHE_MAX_AGE, calendari.segons_fins_canvi()))
+    if no_modificat(request, capcaleres["ETag"]):
+        return Response(status_code=304, headers=capcaleres)
+    response.headers.update(capcaleres)
+    return {"paraula": paraula}
+
+@app.post("/precarrega")
+async def precarrega(request: PrecarregaRequest):
+    """Carrega en segon pla els rànquings dels reptes indicats abans que es demanin (no espera la càrrega)"""
+    if len(request.paraules) > PREFETCH_MAX:
+        raise HTTPException(status_code=400, detail=f"Com a màxim {PREFETCH_MAX} reptes per petició.")
+    return precarregar_rankings(request.paraules)
 
 @app.post("/rendirse", response_model=RendirseResponse)
 async def rendirse(request: RendirseRequest):
     """Endpoint per rendir-se i obtenir la resposta correcta"""
     try:
         # Obtenir rànquing actiu (global o especificat)
-        ranking_diccionari, total_paraules, paraula_objectiu = obtenir_ranking_actiu(request.rebuscada)
+        ranking_diccionari, total_paraules, paraula_objectiu = await obtenir_ranking_actiu(request.rebuscada)
         
-        # Log de rendició
-        logger.info(f"RENDICIÓ: Revelada paraula '{paraula_objectiu}'")
+        # Registre de rendició
+        registre.registrar("rendicio", endpoint="/rendirse", objectiu=paraula_objectiu)
         
         return RendirseResponse(paraula_correcta=paraula_objectiu)
     
@@ -437,7 +915,7 @@ async def rendirse(request: RendirseRequest):
         )
 
 @app.get("/ranking", response_model=RankingListResponse)
-async def obtenir_ranking(limit: int = Query(300, ge=1, le=2000), rebuscada: Optional[str] = None):
+async def obtenir_ranking(request: Request, limit: int = Query(300, ge=1, le=2000), rebuscada: Optional[str] = None):
     """Retorna les primeres 'limit' paraules del rànquing per la paraula del dia actual o l'especificada.
 
     Parameters
@@ -448,15 +926,29 @@ async def obtenir_ranking(limit: int = Query(300, ge=1, le=2000), rebuscada: Opt
         Paraula del dia per la qual es vol obtenir el rànquing (opcional)
     """
     try:
-        ranking_diccionari, total_paraules, paraula_objectiu = obtenir_ranking_actiu(rebuscada)
-        # Ordenar per posició (valor més petit = més proper)
-        ordenat = sorted(ranking_diccionari.items(), key=lambda kv: kv[1])[:limit]
-        return RankingListResponse(
-            rebuscada=rebuscada.lower() if rebuscada else DEFAULT_REBUSCADA,
-            total_paraules=total_paraules,
-            objectiu=paraula_objectiu,
-            ranking=[RankingItem(paraula=p, posicio=pos) for p, pos in ordenat]
+        ranking_diccionari, total_paraules, paraula_objectiu = await obtenir_ranking_actiu(rebuscada)
+        # El contingut només canvia si canvia el fitxer de rànquing (versió) o, sense 'rebuscada', el repte del dia
+        nom_repte = rebuscada.lower() if rebuscada else paraula_del_dia()
+        validesa = HTTP_CACHE_MAX_AGE if rebuscada else min(HTTP_CACHE_MAX_AGE, calendari.segons_fins_canvi())
+        capcaleres = capcaleres_cache(
+            calcular_etag(nom_repte, getattr(ranking_diccionari, "versio", ""), paraula_objectiu, total_paraules, limit),
+            validesa,
         )
+        if no_modificat(request, capcaleres["ETag"]):
+            return Response(status_code=304, headers=capcaleres)
+        # L'ETag ja identifica el contingut: serveix també de clau de la resposta serialitzada
+        contingut = cache_respostes_ranking.obtenir(capcaleres["ETag"])
+        if contingut is None:
+            # Primeres paraules per posició (valor més petit = més proper), ja ordenades al carregar
+            ordenat = ranking_diccionari.items_ordenats(0, limit)
+            contingut = json_bytes({
+                "rebuscada": nom_repte,
+                "total_paraules": total_paraules,
+                "objectiu": paraula_objectiu,
+                "ranking": [{"paraula": p, "posicio": pos} for p, pos in ordenat],
+            })
+            cache_respostes_ranking.desar(capcaleres["ETag"], contingut)
+        return Response(content=contingut, media_type=MEDIA_TYPE, headers=capcaleres)
     except HTTPException:
         raise
     except Exception as e:
@@ -465,4 +957,9 @@ async def obtenir_ranking(limit: int = Query(300, ge=1, le=2000), rebuscada: Opt
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    workers = int(os.getenv("WORKERS", "1"))
+    if workers > 1:
+        # Amb diversos processos uvicorn necessita importar l'aplicació per nom
+        uvicorn.run("server:app", host="0.0.0.0", port=port, workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=port)
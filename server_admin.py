@@ -1,4 +1,5 @@
 import os
+import threading
 from fastapi import FastAPI, HTTPException, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from typing import Dict
@@ -11,6 +12,7 @@ import re
 import json
 import re
 from fast_ai import fast_ai as run_fast_ai
+from metriques import RegistreMetriques, instrumentar
 from datetime import datetime
 import logging
 import sys
@@ -214,6 +216,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Mètriques en format Prometheus a GET /metrics (peticions i latència per endpoint, memòria del procés)
+metriques = RegistreMetriques()
+instrumentar(app, metriques)
+
 
 
 class AiGenerateRequest(BaseModel):
@@ -254,6 +260,14 @@ class WordCommentUpdate(BaseModel):
     word: str
     comment: str  # El text del comentari (buida per esborrar)
 
+def _save_ranking_file(file_path: Path, data: dict) -> None:
+    """Desa un rànquing de manera atòmica (fitxer temporal + os.replace): el servidor de joc el
+    recarrega en segon pla quan canvia i no ha de llegir mai un fitxer a mig escriure."""
+    tmp = file_path.with_name(f"{file_path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, file_path)
+
 def require_auth(request: Request):
     if not ADMIN_PASSWORD:
         return  # no password set -> open
@@ -402,8 +416,7 @@ async def save_ranking(filename: str, request: Request, _: None = Depends(requir
     for i, k in enumerate(keys):
         items[offset + i] = (k, offset + i)
     new_data = {k: i for i, (k, _) in enumerate(items)}
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(new_data, f, ensure_ascii=False, indent=2)
+    _save_ranking_file(file_path, new_data)
     return {"ok": True}
 
 
@@ -426,8 +439,7 @@ def move_word(filename: str, move: MoveRequest, _: None = Depends(require_auth))
     items.insert(move.to_pos, (word, move.to_pos))
     # Reassign positions
     new_data = {w: i for i, (w, _) in enumerate(items)}
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(new_data, f, ensure_ascii=False, indent=2)
+    _save_ranking_file(file_path, new_data)
     return {"ok": True, "word": word, "from": move.from_pos, "to": move.to_pos, "total": total}
 
 @app.post("/api/rankings/{filename}/insert-or-move")
@@ -474,8 +486,7 @@ def insert_or_move_word(filename: str, req: InsertOrMoveRequest, _: None = Depen
     if len(new_data) != expected_len:
         raise HTTPException(status_code=500, detail="Inconsistència de longitud")
     # Desa
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(new_data, f, ensure_ascii=False, indent=2)
+    _save_ranking_file(file_path, new_data)
     return {
         "ok": True,
         "action": "inserted" if inserting else "moved",
@@ -548,8 +559,7 @@ def add_new_word(filename: str, req: AddNewWordRequest, _: None = Depends(requir
     items.insert(to_pos, (word, to_pos))
     # Reindexa
     new_data = {w: i for i, (w, _) in enumerate(items)}
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(new_data, f, ensure_ascii=False, indent=2)
+    _save_ranking_file(file_path, new_data)
     # Log
     _append_new_word_log({
         "word": word,
@@ -583,23 +593,22 @@ def generate_ranking(req: GenerateRequest, _: None = Depends(require_auth)):
     file_path = WORDS_DIR / filename
     if file_path.exists():
         raise HTTPException(status_code=400, detail="Ja existeix")
-    diccionari_json = Path("data/diccionari.json")
+    diccionari_path = Path("data/diccionari.bin")
     from diccionari import Diccionari
-    if diccionari_json.exists():
+    if Diccionari.existeix(str(diccionari_path)):
         try:
-            dicc = Diccionari.load(str(diccionari_json))
+            dicc = Diccionari.load(str(diccionari_path))
         except Exception:
             dicc = Diccionari.obtenir_diccionari()
-            dicc.save(str(diccionari_json))
+            dicc.save(str(diccionari_path))
     else:
         dicc = Diccionari.obtenir_diccionari()
-        dicc.save(str(diccionari_json))
+        dicc.save(str(diccionari_path))
     from proximitat import carregar_model_fasttext, calcular_ranking_complet
     model = carregar_model_fasttext()
     paraules = dicc.totes_les_lemes()
     ranking = calcular_ranking_complet(word, paraules, model)
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(ranking, f, ensure_ascii=False, indent=2)
+    _save_ranking_file(file_path, ranking)
     return {"ok": True, "filename": filename, "total": len(ranking)}
 
 @app.post("/api/ai-generate")
@@ -647,17 +656,19 @@ _MODEL = None
 def _get_diccionari():
     global _DICC
     from diccionari import Diccionari
-    diccionari_json = Path("data/diccionari.json")
+    diccionari_path = Path("data/diccionari.bin")
     if _DICC is None:
-        if diccionari_json.exists():
+        if Diccionari.existeix(str(diccionari_path)):
             try:
-                _DICC = Diccionari.load(str(diccionari_json))
+                _DICC = Diccionari.load(str(diccionari_path))
             except Exception:
                 _DICC = Diccionari.obtenir_diccionari()
-                _DICC.save(str(diccionari_json))
+                _DICC.save(str(diccionari_path))
         else:
             _DICC = Diccionari.obtenir_diccionari()
-            _DICC.save(str(diccionari_json))
+            _DICC.save(str(diccionari_path))
+        # Es manté en memòria durant tota la vida del procés: millor la versió compacta
+        _DICC = _DICC.compactar()
     return _DICC
 
 def _get_model():
@@ -698,8 +709,7 @@ def generate_random(req: RandomGenerateRequest, _: None = Depends(require_auth))
         if file_path.exists():
             continue
         ranking = calcular_ranking_complet(w, paraules, model)
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(ranking, f, ensure_ascii=False, indent=2)
+        _save_ranking_file(file_path, ranking)
         generats.append({"word": w, "filename": filename, "total": len(ranking)})
     return {"ok": True, "generated": generats, "count": len(generats)}
 
@@ -955,8 +965,7 @@ def delete_word(filename: str, pos: int, _: None = Depends(require_auth)):
     deleted_word, _ = items.pop(pos)
     # Reindexa
     new_data = {w: i for i, (w, _) in enumerate(items)}
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(new_data, f, ensure_ascii=False, indent=2)
+    _save_ranking_file(file_path, new_data)
     return {"ok": True, "deleted": deleted_word, "pos": pos, "total": len(items)}
 
 # ==================== ENDPOINTS DE COMENTARIS ====================
@@ -0,0 +1,264 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+Seccio = Union[array, bytes]
+
+
+class Taules:
+    """
+    Contenidor binari de taules (arrays numèrics i blocs de bytes) obert amb mmap.
+
+    Pensat per dades de només lectura que han de compartir diversos processos: el sistema operatiu
+    manté una sola còpia de les pàgines a la page cache i cada procés s'hi adjunta sense copiar-les.
+
+    Format (little-endian):
+      - capçalera: magic 'RBQT', versió, nombre de seccions i resum SHA-1 de tot el que la segueix
+      - taula de seccions: nom, tipus (codi d'array o 'B' per bytes), offset i mida en bytes
+      - dades de cada secció, alineades a 8 bytes
+    La secció '__meta__' (JSON) és opcional i conté metadades lliures. Els fitxers de la versió 1
+    (sense resum) encara es poden llegir.
+    """
+
+    MAGIC = b"RBQT"
+    VERSIO = 2
+    CAPCALERES = {1: struct.Struct("<4sHHI"), 2: struct.Struct("<4sHHI20s")}
+    CAPCALERA = CAPCALERES[VERSIO]
+    ENTRADA = struct.Struct("<32s2s6xQQ")
+    META = "__meta__"
+
+    def __init__(self, path, verificar: bool = False):
+        """Obre 'path'. Amb 'verificar' es comprova el resum de la capçalera (llegeix tot el fitxer)."""
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, versio = struct.unpack_from("<4sH", self._mm, 0) if len(self._mm) >= 6 else (b"", 0)
+        capcalera = self.CAPCALERES.get(versio)
+        if magic != self.MAGIC or capcalera is None:
+            raise ValueError(f"Format de taules desconegut: {self.path}")
+        if len(self._mm) < capcalera.size:
+            raise ValueError(f"Fitxer de taules massa curt: {self.path}")
+        _, _, n_seccions, _, *resum = capcalera.unpack_from(self._mm, 0)
+        if verificar and resum and hashlib.sha1(memoryview(self._mm)[capcalera.size:]).digest() != resum[0]:
+            raise ValueError(f"Fitxer de taules malmès (el resum no coincideix): {self.path}")
+        self._seccions: Dict[str, Tuple[str, int, int]] = {}
+        pos = capcalera.size
+        for _ in range(n_seccions):
+            nom, tipus, offset, mida = self.ENTRADA.unpack_from(self._mm, pos)
+            pos += self.ENTRADA.size
+            if offset + mida > len(self._mm):
+                raise ValueError(f"Fitxer de taules truncat: {self.path}")
+            self._seccions[nom.rstrip(b"\0").decode("utf-8")] = (tipus.rstrip(b"\0").decode("ascii"), offset, mida)
+        meta = self._seccions.get(self.META)
+        self.meta = json.loads(bytes(self.bytes(self.META)).decode("utf-8")) if meta else {}
+
+    @classmethod
+    def es_fitxer_taules(cls, path) -> bool:
+        try:
+            with open(path, "rb") as f:
+                return f.read(len(cls.MAGIC)) == cls.MAGIC
+        except OSError:
+            return False
+
+    def __contains__(self, nom: str) -> bool:
+        return nom in self._seccions
+
+    def __getitem__(self, nom: str):
+        return self.array(nom)
+
+    def bytes(self, nom: str) -> memoryview:
+        _, offset, mida = self._seccions[nom]
+        return memoryview(self._mm)[offset:offset + mida]
+
+    def array(self, nom: str):
+        """Secció com a array de només lectura (memoryview sobre el mmap, sense còpia)."""
+        tipus, offset, mida = self._seccions[nom]
+        if sys.byteorder == "little":
+            return memoryview(self._mm)[offset:offset + mida].cast(tipus)
+        arr = array(tipus, self._mm[offset:offset + mida])
+        arr.byteswap()
+        return arr
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._mm)
+
+    @classmethod
+    def escriure(cls, path, seccions: Dict[str, Seccio], meta: Optional[dict] = None) -> None:
+        """Escriu les seccions a 'path' de manera atòmica (fitxer temporal + os.replace)."""
+        seccions = dict(seccions)
+        if meta is not None:
+            seccions[cls.META] = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+
+        entrades = []
+        dades = []
+        offset = cls.CAPCALERA.size + cls.ENTRADA.size * len(seccions)
+        for nom, valor in seccions.items():
+            offset = (offset + 7) & ~7
+            if isinstance(valor, array):
+                tipus = valor.typecode
+                if sys.byteorder == "big":
+                    valor = array(tipus, valor)
+                    valor.byteswap()
+                contingut = valor.tobytes()
+            else:
+                tipus = "B"
+                contingut = bytes(valor)
+            entrades.append(cls.ENTRADA.pack(nom.encode("utf-8"), tipus.encode("ascii"), offset, len(contingut)))
+            dades.append((offset, contingut))
+            offset += len(contingut)
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+        resum = hashlib.sha1()
+        with open(tmp, "wb") as f:
+            f.write(b"\0" * cls.CAPCALERA.size)
+            for bloc in entrades:
+                f.write(bloc)
+                resum.update(bloc)
+            for offset, contingut in dades:
+                for bloc in (b"\0" * (offset - f.tell()), contingut):
+                    f.write(bloc)
+                    resum.update(bloc)
+            f.seek(0)
+            f.write(cls.CAPCALERA.pack(cls.MAGIC, cls.VERSIO, len(seccions), 0, resum.digest()))
+        os.replace(tmp, path)
+
+
+class TaulaCadenes:
+    """
+    Llista de cadenes desada com un sol bloc UTF-8 més un array d'offsets.
+
+    L'accés per índex descodifica només la cadena demanada. Per cercar una cadena es fa servir,
+    per ordre de preferència, la taula de dispersió 'dispersio' (CRC32 + sondeig lineal), la
+    cerca binària sobre 'ordre' (índexs ordenats pels bytes UTF-8) o la cerca binària sobre la
+    taula mateixa, que llavors ha d'estar ordenada.
+    """
+
+    def __init__(self, offsets, blob, ordre=None, dispersio=None):
+        self.offsets = offsets
+        self.blob = blob
+        self.ordre = ordre
+        self.dispersio = dispersio
+
+    @staticmethod
+    def _taula_dispersio(codificades: List[bytes]) -> array:
+        mida = 8
+        while mida < 2 * len(codificades):
+            mida *= 2
+        mascara = mida - 1
+        taula = array("i", [-1]) * mida
+        for i, c in enumerate(codificades):
+            pos = zlib.crc32(c) & mascara
+            while taula[pos] != -1:
+                pos = (pos + 1) & mascara
+            taula[pos] = i
+        return taula
+
+    @classmethod
+    def seccions(cls, nom: str, cadenes: List[str], amb_ordre: bool = False,
+                 amb_dispersio: bool = False) -> Dict[str, Seccio]:
+        codificades = [c.encode("utf-8") for c in cadenes]
+        offsets = array("I", [0]) * (len(codificades) + 1)
+        total = 0
+        for i, c in enumerate(codificades):
+            total += len(c)
+            offsets[i + 1] = total
+        seccions: Dict[str, Seccio] = {f"{nom}.off": offsets, f"{nom}.txt": b"".join(codificades)}
+        if amb_ordre:
+            seccions[f"{nom}.ord"] = array("i", sorted(range(len(codificades)), key=codificades.__getitem__))
+        if amb_dispersio:
+            seccions[f"{nom}.disp"] = cls._taula_dispersio(codificades)
+        return seccions
+
+    @classmethod
+    def de_taules(cls, taules, nom: str) -> "TaulaCadenes":
+        """Taula '<nom>' d'un Taules o de qualsevol dict de seccions (p. ex. el que retorna 'seccions')."""
+        ordre = taules[f"{nom}.ord"] if f"{nom}.ord" in taules else None
+        dispersio = taules[f"{nom}.disp"] if f"{nom}.disp" in taules else None
+        return cls(taules[f"{nom}.off"], taules[f"{nom}.txt"], ordre, dispersio)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def _bytes(self, i: int) -> bytes:
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]])
+
+    def __getitem__(self, i: int) -> str:
+        # str() descodifica directament del buffer (sense la còpia intermèdia a bytes)
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __iter__(self) -> Iterable[str]:
+        return (self[i] for i in range(len(self)))
+
+    def index(self, cadena: str) -> Optional[int]:
+        """Índex de 'cadena' a la taula, o None si no hi és."""
+        clau = cadena.encode("utf-8")
+        offsets, blob, dispersio = self.offsets, self.blob, self.dispersio
+        if dispersio is not None:
+            # Camí de /guess: variables locals i comparació sobre el buffer, sense crides per sonda
+            mascara = len(dispersio) - 1
+            pos = zlib.crc32(clau) & mascara
+            while True:
+                i = dispersio[pos]
+                if i < 0:
+                    return None
+                if blob[offsets[i]:offsets[i + 1]] == clau:
+                    return i
+                pos = (pos + 1) & mascara
+        ordre = self.ordre
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mig = (lo + hi) // 2
+            i = ordre[mig] if ordre is not None else mig
+            if self._bytes(i) < clau:
+                lo = mig + 1
+            else:
+                hi = mig
+        if lo < len(self):
+            i = ordre[lo] if ordre is not None else lo
+            if self._bytes(i) == clau:
+                return i
+        return None
+
+
+@contextmanager
+def bloqueig_fitxer(path, temps_maxim: float = 30.0):
+    """Bloqueig entre processos basat en un fitxer '.lock' creat amb O_EXCL (portable a Windows)."""
+    lock = Path(f"{path}.lock")
+    lock.parent.mkdir(parents=True, exist_ok=True)
+    inici = time.monotonic()
+    while True:
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                # Bloqueig orfe d'un procés que ha mort: s'allibera passat el temps màxim
+                if time.time() - os.stat(lock).st_mtime > temps_maxim:
+                    os.unlink(lock)
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.monotonic() - inici > temps_maxim:
+                raise TimeoutError(f"No s'ha pogut obtenir el bloqueig {lock}")
+            time.sleep(0.01)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        try:
+            os.unlink(lock)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,49 @@
+import importlib
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Els mòduls del projecte són a l'arrel (sense paquet)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+RANKING = {"gat": 0, "gos": 1, "mix": 2, "peix": 3, "lloro": 4}
+
+
+def escriure_json(path, dades):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(dades, f, ensure_ascii=False)
+
+
+@pytest.fixture(scope="module")
+def servidor(tmp_path_factory):
+    """server.py importat sobre un directori de dades mínim (diccionari i un rànquing)."""
+    for modul in ("fastapi", "httpx", "dotenv", "requests", "rapidfuzz"):
+        pytest.importorskip(modul)
+    from fastapi.testclient import TestClient
+
+    directori = tmp_path_factory.mktemp("servidor")
+    (directori / "data" / "words").mkdir(parents=True)
+    escriure_json(directori / "data" / "diccionari.json", {
+        "mapping_flexions_multi": {p: [p] for p in RANKING},
+        "canoniques": {p: [p] for p in RANKING},
+        "lema_categories": {p: ["NC"] for p in RANKING},
+        "freq": {p: 100 for p in RANKING},
+    })
+    escriure_json(directori / "data" / "words" / "gat.json", RANKING)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(directori)
+        mp.setenv("DEFAULT_REBUSCADA", "gat")
+        mp.setenv("CALENDARI_PATH", str(directori / "data" / "calendari.json"))
+        mp.setenv("EVENTS_LOG_PATH", str(directori / "game.jsonl"))
+        mp.setenv("STATS_PATH", str(directori / "data" / "estadistiques.json"))
+        mp.setenv("RANKING_RELOAD_INTERVAL", "0")
+        sys.modules.pop("server", None)
+        server = importlib.import_module("server")
+        try:
+            yield server, TestClient(server.app), directori
+        finally:
+            server.registre.tancar()
+            server.escoltador_logs.stop()
+            sys.modules.pop("server", None)
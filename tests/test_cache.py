@@ -0,0 +1,133 @@
+from cache import Cache2Q, CacheLRU
+
+
+class CacheBytes(Cache2Q):
+    """Cache2Q on el valor desat és directament la seva mida en bytes."""
+
+    def mida_entrada(self, valor):
+        return valor
+
+
+def comprovar_invariants(cache):
+    assert cache.bytes == sum(cache._mides.values())
+    assert cache._bytes_a1in == sum(cache._mides[c] for c in cache._a1in)
+    assert not set(cache._a1in) & set(cache._am)
+    assert not set(cache._fantasmes) & set(cache.claus())
+    assert sorted(cache._mides) == sorted(cache.claus())
+
+
+def test_lru_expulsa_la_menys_usada():
+    cache = CacheLRU(2)
+    cache.desar("a", 1)
+    cache.desar("b", 2)
+    assert cache.obtenir("a") == 1
+    cache.desar("c", 3)
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert cache.estadistiques()["expulsions"] == 1
+
+
+def test_2q_promou_a_la_lru_quan_torna_despres_de_sortir_de_la_fifo():
+    cache = CacheBytes(4, 1000)
+    cache.desar("a", 1)
+    for i in range(4):
+        cache.desar(f"s{i}", 1)
+    assert "a" not in cache
+    assert cache.estadistiques()["fantasmes"] >= 1
+    cache.desar("a", 1)
+    assert "a" in cache._am
+    assert cache.promocions == 1
+    comprovar_invariants(cache)
+
+
+def test_2q_un_encert_a_la_fifo_no_promou():
+    cache = CacheBytes(4, 1000)
+    cache.desar("a", 1)
+    assert cache.obtenir("a") == 1
+    assert "a" in cache._a1in and "a" not in cache._am
+
+
+def test_2q_resisteix_recorreguts_limitada_per_bytes():
+    mb = 1 << 20
+    cache = CacheBytes(1000, 10 * mb)
+    for clau in ("h1", "h2"):
+        cache.desar(clau, mb)
+    for i in range(100):
+        cache.desar(f"s{i}", mb)
+        for clau in ("h1", "h2"):
+            if cache.obtenir(clau) is None:
+                cache.desar(clau, mb)
+    assert "h1" in cache._am and "h2" in cache._am
+    assert cache.bytes <= 10 * mb
+    comprovar_invariants(cache)
+
+
+def test_2q_resisteix_recorreguts_limitada_per_entrades():
+    # El límit d'entrades s'assoleix molt abans que el de bytes: la FIFO també ha de cedir
+    mb = 1 << 20
+    cache = CacheBytes(10, 256 * mb)
+    for clau in ("h1", "h2"):
+        cache.desar(clau, mb)
+    for i in range(30):
+        cache.desar(f"s{i}", mb)
+        for clau in ("h1", "h2"):
+            if cache.obtenir(clau) is None:
+                cache.desar(clau, mb)
+    assert "h1" in cache._am and "h2" in cache._am
+    assert len(cache) == 10
+    comprovar_invariants(cache)
+
+
+def test_2q_les_fixades_no_s_expulsen():
+    cache = CacheBytes(3, 100)
+    cache.desar("avui", 40)
+    cache.desar("dema", 40)
+    cache.fixar(["avui", "dema"])
+    for i in range(20):
+        cache.desar(f"s{i}", 30)
+    assert "avui" in cache and "dema" in cache
+    comprovar_invariants(cache)
+
+
+def test_2q_fixades_per_sobre_del_pressupost():
+    cache = CacheBytes(10, 50)
+    cache.desar("a", 40)
+    cache.fixar(["a", "b"])
+    cache.desar("b", 40)
+    # Només queden entrades fixades: se supera el pressupost en lloc d'expulsar-les
+    assert "a" in cache and "b" in cache
+    assert cache.bytes == 80
+    cache.fixar([])
+    assert cache.bytes <= 50
+
+
+def test_2q_estadistiques_no_publiquen_les_claus_fixades():
+    cache = CacheBytes(10, 100)
+    cache.desar("secreta", 1)
+    cache.fixar(["secreta"])
+    estadistiques = cache.estadistiques()
+    assert estadistiques["fixades"] == 1
+    assert "secreta" not in repr(estadistiques)
+
+
+def test_2q_substituir_i_descartar_mantenen_els_bytes():
+    cache = CacheBytes(10, 1000)
+    cache.desar("a", 10)
+    cache.desar("a", 25)
+    assert cache.bytes == 25
+    assert cache.obtenir("a") == 25
+    cache.desar("b", 5)
+    cache.descartar("a")
+    assert cache.bytes == 5 and "a" not in cache
+    comprovar_invariants(cache)
+    cache.buidar()
+    assert cache.bytes == 0 and len(cache) == 0
+
+
+def test_2q_comptadors():
+    cache = CacheBytes(10, 1000)
+    assert cache.obtenir("x") is None
+    cache.desar("x", 1)
+    assert cache.obtenir("x") == 1
+    assert "x" in cache  # 'in' no compta
+    estadistiques = cache.estadistiques()
+    assert (estadistiques["encerts"], estadistiques["fallades"]) == (1, 1)
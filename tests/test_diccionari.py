@@ -0,0 +1,125 @@
+import json
+
+import pytest
+
+from diccionari import Diccionari, DiccionariCompartit
+from taules import Taules
+
+FLEXIONS = {
+    "anar": {"anar", "vaig", "va", "anem"},
+    "gat": {"gat", "gats", "gata", "gates"},
+    "cant": {"cant", "cants", "canta"},
+    "cantar": {"cantar", "canta", "canten"},
+    "so": {"so", "sons"},
+    "son": {"son", "sons"},
+    "creure": {"creure", "crec"},
+    "córrer": {"córrer", "corro"},
+}
+CATEGORIES = {"anar": {"VM"}, "gat": {"NC"}, "cant": {"NC"}, "cantar": {"VM"}, "so": {"NC"},
+              "son": {"NC"}, "creure": {"VM"}, "córrer": {"VM"}}
+FREQ = {"anar": 900, "gat": 300, "cant": 10, "cantar": 100, "so": 50, "son": 80, "creure": 70, "córrer": 40}
+CONSULTES = [
+    "anar", "gat", "son", "córrer",                     # lemes
+    "vaig", "gates", "canta", "sons", " Gats ", "CANTEN",  # flexions (nom abans que verb, després freqüència)
+    "anar-se", "córrer-se", "creure's",                 # verbs pronominals
+    "vaig-se", "gat-se", "anar's", "cantar's", "creure-se", "xyz", "", "-se",  # no vàlides
+]
+
+
+def diccionari():
+    mapping = {}
+    for lema, formes in FLEXIONS.items():
+        for forma in formes:
+            mapping.setdefault(forma, set()).add(lema)
+    return Diccionari(mapping, {l: set(f) for l, f in FLEXIONS.items()}, dict(FREQ),
+                      {l: set(c) for l, c in CATEGORIES.items()})
+
+
+def resolucio_antiga(dicc, paraula):
+    """Diccionari.obtenir_forma_canonica d'abans de la taula de resolució."""
+    paraula_norm = dicc.normalitzar_paraula(paraula)
+    if paraula_norm in dicc.mapping_flexions_multi:
+        lemes = dicc.mapping_flexions_multi[paraula_norm]
+        if not lemes:
+            return None, False
+        if paraula_norm in lemes:
+            forma_canonica = paraula_norm
+        else:
+            forma_canonica = max(lemes, key=lambda l: ('NC' in dicc.categories_lema(l), dicc.freq_lema(l)))
+        return forma_canonica, paraula_norm != forma_canonica
+    lema_verb = dicc._gestionar_pronominalitzacio(paraula_norm)
+    if lema_verb:
+        return lema_verb, True
+    return None, False
+
+
+def test_taula_de_resolucio_equival_a_la_resolucio_antiga(tmp_path):
+    referencia = diccionari()
+    esperat = {paraula: resolucio_antiga(referencia, paraula) for paraula in CONSULTES}
+    assert esperat["canta"] == ("cant", True) and esperat["sons"] == ("son", True)
+    assert esperat["anar-se"] == ("anar", True) and esperat["creure's"] == ("creure", True)
+    assert esperat["vaig-se"] == esperat["xyz"] == (None, False)
+
+    # Exportat amb la taula, JSON antic sense taula i instantània binària
+    referencia.exportar_json(str(tmp_path / "amb_taula.json"))
+    with open(tmp_path / "amb_taula.json", encoding="utf-8") as f:
+        dades = json.load(f)
+    assert dades["resolucio"]["anar-se"] == ["anar", True]
+    del dades["resolucio"]
+    with open(tmp_path / "sense_taula.json", "w", encoding="utf-8") as f:
+        json.dump(dades, f, ensure_ascii=False)
+    diccionari().save(str(tmp_path / "diccionari.bin"))
+
+    carregats = [Diccionari.load(str(tmp_path / nom)) for nom in ("amb_taula.json", "sense_taula.json")]
+    # load() deixa la taula preparada: la primera consulta ja no la construeix
+    assert all(dicc._resolucio is not None for dicc in carregats)
+    carregats.append(Diccionari.load(str(tmp_path / "diccionari.bin")))
+    assert isinstance(carregats[-1], DiccionariCompartit)
+    for dicc in [diccionari()] + carregats:
+        assert {paraula: dicc.obtenir_forma_canonica(paraula) for paraula in CONSULTES} == esperat
+
+
+def test_el_json_exportat_es_llegeix_tal_com_es_va_desar(tmp_path):
+    # Si la taula és al JSON, load_json la fa servir en lloc de recalcular-la
+    diccionari().exportar_json(str(tmp_path / "diccionari.json"))
+    with open(tmp_path / "diccionari.json", encoding="utf-8") as f:
+        dades = json.load(f)
+    dades["resolucio"]["gats"] = ["gat", False]
+    with open(tmp_path / "diccionari.json", "w", encoding="utf-8") as f:
+        json.dump(dades, f, ensure_ascii=False)
+    assert Diccionari.load_json(str(tmp_path / "diccionari.json")).obtenir_forma_canonica("gats") == ("gat", False)
+
+
+def test_instantania_anada_i_tornada(tmp_path):
+    original = diccionari()
+    path = str(tmp_path / "diccionari.bin")
+    original.save(path)
+    assert Taules.es_fitxer_taules(path)
+
+    carregat = Diccionari.load(path)
+    assert isinstance(carregat, DiccionariCompartit)
+    refet = carregat.a_diccionari()
+    assert refet.mapping_flexions_multi == original.mapping_flexions_multi
+    assert refet.canoniques == original.canoniques
+    assert refet.lema_categories == original.lema_categories
+    assert refet.freq == original.freq
+    for lema in FLEXIONS:
+        assert carregat.categories_lema(lema) == CATEGORIES[lema]
+        assert carregat.freq_lema(lema) == FREQ[lema]
+        assert sorted(carregat.totes_les_flexions(lema)) == sorted(FLEXIONS[lema])
+    assert carregat.lemes("sons") == {"so", "son"} and carregat.lemes("xyz") == set()
+    assert sorted(carregat.totes_les_lemes(freq_min=100)) == ["anar", "cantar", "gat"]
+
+
+@pytest.mark.parametrize("posicio", ["resum", "cos"])
+def test_instantania_malmesa_es_rebutja(tmp_path, posicio):
+    path = tmp_path / "diccionari.bin"
+    diccionari().save(str(path))
+    # El resum SHA-1 són els últims 20 bytes de la capçalera; al cos es canvia una freqüència
+    _, offset, _ = Taules(path)._seccions["lema_freq"]
+    byte = Taules.CAPCALERA.size - 1 if posicio == "resum" else offset
+    dades = bytearray(path.read_bytes())
+    dades[byte] ^= 0xFF
+    path.write_bytes(bytes(dades))
+    with pytest.raises(ValueError, match="resum"):
+        Diccionari.load(str(path))
@@ -0,0 +1,140 @@
+import json
+import os
+import random
+import runpy
+import sys
+from pathlib import Path
+
+import pytest
+
+from ranking import IndexPistes, RankingCompilat, Vocabulari, carregar_ranking_compilat
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def escriure_json(path, dades):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(dades, f, ensure_ascii=False)
+
+
+def test_vocabulari_nomes_afegeix_al_final(tmp_path):
+    path = tmp_path / Vocabulari.FITXER
+    vocabulari = Vocabulari(path)
+    ids = vocabulari.assegurar(["gat", "gos", "peix"])
+    assert sorted(ids.values()) == [0, 1, 2]
+    nous = vocabulari.assegurar(["gos", "àguila", "l·lot"])
+    assert nous["gos"] == ids["gos"]
+    assert {nous["àguila"], nous["l·lot"]} == {3, 4}
+
+    # Un altre procés que l'obri veu els mateixos ids
+    reobert = Vocabulari(path)
+    assert len(reobert) == 5
+    for paraula in ("gat", "gos", "peix", "àguila", "l·lot"):
+        assert reobert.paraula(reobert.id(paraula)) == paraula
+    assert reobert.id("inexistent") is None
+
+
+def test_vocabulari_migra_el_format_de_text(tmp_path):
+    (tmp_path / "vocabulari.txt").write_bytes("gat\ngos\nça\n".encode("utf-8"))
+    vocabulari = Vocabulari(tmp_path / Vocabulari.FITXER)
+    assert [vocabulari.id(p) for p in ("gat", "gos", "ça")] == [0, 1, 2]
+
+
+def test_ranking_compilat_anada_i_tornada(tmp_path):
+    vocabulari = Vocabulari(tmp_path / Vocabulari.FITXER)
+    vocabulari.assegurar(["altra"])  # paraula del vocabulari que no és al rànquing
+    dades = {"gos": 1, "gat": 0, "cadira": 3, "peix": 2, "moble": 3}
+    desti = tmp_path / f"gat{RankingCompilat.EXTENSIO}"
+    RankingCompilat.compilar(dades, vocabulari, desti)
+    ranking = RankingCompilat.obrir(desti, vocabulari)
+
+    assert ranking.total == len(dades)
+    assert ranking.objectiu == "gat"
+    assert dict(ranking.items()) == dades
+    for paraula, posicio in dades.items():
+        assert ranking.get(paraula) == posicio
+        assert ranking[paraula] == posicio
+    assert ranking.get("altra") is None and "altra" not in ranking
+    assert ranking.get("inexistent", -1) == -1
+    with pytest.raises(KeyError):
+        ranking["inexistent"]
+    # Ordenat per posició; els empats mantenen l'ordre del JSON
+    assert list(ranking.iter_ordenades()) == ["gat", "gos", "peix", "cadira", "moble"]
+    assert ranking.items_ordenats(1, 3) == [("gos", 1), ("peix", 2)]
+
+
+def test_ranking_compilat_rebutja_rankings_no_valids(tmp_path):
+    vocabulari = Vocabulari(tmp_path / Vocabulari.FITXER)
+    with pytest.raises(ValueError):
+        RankingCompilat.compilar({}, vocabulari, tmp_path / "buit.rank")
+    with pytest.raises(ValueError):
+        RankingCompilat.compilar({"gat": -1}, vocabulari, tmp_path / "negatiu.rank")
+    (tmp_path / "malmes.rank").write_bytes(b"no es un ranking")
+    with pytest.raises(ValueError):
+        RankingCompilat.obrir(tmp_path / "malmes.rank", vocabulari)
+
+
+def test_carregar_ranking_compilat_recompila_si_el_json_canvia(tmp_path):
+    vocabulari = Vocabulari(tmp_path / "bin" / Vocabulari.FITXER)
+    fitxer = tmp_path / "gat.json"
+    escriure_json(fitxer, {"gat": 0, "gos": 1, "peix": 2})
+    primer = carregar_ranking_compilat(fitxer, tmp_path / "bin", vocabulari)
+    assert carregar_ranking_compilat(fitxer, tmp_path / "bin", vocabulari).versio == primer.versio
+
+    escriure_json(fitxer, {"gat": 0, "peix": 1, "gos": 2, "lloro": 3})
+    os.utime(fitxer, ns=(fitxer.stat().st_atime_ns, fitxer.stat().st_mtime_ns + 10 ** 9))
+    segon = carregar_ranking_compilat(fitxer, tmp_path / "bin", vocabulari)
+    assert segon.versio != primer.versio
+    assert segon.get("gos") == 2 and segon.get("lloro") == 3
+    # La versió anterior, ja oberta, continua sent llegible
+    assert primer.get("gos") == 1 and primer.total == 3
+
+
+def test_script_de_compilacio_usa_el_vocabulari_del_servidor(tmp_path, monkeypatch, capsys):
+    words = tmp_path / "words"
+    words.mkdir()
+    escriure_json(words / "gat.json", {"gat": 0, "gos": 1, "peix": 2})
+    escriure_json(words / "gos.json", {"gos": 0, "gat": 1, "lloro": 2})
+    monkeypatch.setattr(sys, "argv", ["compile_rankings.py", str(words)])
+    with pytest.raises(SystemExit) as sortida:
+        runpy.run_path(str(ROOT / "scripts" / "compile_rankings.py"), run_name="__main__")
+    assert sortida.value.code == 0
+
+    # El servidor obre el vocabulari i els .rank generats i hi llegeix les mateixes posicions
+    vocabulari = Vocabulari(words / "bin" / Vocabulari.FITXER)
+    for nom in ("gat", "gos"):
+        with open(words / f"{nom}.json", encoding="utf-8") as f:
+            dades = json.load(f)
+        ranking = RankingCompilat.obrir(words / "bin" / f"{nom}{RankingCompilat.EXTENSIO}", vocabulari)
+        assert dict(ranking.items()) == dades
+
+
+def test_index_pistes_tria_com_la_regla_antiga(tmp_path):
+    rnd = random.Random(3)
+    vocabulari = Vocabulari(tmp_path / Vocabulari.FITXER)
+    for cas in range(40):
+        n = rnd.randint(1, 120)
+        paraules = list(dict.fromkeys("".join(rnd.choice("abcdeàç") for _ in range(rnd.randint(1, 6)))
+                                      for _ in range(n)))
+        # Posicions amb empats i freqüències amb pocs valors diferents, perquè els desempats comptin
+        ranking = {p: (0 if i == 0 else rnd.randint(1, len(paraules))) for i, p in enumerate(paraules)}
+        freq = {p: rnd.choice([0, 0, 1, 5, 5, 20]) for p in paraules}
+        desti = tmp_path / f"cas{cas}{RankingCompilat.EXTENSIO}"
+        RankingCompilat.compilar(ranking, vocabulari, desti)
+        compilat = RankingCompilat.obrir(desti, vocabulari)
+        index = IndexPistes.construir(compilat, lambda p: freq.get(p, 0))
+        desat = IndexPistes.obrir_o_construir(compilat, lambda p: freq.get(p, 0),
+                                              tmp_path / f"cas{cas}{IndexPistes.EXTENSIO}", "prova")
+        ranking_invers = sorted(ranking, key=ranking.get)
+        objectiu = ranking_invers[0]
+
+        for _ in range(30):
+            inici = rnd.randint(-5, len(paraules) + 5)
+            fi = inici + rnd.randint(-3, len(paraules))
+            excloses = set(rnd.sample(paraules, rnd.randint(0, len(paraules))))
+            # /pista abans de l'índex: màxim de (freqüència, -posició, paraula) al rang retallat
+            subllista = ranking_invers[max(0, inici):fi + 1] if fi >= max(0, inici) else []
+            candidats = [p for p in subllista if p not in excloses and p != objectiu]
+            esperat = max(candidats, key=lambda p: (freq[p], -ranking[p], p)) if candidats else None
+            assert index.millor_candidat(inici, fi, excloses) == esperat
+            assert desat.millor_candidat(inici, fi, list(excloses)) == esperat
@@ -0,0 +1,40 @@
+import json
+
+from registre import RegistreEsdeveniments
+
+
+def llegir_linies(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(linia) for linia in f]
+
+
+def test_registre_escriu_json_lines(tmp_path):
+    path = tmp_path / "joc" / "game.jsonl"
+    rebuts = []
+    registre = RegistreEsdeveniments(str(path), interval=0.01)
+    registre.afegir_subscriptor(rebuts.extend)
+    registre.registrar("guess", paraula="gòs", posicio=1)
+    registre.registrar("pista", rebuscada="gat")
+    registre.tancar()
+    esdeveniments = llegir_linies(path)
+    assert [(e["tipus"], e.get("paraula")) for e in esdeveniments] == [("guess", "gòs"), ("pista", None)]
+    assert all(isinstance(e["ts"], float) for e in esdeveniments)
+    # ensure_ascii=False: les lletres accentuades es desen tal qual
+    assert "gòs" in path.read_text(encoding="utf-8")
+    assert rebuts == esdeveniments
+
+
+def test_tancar_buida_la_cua_abans_d_aturar(tmp_path):
+    path = tmp_path / "game.jsonl"
+    # Amb un interval llarg i lots grans res no s'escriu fins que tancar() hi posa el final
+    registre = RegistreEsdeveniments(str(path), interval=60, mida_lot=10_000)
+    for i in range(1000):
+        registre.registrar("guess", n=i)
+    registre.tancar()
+    assert not registre._fil.is_alive()
+    assert [e["n"] for e in llegir_linies(path)] == list(range(1000))
+    assert registre.descartats == 0
+    # Un segon tancar() no bloqueja ni torna a escriure
+    registre.tancar()
+    assert len(llegir_linies(path)) == 1000
+
@@ -0,0 +1,222 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import pytest
+
+from conftest import RANKING, escriure_json
+
+httpx = pytest.importorskip("httpx")
+
+
+def test_estadistiques_no_publiquen_el_repte_d_avui_ni_els_futurs(servidor, monkeypatch):
+    server, client, directori = servidor
+    avui = server.calendari.avui()
+    escriure_json(directori / "data" / "calendari.json", {
+        (avui - timedelta(days=1)).isoformat(): "gos",
+        (avui + timedelta(days=1)).isoformat(): "peix",
+    })
+    server.calendari.recarregar_si_cal()
+    assert server.paraula_del_dia() == "gat"
+
+    assert client.get("/estadistiques", params={"rebuscada": "gos"}).status_code == 200
+    # Ni el repte d'avui (la paraula per defecte), ni el de dema, ni sense dir quin
+    for rebuscada in ("gat", "GAT", " gat ", "peix"):
+        assert client.get("/estadistiques", params={"rebuscada": rebuscada}).status_code == 403
+    assert client.get("/estadistiques").status_code == 422
+
+    monkeypatch.setattr(server, "ADMIN_PASSWORD", "secret")
+    assert client.get("/estadistiques", params={"rebuscada": "gat"},
+                      headers={"x-admin-token": "altre"}).status_code == 403
+    resposta = client.get("/estadistiques", params={"rebuscada": "gat"}, headers={"x-admin-token": "secret"})
+    assert resposta.status_code == 200
+    assert resposta.json()["rebuscada"] == "gat"
+
+
+def test_precarrega_no_distingeix_els_reptes_fixats(servidor):
+    server, client, directori = servidor
+    dema = (server.calendari.avui() + timedelta(days=1)).isoformat()
+    escriure_json(directori / "data" / "calendari.json", {dema: "peix"})
+    for paraula in ("peix", "lloro"):
+        escriure_json(directori / "data" / "words" / f"{paraula}.json", {paraula: 0, **RANKING})
+    server.calendari.recarregar_si_cal()
+    asyncio.run(server.precarregar_calendari())
+    assert "peix" in server.cache_rankings and "lloro" not in server.cache_rankings
+
+    async def precarregar(paraules):
+        resultat = server.precarregar_rankings(paraules)
+        await asyncio.gather(*server.carregues_en_curs.values())
+        return resultat
+
+    # El repte de dema (fixat i ja a memòria) surt igual que un que encara s'ha de carregar
+    esperat = {"en_curs": ["peix", "lloro"], "no_trobats": ["inexistent"]}
+    assert asyncio.run(precarregar(["peix", "lloro", "inexistent"])) == esperat
+    assert "lloro" in server.cache_rankings
+    resposta = client.post("/precarrega", json={"paraules": ["PEIX", "lloro", "inexistent"]})
+    assert resposta.status_code == 200
+    assert resposta.json() == esperat
+
+
+class ExecutorRegistrat(ThreadPoolExecutor):
+    """ThreadPoolExecutor que compta les tasques que rep."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.enviades = 0
+
+    def submit(self, *args, **kwargs):
+        self.enviades += 1
+        return super().submit(*args, **kwargs)
+
+
+class DiccionariFullFals:
+    """El mínim de DiccionariFull que fa servir /whynot; anota el fil de cada consulta."""
+
+    def __init__(self):
+        self.fils = []
+
+    def info(self, paraula):
+        self.fils.append(threading.current_thread().name)
+        return {"known_form": False}
+
+    def near(self, paraula, limit=10, min_score=60):
+        self.fils.append(threading.current_thread().name)
+        return {"candidates": [{"word": "gat"}]}
+
+
+def test_feina_bloquejant_als_pools_i_encerts_en_linia(servidor, monkeypatch):
+    server, client, _ = servidor
+    io = ExecutorRegistrat(max_workers=2, thread_name_prefix="rebuscada-io")
+    sqlite = ExecutorRegistrat(max_workers=2, thread_name_prefix="rebuscada-sqlite")
+    monkeypatch.setattr(server, "executor_io", io)
+    monkeypatch.setattr(server, "executor_sqlite", sqlite)
+    dicc_full = DiccionariFullFals()
+    monkeypatch.setattr(server, "dicc_full", dicc_full)
+    fils_carrega = []
+    carregar_disc = server._carregar_ranking_disc
+
+    def carregar_i_anotar(rebuscada):
+        fils_carrega.append(threading.current_thread().name)
+        return carregar_disc(rebuscada)
+
+    monkeypatch.setattr(server, "_carregar_ranking_disc", carregar_i_anotar)
+
+    # Càrrega en fred: al pool d'E/S
+    server.cache_rankings.descartar("gat")
+    assert client.post("/guess", json={"paraula": "gos", "rebuscada": "gat"}).status_code == 200
+    assert len(fils_carrega) == 1 and fils_carrega[0].startswith("rebuscada-io")
+    enviades_io = io.enviades
+
+    # Encerts simultanis de /guess: es resolen al bucle, sense passar per cap pool
+    async def intents():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as asincron:
+            return await asyncio.gather(*(
+                asincron.post("/guess", json={"paraula": paraula, "rebuscada": "gat"})
+                for paraula in ["gos", "mix", "peix", "lloro"] * 5))
+
+    assert all(r.status_code == 200 for r in asyncio.run(intents()))
+    assert io.enviades == enviades_io and sqlite.enviades == 0 and len(fils_carrega) == 1
+
+    # /whynot d'una paraula mal escrita: les consultes al diccionari complet, al pool de SQLite
+    resposta = client.post("/whynot", json={"paraula": "gatz", "rebuscada": "gat"})
+    assert resposta.status_code == 200 and resposta.json()["suggeriments"] == ["gat"]
+    assert len(dicc_full.fils) == 2 and all(fil.startswith("rebuscada-sqlite") for fil in dicc_full.fils)
+    io.shutdown()
+    sqlite.shutdown()
+
+
+def test_cache_whynot_distingeix_espais_i_versio_del_ranking(servidor, monkeypatch):
+    server, client, directori = servidor
+    dicc_full = DiccionariFullFals()
+    monkeypatch.setattr(server, "dicc_full", dicc_full)
+    server.cache_whynot.buidar()
+
+    def whynot(paraula):
+        resposta = client.post("/whynot", json={"paraula": paraula, "rebuscada": "gat"})
+        assert resposta.status_code == 200
+        return resposta.json()
+
+    sense_espai = whynot("gatx")
+    consultes = len(dicc_full.fils)
+    assert consultes > 0
+    assert whynot("gatx") == sense_espai and len(dicc_full.fils) == consultes
+
+    # Mateixa paraula normalitzada, però amb un espai: l'explicació és una altra i no es reaprofita
+    amb_espai = whynot("gatx ")
+    assert amb_espai["raó"] != sense_espai["raó"] and "espai" in amb_espai["raó"]
+    assert whynot("gatx") == sense_espai
+    consultes = len(dicc_full.fils)
+
+    # Una edició del rànquing en canvia la versió: l'explicació es torna a calcular
+    fitxer = directori / "data" / "words" / "gat.json"
+    st = fitxer.stat()
+    os.utime(fitxer, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert server.rankings_modificats() == ["gat"]
+    server.recarregar_ranking("gat")
+    assert whynot("gatx") == sense_espai and len(dicc_full.fils) > consultes
+
+
+def test_guess_batch_equival_a_un_guess_per_paraula(servidor):
+    server, client, _ = servidor
+    paraules = ["gos", " MIX ", "gat", "gos", "xyz", "g@t", "", "lloro"]
+    resposta = client.post("/guess-batch", json={"paraules": paraules, "rebuscada": "gat"})
+    assert resposta.status_code == 200
+    resultats = resposta.json()["resultats"]
+    assert [r["paraula"] for r in resultats] == paraules
+    for paraula, resultat in zip(paraules, resultats):
+        individual = client.post("/guess", json={"paraula": paraula, "rebuscada": "gat"})
+        if individual.status_code == 200:
+            assert resultat == {"paraula": paraula, "resultat": individual.json(), "error": None}
+        else:
+            assert individual.status_code == 400
+            assert resultat == {"paraula": paraula, "resultat": None, "error": individual.json()["detail"]}
+    assert resultats[2]["resultat"]["es_correcta"] and resultats[4]["error"]
+
+
+def test_guess_batch_limita_les_paraules_per_peticio(servidor):
+    server, client, _ = servidor
+    assert server.GUESS_BATCH_MAX == 500
+    maxim = client.post("/guess-batch", json={"paraules": ["gos"] * 500, "rebuscada": "gat"})
+    assert maxim.status_code == 200 and len(maxim.json()["resultats"]) == 500
+    massa = client.post("/guess-batch", json={"paraules": ["gos"] * 501, "rebuscada": "gat"})
+    assert massa.status_code == 400
+
+
+def llegir_metriques(text):
+    """Converteix el text de /metrics en ({mostra: valor}, {nom: tipus})."""
+    mostres, tipus = {}, {}
+    for linia in text.splitlines():
+        if linia.startswith("# TYPE "):
+            _, _, nom, tipus_metrica = linia.split(" ")
+            tipus[nom] = tipus_metrica
+        elif linia and not linia.startswith("#"):
+            mostra, valor = linia.rsplit(" ", 1)
+            mostres[mostra] = float(valor)
+    return mostres, tipus
+
+
+def test_metrics_exposa_comptadors_i_indicadors(servidor):
+    server, client, _ = servidor
+    assert client.post("/guess", json={"paraula": "gos", "rebuscada": "gat"}).status_code == 200
+    abans, _ = llegir_metriques(client.get("/metrics").text)
+    server.recarregar_ranking("gat")
+
+    resposta = client.get("/metrics")
+    assert resposta.status_code == 200
+    assert resposta.headers["content-type"].startswith("text/plain; version=0.0.4")
+    mostres, tipus = llegir_metriques(resposta.text)
+    assert tipus["rebuscada_rankings_loaded"] == "gauge"
+    assert mostres["rebuscada_rankings_loaded"] == len(server.cache_rankings) >= 1
+    assert tipus["rebuscada_ranking_reloads_total"] == "counter"
+    clau = 'rebuscada_ranking_reloads_total{resultat="ok"}'
+    assert mostres[clau] == abans.get(clau, 0) + 1
+    assert tipus["rebuscada_ranking_load_seconds"] == "histogram"
+    assert mostres["rebuscada_ranking_load_seconds_count"] >= abans.get("rebuscada_ranking_load_seconds_count", 0) + 1
+    assert mostres['http_requests_total{method="POST",endpoint="/guess",status="200"}'] >= 1
+    assert tipus["rebuscada_events_dropped"] == "gauge" and mostres["rebuscada_events_dropped"] == 0
+    assert tipus["rebuscada_cache_hits_total"] == "counter"
+    assert 'rebuscada_cache_entries{cache="rankings"}' in mostres
+    assert mostres["process_resident_memory_bytes"] > 0
@@ -0,0 +1,65 @@
+import os
+
+from conftest import RANKING, escriure_json
+
+
+def test_ranking_retorna_etag_i_cache_control(servidor):
+    _, client, _ = servidor
+    resposta = client.get("/ranking", params={"rebuscada": "gat", "limit": 3})
+    assert resposta.status_code == 200
+    assert resposta.headers["etag"].startswith('"')
+    assert "max-age=" in resposta.headers["cache-control"]
+    dades = resposta.json()
+    assert dades["total_paraules"] == len(RANKING)
+    assert [item["paraula"] for item in dades["ranking"]] == ["gat", "gos", "mix"]
+
+
+def test_ranking_condicional_respon_304(servidor):
+    _, client, _ = servidor
+    params = {"rebuscada": "gat", "limit": 3}
+    etag = client.get("/ranking", params=params).headers["etag"]
+
+    resposta = client.get("/ranking", params=params, headers={"If-None-Match": etag})
+    assert resposta.status_code == 304
+    assert resposta.content == b""
+    assert resposta.headers["etag"] == etag
+
+    # Comparació feble i llistes d'ETags
+    assert client.get("/ranking", params=params, headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+    assert client.get("/ranking", params=params, headers={"If-None-Match": f'"altre", {etag}'}).status_code == 304
+    assert client.get("/ranking", params=params, headers={"If-None-Match": '"altre"'}).status_code == 200
+
+
+def test_ranking_etag_depen_del_limit(servidor):
+    _, client, _ = servidor
+    etag_3 = client.get("/ranking", params={"rebuscada": "gat", "limit": 3}).headers["etag"]
+    etag_4 = client.get("/ranking", params={"rebuscada": "gat", "limit": 4}).headers["etag"]
+    assert etag_3 != etag_4
+    resposta = client.get("/ranking", params={"rebuscada": "gat", "limit": 4}, headers={"If-None-Match": etag_3})
+    assert resposta.status_code == 200
+
+
+def test_ranking_del_dia_caduca_a_mitjanit(servidor):
+    server, client, _ = servidor
+    resposta = client.get("/ranking", params={"limit": 3})
+    assert resposta.status_code == 200
+    max_age = int(resposta.headers["cache-control"].split("max-age=")[1].split(",")[0])
+    assert max_age <= server.calendari.segons_fins_canvi() + 1
+
+
+def test_ranking_editat_canvia_l_etag(servidor):
+    server, client, directori = servidor
+    params = {"rebuscada": "gat", "limit": 3}
+    etag = client.get("/ranking", params=params).headers["etag"]
+
+    fitxer = directori / "data" / "words" / "gat.json"
+    escriure_json(fitxer, {"gat": 0, "mix": 1, "gos": 2, "peix": 3, "lloro": 4})
+    st = fitxer.stat()
+    os.utime(fitxer, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert server.rankings_modificats() == ["gat"]
+    server.recarregar_ranking("gat")
+
+    resposta = client.get("/ranking", params=params, headers={"If-None-Match": etag})
+    assert resposta.status_code == 200
+    assert resposta.headers["etag"] != etag
+    assert [item["paraula"] for item in resposta.json()["ranking"]] == ["gat", "mix", "gos"]